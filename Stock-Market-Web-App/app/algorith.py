@@ -1,8 +1,19 @@
-import joblib
 import pandas as pd
 import numpy as np
-import ast
 import os
+import sys
+
+# Numeric coercion is shared with the training code at the repository root
+REPO_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+from coercion import coerce_scalar, to_numeric_frame
+from features import PRIMITIVE_INPUTS, build_features, from_primitives
+from model_registry import load_current
+from scoring import CompiledScorer
 
 
 # ======================================================
@@ -40,34 +51,12 @@ The expected param df is a data frame containing the following columns:
 # ======================================================
 def safe_num(x):
     """Converts messy input into a clean float."""
-    if isinstance(x, (int, float, np.number)):
-        return float(x)
-
-    if isinstance(x, (list, tuple, np.ndarray)):
-        return safe_num(x[0])
-
-    if isinstance(x, str):
-        txt = x.strip()
-
-        if txt.startswith("[") and txt.endswith("]"):
-            try:
-                arr = ast.literal_eval(txt)
-                return safe_num(arr[0])
-            except:
-                pass
-
-        txt = txt.replace(",", "").replace("$", "").replace("%", "")
-        try:
-            return float(txt)
-        except:
-            return np.nan
-
-    return np.nan
+    return coerce_scalar(x)
 
 
 def clean_df_numeric(df: pd.DataFrame) -> pd.DataFrame:
     """Converts all values in the dataframe to numeric floats wherever possible."""
-    return df.applymap(safe_num)
+    return to_numeric_frame(df)
 
 
 # ======================================================
@@ -76,73 +65,68 @@ def clean_df_numeric(df: pd.DataFrame) -> pd.DataFrame:
 def add_engineered_features(df: pd.DataFrame) -> pd.DataFrame:
     """Calculates all derived model features from raw primitives."""
 
-    df = clean_df_numeric(df).copy()
+    df = clean_df_numeric(df[[c for c in PRIMITIVE_INPUTS if c in df.columns]])
+    df = df.reindex(columns=PRIMITIVE_INPUTS, fill_value=0)
 
-    # Base derived intermediate metrics
-    df["market_derived_shares"] = df["marketPrice"] * df["sharesOutstanding"]
-    df["metrics_annual_earningsYield"] = df["netIncome"] / df["market_derived_shares"]
-
-    # Standard feature names
-    df["cashflow_annual_netStockIssuance"] = df["stockIssued"]
-    df["balance_annual_totalDebt"] = df["totalDebt"]
-    df["cashflow_annual_commonStockRepurchased"] = df["stockRepurchased"]
-    df["profile_lastDividend"] = df["dividendsPaid"]
-    df["profile_fullTimeEmployees"] = df["employees"]
-    df["metrics_annual_peRatio"] = 1 / (df["metrics_annual_earningsYield"] + 1e-9)
-
-    # Model input features
-    df["feature_debt_per_share"] = df["totalDebt"] / (df["sharesOutstanding"] + 1e-9)
-    df["feature_dilution_ratio"] = df["stockIssued"] / (df["sharesOutstanding"] + 1e-9)
-    df["feature_price_to_earnings_inverse"] = df["metrics_annual_earningsYield"]
-
-    return df
+    # Same feature definitions the model was trained with
+    return build_features(from_primitives(df))
 
 
 # ======================================================
 # 3) Column alignment
 # ======================================================
-def align_to_model_columns(
-    df: pd.DataFrame, col_path="alg/columns.pkl"
-) -> pd.DataFrame:
+def align_to_model_columns(df: pd.DataFrame, col_order) -> pd.DataFrame:
     """Ensures df has exactly the columns used at training."""
-    col_order = joblib.load(col_path)
-
     # add missing columns
     missing = [c for c in col_order if c not in df.columns]
     for col in missing:
         df[col] = 0
 
-    # reorder properly
-    return df[col_order]
+    # reorder properly; lags/changes of a single snapshot are undefined
+    df = df[col_order].replace([np.inf, -np.inf], np.nan)
+    return df.fillna(0)
 
 
 # ======================================================
 # 4) Model manager for efficient use
 # ======================================================
+def as_frame(values) -> pd.DataFrame:
+    """A dict (one company) or array (PRIMITIVE_INPUTS order) as a DataFrame."""
+    if isinstance(values, pd.DataFrame):
+        return values
+    if isinstance(values, dict):
+        return pd.DataFrame([values])
+    return pd.DataFrame(np.atleast_2d(values), columns=PRIMITIVE_INPUTS)
+
+
 class StockPredictor:
     """Wrapper class to manage model, scaling, and prediction pipeline."""
 
-    def __init__(
-        self,
-        model_path="alg/model.pkl",
-        scaler_path="alg/scaler.pkl",
-        col_path="alg/columns.pkl",
-    ):
+    def __init__(self, alg_path="alg", compiled=True, bundle=None):
+        # The registry's CURRENT bundle, memory-mapped once (see model_registry.py)
+        self.bundle = bundle if bundle is not None else load_current(alg_path)
+        self.col_order = self.bundle.columns
 
-        self.model = joblib.load(model_path)
-        self.scaler = joblib.load(scaler_path)
-        self.col_order = joblib.load(col_path)
-        self.col_path = col_path
+        # Linear models score through scoring.py; anything else uses pandas
+        self.scorer = None
+        if compiled and self.bundle.kind == "linear":
+            self.scorer = CompiledScorer(self.bundle)
 
     def preprocess(self, df: pd.DataFrame) -> pd.DataFrame:
         df = add_engineered_features(df)
-        df = align_to_model_columns(df, self.col_path)
+        df = align_to_model_columns(df, self.col_order)
         return df
 
-    def predict(self, df: pd.DataFrame):
+    def predict(self, values):
+        """Predictions for a DataFrame, a dict (one company) or an array"""
+        if self.scorer is not None:
+            return self.scorer.score(values)
+        return self.predict_frame(as_frame(values))
+
+    def predict_frame(self, df: pd.DataFrame):
+        """The full pandas path: features, alignment, scaling, model."""
         df = self.preprocess(df)
-        X = self.scaler.transform(df)
-        return self.model.predict(X)
+        return self.bundle.predict(df.to_numpy())
 
 
 # ======================================================
@@ -166,12 +150,9 @@ def main():
 
     df_test = pd.DataFrame(test_data)
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    model_path = os.path.join(BASE_DIR, "../alg/model.pkl")
-    model_path = os.path.abspath(model_path)
-    scaler_path = os.path.abspath(os.path.join(BASE_DIR, "../alg/scaler.pkl"))
-    cols_path = os.path.abspath(os.path.join(BASE_DIR, "../alg/columns.pkl"))
+    alg_path = os.path.abspath(os.path.join(BASE_DIR, "../alg"))
 
-    model = StockPredictor(model_path, scaler_path, cols_path)
+    model = StockPredictor(alg_path)
     preds = model.predict(df_test)
 
     print("\n=== ENGINEERED DF SAMPLE ===")
@@ -1,31 +1,71 @@
-from flask import request, flash, render_template
+from flask import current_app, request, flash, render_template
 import pandas as pd
-import yfinance as yf
 import plotly.express as px
 import plotly.graph_objects as go
 import os
+import time
+
+from .db import get_db
+from .heat_scores import latest_score
+from .market_data import REQUEST_BUDGET, YFinanceSource, fetch_market_data
 
 try:
-    from .algorith import StockPredictor
+    from .live_model import LiveModel
 except ImportError:
     # If running as standalone or algorith module doesn't exist
-    StockPredictor = None
+    LiveModel = None
 
 # --- Setup Paths & Model ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.abspath(os.path.join(BASE_DIR, ".."))
 
-MODEL_PATH = os.path.join(ROOT_DIR, "alg/model.pkl")
-SCALER_PATH = os.path.join(ROOT_DIR, "alg/scaler.pkl")
-COLS_PATH = os.path.join(ROOT_DIR, "alg/columns.pkl")
+MODEL_DIR = os.path.join(ROOT_DIR, "alg")
+
+# The registry's current model, reloaded in the background when a new one is
+# published (live_model.py); failed loads leave live_model.predictor as None
+live_model = LiveModel(MODEL_DIR) if LiveModel else None
+
+# Default market data; app.config["MARKET_DATA_SOURCE"] overrides it (e.g. a
+# market_data.StubSource in tests)
+default_source = YFinanceSource()
+
+# Stored scores loaded longer ago than this are ignored and the company is
+# scored live. Scores are loaded nightly after each trading day, and a night
+# with no new bars leaves loaded_at alone, so the newest score can be up to
+# four days old after a holiday weekend; one more day allows a missed run.
+MAX_SCORE_AGE = pd.Timedelta(days=5)
+# The heat score query's share of the request budget
+LOOKUP_TIMEOUT_MS = 500
+# After a failed lookup the database is skipped for this many seconds, so an
+# outage doesn't cost every request a connect timeout
+LOOKUP_BACKOFF = 30.0
+lookup_retry_at = 0.0
+
+
+def stored_score(ticker, predictor):
+    """
+    (score, as_of_date) precomputed nightly for the loaded model (heat_scores
+    table), or None on a miss, a score loaded more than MAX_SCORE_AGE ago, or
+    when the database is unavailable.
+    """
+    global lookup_retry_at
+    if time.monotonic() < lookup_retry_at:
+        return None
 
-# Initialize Predictor safely once when the module loads
-predictor = None
-if StockPredictor:
+    version = predictor.bundle.version or "legacy"
     try:
-        predictor = StockPredictor(MODEL_PATH, SCALER_PATH, COLS_PATH)
+        row = latest_score(get_db(), ticker, version, LOOKUP_TIMEOUT_MS)
     except Exception as e:
-        print(f"Warning: StockPredictor model could not load. {e}")
+        lookup_retry_at = time.monotonic() + LOOKUP_BACKOFF
+        print(f"Heat score lookup failed: {e}")
+        return None
+
+    if row is None:
+        return None
+    score, as_of_date, loaded_at = row
+    if pd.Timestamp.now(tz="UTC") - pd.Timestamp(loaded_at) > MAX_SCORE_AGE:
+        return None
+    return score, as_of_date
 
 
 def get_dashboard_data():
@@ -35,6 +75,7 @@ def get_dashboard_data():
     """
     data = {
         "prediction": None,
+        "prediction_as_of": None,
         "ticker": None,
         "graph1": None,
         "graph2": None,
@@ -49,24 +90,31 @@ def get_dashboard_data():
             flash("Please enter a ticker symbol.", "error")
         else:
             try:
-                # 1. Fetch Data
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period="1mo")
-                info = stock.info
+                # 1. Stored score, then market data (concurrently, each call
+                # under a deadline) in what is left of the request budget
+                start = time.perf_counter()
+                predictor = live_model.predictor if live_model else None
+                stored = stored_score(ticker, predictor) if predictor else None
+
+                source = current_app.config.get("MARKET_DATA_SOURCE", default_source)
+                budget = max(REQUEST_BUDGET - (time.perf_counter() - start), 0)
+                market = fetch_market_data(source, ticker, budget=budget)
+                hist, info, cashflow = market.history, market.info, market.cashflow
 
-                # Check if we got valid data
-                if hist.empty:
+                # Check if we got valid data (a missed deadline isn't "no data")
+                if hist.empty and "history" not in market.missing:
                     flash(
                         f"No data found for ticker {ticker}. Please check the symbol.",
                         "error",
                     )
                     return data
 
-                # Safely get cashflow
-                try:
-                    cashflow = stock.cashflow
-                except Exception:
-                    cashflow = pd.DataFrame()
+                if market.missing:
+                    flash(
+                        f"Some market data for {ticker} didn't arrive in time "
+                        f"({', '.join(market.missing)}); showing the rest.",
+                        "warning",
+                    )
 
                 # 2. Prepare Data for Model
                 def get_val(df, key):
@@ -91,11 +139,16 @@ def get_dashboard_data():
                     ),
                 }
 
-                # 3. Predict
-                if predictor:
+                # 3. Predict: precomputed score first, live scoring on a miss
+                if stored is not None:
+                    data["prediction"], data["prediction_as_of"] = stored
+                elif predictor and "info" in market.missing:
+                    # Live scoring on all-zero fundamentals would be misleading
+                    data["prediction"] = "N/A"
+                elif predictor:
                     try:
                         df_input = pd.DataFrame([stock_data])
-                        result = predictor.predict(df_input)
+                        result = live_model.predict(df_input)
                         data["prediction"] = result[0]
                     except Exception as e:
                         print(f"Prediction error: {e}")
@@ -162,56 +215,56 @@ def get_dashboard_data():
                         full_html=False, include_plotlyjs="cdn"
                     )
 
-                    # -- Graph 3: Financial Metrics --
-                    metrics = {
-                        "Market Cap": (
-                            info.get("marketCap", 0) / 1e9
-                            if info.get("marketCap")
-                            else 0
-                        ),
-                        "Total Debt": (
-                            stock_data["totalDebt"] / 1e9
-                            if stock_data["totalDebt"]
-                            else 0
-                        ),
-                        "Free Cash Flow": (
-                            stock_data["freeCashFlow"] / 1e9
-                            if stock_data["freeCashFlow"]
-                            else 0
-                        ),
-                        "Net Income": (
-                            stock_data["netIncome"] / 1e9
-                            if stock_data["netIncome"]
-                            else 0
-                        ),
-                    }
-                    # Remove 0 values
-                    metrics = {k: v for k, v in metrics.items() if v != 0}
-
-                    if metrics:
-                        fig3 = px.bar(
-                            x=list(metrics.keys()),
-                            y=list(metrics.values()),
-                            title=f"{ticker} Key Financials ($B)",
-                            labels={"x": "Metric", "y": "Billions ($)"},
-                            color=list(metrics.values()),
-                            color_continuous_scale="Blues",
-                        )
-                        fig3.update_layout(
-                            showlegend=False,
-                            plot_bgcolor="rgba(0,0,0,0)",
-                            paper_bgcolor="rgba(0,0,0,0)",
-                            font=dict(color="gray"),
-                            margin=dict(l=40, r=40, t=40, b=40),
-                        )
-                        data["graph3"] = fig3.to_html(
-                            full_html=False, include_plotlyjs="cdn"
-                        )
-                    else:
-                        data["graph3"] = (
-                            '<div style="color: gray; padding: 20px; text-align: center;">'
-                            "No financial data available</div>"
-                        )
+                # -- Graph 3: Financial Metrics (needs only info) --
+                metrics = {
+                    "Market Cap": (
+                        info.get("marketCap", 0) / 1e9
+                        if info.get("marketCap")
+                        else 0
+                    ),
+                    "Total Debt": (
+                        stock_data["totalDebt"] / 1e9
+                        if stock_data["totalDebt"]
+                        else 0
+                    ),
+                    "Free Cash Flow": (
+                        stock_data["freeCashFlow"] / 1e9
+                        if stock_data["freeCashFlow"]
+                        else 0
+                    ),
+                    "Net Income": (
+                        stock_data["netIncome"] / 1e9
+                        if stock_data["netIncome"]
+                        else 0
+                    ),
+                }
+                # Remove 0 values
+                metrics = {k: v for k, v in metrics.items() if v != 0}
+
+                if metrics:
+                    fig3 = px.bar(
+                        x=list(metrics.keys()),
+                        y=list(metrics.values()),
+                        title=f"{ticker} Key Financials ($B)",
+                        labels={"x": "Metric", "y": "Billions ($)"},
+                        color=list(metrics.values()),
+                        color_continuous_scale="Blues",
+                    )
+                    fig3.update_layout(
+                        showlegend=False,
+                        plot_bgcolor="rgba(0,0,0,0)",
+                        paper_bgcolor="rgba(0,0,0,0)",
+                        font=dict(color="gray"),
+                        margin=dict(l=40, r=40, t=40, b=40),
+                    )
+                    data["graph3"] = fig3.to_html(
+                        full_html=False, include_plotlyjs="cdn"
+                    )
+                else:
+                    data["graph3"] = (
+                        '<div style="color: gray; padding: 20px; text-align: center;">'
+                        "No financial data available</div>"
+                    )
 
                 # Set ticker after successful processing
                 data["ticker"] = ticker
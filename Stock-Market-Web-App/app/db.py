@@ -14,16 +14,28 @@ This file handles the initializing of the database connection
 
 def get_db():
     if "conn" not in g:
-        g.conn = psycopg2.connect(
-            database=current_app.config["DB_NAME"],
-            host=current_app.config["DB_HOST"],
-            port=current_app.config["DB_PORT"],
-            user=current_app.config["DB_USER"],
-            password=current_app.config["DB_PASSWORD"],
-        )
+        g.conn = connect(current_app.config)
     return g.conn
 
 
+# connect() opens a connection outside a request (e.g. load_heat_scores.py)
+# A down database fails after CONNECT_TIMEOUT seconds (DB_CONNECT_TIMEOUT in
+# the config overrides it) instead of stalling the request for minutes
+
+CONNECT_TIMEOUT = 3
+
+
+def connect(config):
+    return psycopg2.connect(
+        database=config["DB_NAME"],
+        host=config["DB_HOST"],
+        port=config["DB_PORT"],
+        user=config["DB_USER"],
+        password=config["DB_PASSWORD"],
+        connect_timeout=config.get("DB_CONNECT_TIMEOUT", CONNECT_TIMEOUT),
+    )
+
+
 def close_db(e=None):
     conn = g.pop("conn", None)
     if conn is not None:
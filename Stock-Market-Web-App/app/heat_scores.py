@@ -0,0 +1,93 @@
+import io
+import os
+
+
+"""
+
+Precomputed heat scores (the heat_scores table, databse/heat_scores.sql)
+
+Fundamentals only change quarterly, so the whole universe is scored nightly
+(score_universe.py at the repository root) and bulk-loaded here with
+load_heat_scores.py. The dashboard then reads a ticker's latest score with
+one primary-key lookup, and only scores live on a miss.
+
+"""
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_FILE = os.path.join(BASE_DIR, "..", "databse", "heat_scores.sql")
+
+COLUMNS = ["ticker", "as_of_date", "score", "model_version", "input_hash"]
+KEY = ["ticker", "model_version", "as_of_date"]
+
+# Rows whose inputs are unchanged (same model, same input hash) are skipped,
+# so loaded_at is when a row was first loaded or last changed
+UPSERT_SQL = f"""
+    insert into heat_scores ({", ".join(COLUMNS)})
+    select {", ".join(COLUMNS)} from heat_scores_stage
+    on conflict ({", ".join(KEY)}) do update
+        set score = excluded.score,
+            input_hash = excluded.input_hash,
+            loaded_at = now()
+        where heat_scores.input_hash <> excluded.input_hash
+"""
+
+LATEST_SQL = """
+    select score, as_of_date, loaded_at from heat_scores
+    where ticker = %s and model_version = %s
+    order by as_of_date desc
+    limit 1
+"""
+
+
+# -----------------------------
+# Loading
+# -----------------------------
+def ensure_schema(conn):
+    """Create the heat_scores table if it doesn't exist yet."""
+    with open(SCHEMA_FILE) as f:
+        schema = f.read()
+    with conn, conn.cursor() as cur:
+        cur.execute(schema)
+
+
+def load_scores(conn, scores):
+    """
+    Bulk upsert score_universe.py output (ticker, date, heat, model_version,
+    input_hash): COPY into a temp table, then one INSERT ... ON CONFLICT, all
+    in one transaction. Returns the number of rows inserted or changed.
+    """
+    rows = scores.rename(columns={"date": "as_of_date", "heat": "score"})[COLUMNS]
+    rows = rows.dropna(subset=["as_of_date", "score"])
+    rows = rows.drop_duplicates(subset=KEY, keep="last")
+
+    buffer = io.StringIO()
+    rows.to_csv(buffer, index=False, header=False, date_format="%Y-%m-%d")
+    buffer.seek(0)
+
+    with conn, conn.cursor() as cur:
+        cur.execute(
+            "create temp table heat_scores_stage "
+            "(like heat_scores including defaults) on commit drop"
+        )
+        cur.copy_expert(
+            f"copy heat_scores_stage ({', '.join(COLUMNS)}) "
+            "from stdin with (format csv)",
+            buffer,
+        )
+        cur.execute(UPSERT_SQL)
+        return cur.rowcount
+
+
+# -----------------------------
+# Lookup
+# -----------------------------
+def latest_score(conn, ticker, model_version, timeout_ms=None):
+    """
+    (score, as_of_date, loaded_at) of the newest stored score, or None. `timeout_ms`
+    caps the query (Postgres statement_timeout) for callers on a deadline.
+    """
+    with conn, conn.cursor() as cur:
+        if timeout_ms:
+            cur.execute("set local statement_timeout = %s", (int(timeout_ms),))
+        cur.execute(LATEST_SQL, (ticker, model_version))
+        return cur.fetchone()
@@ -0,0 +1,166 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# algorith puts the repository root on sys.path for the next two imports
+from .algorith import StockPredictor
+from model_bundle import load_bundle
+from model_registry import CANDIDATE, CURRENT, bundle_path, read_pointer
+
+
+"""
+
+Hot-reloaded models for the web app (see model_registry.py at the repo root)
+
+Every worker process keeps one LiveModel. A background thread polls the
+registry's CURRENT and CANDIDATE pointers and, when one changes, loads and
+verifies the new bundle and then swaps it in with a single assignment.
+Requests that are already running finish on the model they started with.
+Nothing waits for a load, and a broken bundle leaves the previous model
+serving.
+
+When a CANDIDATE is set, each prediction is also scored by it on a side
+thread, off the request path. status() compares the two models' outputs
+and latencies.
+
+"""
+
+RELOAD_SECONDS = 5.0
+UNSEEN = object()
+
+
+# -----------------------------
+# Shadow comparison
+# -----------------------------
+class ShadowStats:
+    """Running output/latency comparison of the candidate vs. CURRENT."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.rows = 0
+        self.abs_diff_sum = 0.0
+        self.max_abs_diff = 0.0
+        self.primary_seconds = 0.0
+        self.shadow_seconds = 0.0
+
+    def add(self, primary, shadow, primary_seconds, shadow_seconds):
+        diff = np.abs(np.asarray(shadow, dtype="float64") - primary)
+        with self.lock:
+            self.requests += 1
+            self.rows += len(diff)
+            self.abs_diff_sum += float(diff.sum())
+            self.max_abs_diff = max(self.max_abs_diff, float(diff.max(initial=0)))
+            self.primary_seconds += primary_seconds
+            self.shadow_seconds += shadow_seconds
+
+    def error(self):
+        with self.lock:
+            self.errors += 1
+
+    def summary(self):
+        with self.lock:
+            n = max(self.requests, 1)
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "mean_abs_diff": self.abs_diff_sum / max(self.rows, 1),
+                "max_abs_diff": self.max_abs_diff,
+                "primary_ms": 1000 * self.primary_seconds / n,
+                "shadow_ms": 1000 * self.shadow_seconds / n,
+            }
+
+
+# -----------------------------
+# Live model
+# -----------------------------
+class LiveModel:
+    """The registry's CURRENT predictor, plus a shadow-scored CANDIDATE."""
+
+    def __init__(self, alg_path, interval=RELOAD_SECONDS, watch=True):
+        self.alg_path = alg_path
+        self.interval = interval
+        self.predictor = None
+        self.shadow = None
+        self.shadow_stats = ShadowStats()
+        self.seen = {CURRENT: UNSEEN, CANDIDATE: UNSEEN}
+        self._shadow_pool = ThreadPoolExecutor(max_workers=1)
+
+        self.refresh()
+        if watch:
+            threading.Thread(target=self._watch, daemon=True).start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠ Model reload check failed: {e}")
+
+    def _load(self, name, version):
+        if version is not None:
+            bundle = load_bundle(bundle_path(self.alg_path, version))
+            return StockPredictor(bundle=bundle)
+        # No pointer: the pre-registry model for CURRENT, nothing for CANDIDATE
+        return StockPredictor(self.alg_path) if name == CURRENT else None
+
+    def refresh(self):
+        """Load any pointer that changed; on failure keep the old model."""
+        for name in (CURRENT, CANDIDATE):
+            version = read_pointer(self.alg_path, name)
+            if version == self.seen[name]:
+                continue
+            self.seen[name] = version
+
+            try:
+                predictor = self._load(name, version)
+            except Exception as e:
+                print(f"⚠ Could not load {name} model {version}: {e}")
+                continue
+
+            if name == CURRENT:
+                self.predictor = predictor
+            else:
+                self.shadow = predictor
+            self.shadow_stats = ShadowStats()
+            if predictor is not None:
+                print(f"↻ {name} model: {predictor.bundle.version or 'legacy'}")
+
+    def predict(self, values):
+        # One read of each reference: a swap mid-request can't mix models
+        predictor, shadow = self.predictor, self.shadow
+        if predictor is None:
+            raise RuntimeError("No model loaded")
+
+        start = time.perf_counter()
+        result = predictor.predict(values)
+        seconds = time.perf_counter() - start
+
+        if shadow is not None:
+            stats = self.shadow_stats
+            self._shadow_pool.submit(
+                self._score_shadow, shadow, stats, values, result, seconds
+            )
+        return result
+
+    @staticmethod
+    def _score_shadow(shadow, stats, values, expected, seconds):
+        try:
+            start = time.perf_counter()
+            result = shadow.predict(values)
+            stats.add(expected, result, seconds, time.perf_counter() - start)
+        except Exception as e:
+            stats.error()
+            print(f"Shadow prediction error: {e}")
+
+    def status(self):
+        predictor, shadow = self.predictor, self.shadow
+        return {
+            "current": (predictor.bundle.version or "legacy") if predictor else None,
+            "candidate": shadow.bundle.version if shadow else None,
+            "shadow": self.shadow_stats.summary() if shadow else None,
+        }
@@ -0,0 +1,166 @@
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as DeadlineMissed
+
+import pandas as pd
+
+
+"""
+
+Market data for the dashboard, fetched concurrently under deadlines
+
+get_dashboard_data needs three upstream calls: price history, company info
+and the cash-flow statement. fetch_market_data() runs them in parallel, so
+the request waits for the slowest call rather than all three in turn. Each
+call has its own deadline, and the whole fetch has a budget. A call that
+misses its deadline or fails is reported in `missing`, and the dashboard
+renders everything else.
+
+All fetches share one bounded thread pool. yfinance only takes a timeout for
+history(), so a hung info/cashflow call keeps its thread until the socket
+gives up; with a shared pool that ties up at most POOL_WORKERS threads
+instead of leaking one per request, and calls that can't start before their
+deadline are cancelled.
+
+Where the data comes from is a MarketDataSource. The app uses yfinance by
+default; set app.config["MARKET_DATA_SOURCE"] to another source (e.g. a
+StubSource) to run without the network.
+
+"""
+
+# Seconds per call, and for the whole fetch
+CALL_TIMEOUTS = {"history": 5.0, "info": 5.0, "cashflow": 5.0}
+REQUEST_BUDGET = 8.0
+# Threads for every request's calls, shared by the whole process
+POOL_WORKERS = 12
+
+_pool = ThreadPoolExecutor(max_workers=POOL_WORKERS, thread_name_prefix="market")
+
+
+# -----------------------------
+# Data sources
+# -----------------------------
+class MarketDataSource(ABC):
+    """What the dashboard needs from a market data provider."""
+
+    @abstractmethod
+    def history(self, ticker, period="1mo"):
+        """Daily OHLCV DataFrame indexed by Date."""
+
+    @abstractmethod
+    def info(self, ticker):
+        """Dict of company fields (yfinance .info names)."""
+
+    @abstractmethod
+    def cashflow(self, ticker):
+        """Cash-flow statement, line items as the index (yfinance layout)."""
+
+
+class YFinanceSource(MarketDataSource):
+    """Live data from yfinance; one Ticker per call, so threads share nothing."""
+
+    def __init__(self, timeout=CALL_TIMEOUTS["history"]):
+        # Socket timeout for history(), the one call yfinance lets us bound
+        self.timeout = timeout
+
+    @staticmethod
+    def _ticker(ticker):
+        import yfinance as yf
+
+        return yf.Ticker(ticker)
+
+    def history(self, ticker, period="1mo"):
+        return self._ticker(ticker).history(period=period, timeout=self.timeout)
+
+    def info(self, ticker):
+        return self._ticker(ticker).info
+
+    def cashflow(self, ticker):
+        return self._ticker(ticker).cashflow
+
+
+class StubSource(MarketDataSource):
+    """
+    Canned data for tests and offline development:
+    {ticker: {"history": df, "info": {...}, "cashflow": df}}.
+    `delays` ({call: seconds}) and `failures` ({call: exception}) simulate a
+    slow or broken upstream.
+    """
+
+    def __init__(self, data, delays=None, failures=None):
+        self.data = data
+        self.delays = delays or {}
+        self.failures = failures or {}
+
+    def _get(self, call, ticker, default):
+        time.sleep(self.delays.get(call, 0))
+        if call in self.failures:
+            raise self.failures[call]
+        return self.data.get(ticker, {}).get(call, default)
+
+    def history(self, ticker, period="1mo"):
+        return self._get("history", ticker, pd.DataFrame())
+
+    def info(self, ticker):
+        return self._get("info", ticker, {})
+
+    def cashflow(self, ticker):
+        return self._get("cashflow", ticker, pd.DataFrame())
+
+
+# -----------------------------
+# Concurrent fetch
+# -----------------------------
+class MarketData:
+    """Results of one fetch; calls in `missing` timed out or failed."""
+
+    def __init__(self, history, info, cashflow, missing, seconds):
+        self.history = history
+        self.info = info
+        self.cashflow = cashflow
+        self.missing = missing
+        self.seconds = seconds
+
+
+def fetch_market_data(
+    source, ticker, period="1mo", timeouts=CALL_TIMEOUTS, budget=REQUEST_BUDGET
+):
+    """
+    history, info and cashflow for `ticker`, fetched in parallel. Returns by
+    the earlier of each call's deadline and the budget, whatever is done.
+    """
+    calls = {
+        "history": lambda: source.history(ticker, period=period),
+        "info": lambda: source.info(ticker),
+        "cashflow": lambda: source.cashflow(ticker),
+    }
+
+    start = time.perf_counter()
+    futures = {name: _pool.submit(call) for name, call in calls.items()}
+
+    results, missing = {}, []
+    for name, future in futures.items():
+        deadline = start + min(timeouts.get(name, budget), budget)
+        remaining = max(deadline - time.perf_counter(), 0)
+        try:
+            results[name] = future.result(timeout=remaining)
+        except DeadlineMissed:
+            print(f"Market data: {name} for {ticker} missed its deadline")
+            missing.append(name)
+        except Exception as e:
+            print(f"Market data: {name} for {ticker} failed: {e}")
+            missing.append(name)
+
+    # Drop calls still queued; running stragglers finish (or time out) on their own
+    for future in futures.values():
+        future.cancel()
+
+    history, cashflow = results.get("history"), results.get("cashflow")
+    return MarketData(
+        history=pd.DataFrame() if history is None else history,
+        info=results.get("info") or {},
+        cashflow=pd.DataFrame() if cashflow is None else cashflow,
+        missing=missing,
+        seconds=time.perf_counter() - start,
+    )
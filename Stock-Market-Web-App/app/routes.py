@@ -1,6 +1,6 @@
 from flask import Blueprint, render_template, request, jsonify
 from flask_login import login_required
-from .dashboard import get_dashboard_data
+from .dashboard import get_dashboard_data, live_model
 from .db import query_test
 from .feedback import handle_feedback
 from .login import handle_login
@@ -48,6 +48,15 @@ def index():
     return render_template("index.html")
 
 
+@bp.route("/model")
+@login_required
+def model_status():
+    """Served/candidate model versions and the shadow comparison, as JSON."""
+    if live_model is None:
+        return jsonify({"current": None, "candidate": None, "shadow": None})
+    return jsonify(live_model.status())
+
+
 @bp.route("/dashboard", methods=["get", "post"])
 @login_required
 def dashboard():  # <-- this is the route handler
@@ -61,6 +70,7 @@ def dashboard():  # <-- this is the route handler
             "dashboard.html",
             active="dashboard",
             prediction=data.get("prediction"),
+            prediction_as_of=data.get("prediction_as_of"),
             ticker=data.get("ticker"),
             graph1=data.get("graph1"),
             graph2=data.get("graph2"),
@@ -73,6 +83,7 @@ def dashboard():  # <-- this is the route handler
         "dashboard.html",
         active="dashboard",
         prediction=None,
+        prediction_as_of=None,
         ticker=None,
         graph1=None,
         graph2=None,
@@ -0,0 +1,14 @@
+-- Postgres (11+): precomputed heat scores, filled by load_heat_scores.py
+-- app/heat_scores.py runs this file before every load, so keep it idempotent
+
+create table if not exists heat_scores(
+    ticker varchar(16) not null,
+    as_of_date date not null,
+    score double precision not null,
+    model_version varchar(32) not null,
+    input_hash char(16) not null,
+    loaded_at timestamptz not null default now(),
+    -- Serves the dashboard's lookup (one ticker and model, newest date first)
+    -- as an index-only scan, and the loader's upserts
+    primary key (ticker, model_version, as_of_date) include (score)
+);
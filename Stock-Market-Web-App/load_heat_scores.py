@@ -0,0 +1,45 @@
+import argparse
+import time
+
+import pandas as pd
+
+from app.db import connect
+from app.heat_scores import ensure_schema, load_scores
+from config import Config
+
+"""
+
+Nightly: score the universe, then bulk-load it for the dashboard
+
+    (repository root)       python score_universe.py --latest
+    (Stock-Market-Web-App)  python load_heat_scores.py ../heat_scores.parquet
+
+Uses the same DB_* settings (.env) as the web app.
+
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load heat scores into Postgres")
+    parser.add_argument("scores", help="Parquet file written by score_universe.py")
+    args = parser.parse_args()
+
+    scores = pd.read_parquet(args.scores)
+    start = time.perf_counter()
+
+    conn = connect(vars(Config))
+    try:
+        ensure_schema(conn)
+        changed = load_scores(conn, scores)
+    finally:
+        conn.close()
+
+    seconds = time.perf_counter() - start
+    print(
+        f"✓ Loaded {len(scores):,} scores ({changed:,} new or changed) "
+        f"in {seconds:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""fetch_market_data deadlines and budget, driven by StubSource"""
+
+import importlib.util
+import os
+
+import pandas as pd
+import pytest
+
+# Loaded by path: importing the app package pulls in Flask and the database
+_spec = importlib.util.spec_from_file_location(
+    "market_data",
+    os.path.join(os.path.dirname(__file__), os.pardir, "app", "market_data.py"),
+)
+market_data = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(market_data)
+
+HISTORY = pd.DataFrame(
+    {"Close": [10.0, 11.0]}, index=pd.to_datetime(["2024-03-27", "2024-03-28"])
+)
+INFO = {"shortName": "Stub Corp", "marketCap": 1e9}
+CASHFLOW = pd.DataFrame({"2023": [1e7]}, index=["Free Cash Flow"])
+DATA = {"STUB": {"history": HISTORY, "info": INFO, "cashflow": CASHFLOW}}
+
+TIMEOUTS = {"history": 1.0, "info": 1.0, "cashflow": 1.0}
+
+
+def fetch(delays=None, failures=None, timeouts=TIMEOUTS, budget=2.0):
+    source = market_data.StubSource(DATA, delays=delays, failures=failures)
+    return market_data.fetch_market_data(
+        source, "STUB", timeouts=timeouts, budget=budget
+    )
+
+
+def test_source_must_implement_every_call():
+    class HistoryOnly(market_data.MarketDataSource):
+        def history(self, ticker, period="1mo"):
+            return pd.DataFrame()
+
+    with pytest.raises(TypeError):
+        HistoryOnly()
+
+
+def test_calls_arrive_concurrently():
+    market = fetch(delays={"history": 0.3, "info": 0.3, "cashflow": 0.3})
+
+    assert market.missing == []
+    assert market.history.equals(HISTORY)
+    assert market.info == INFO
+    assert market.cashflow.equals(CASHFLOW)
+    # Three 0.3s calls in parallel: the slowest one, not their sum
+    assert market.seconds < 0.6
+
+
+def test_call_past_its_deadline_leaves_the_rest():
+    market = fetch(
+        delays={"info": 0.5},
+        timeouts={"history": 1.0, "info": 0.1, "cashflow": 1.0},
+    )
+
+    assert market.missing == ["info"]
+    assert market.info == {}
+    assert market.history.equals(HISTORY)
+    assert market.cashflow.equals(CASHFLOW)
+    assert market.seconds < 0.4
+
+
+def test_failed_call_is_reported_missing():
+    market = fetch(failures={"cashflow": ConnectionError("reset")})
+
+    assert market.missing == ["cashflow"]
+    assert market.cashflow.empty
+    assert market.info == INFO
+
+
+def test_budget_caps_the_whole_fetch():
+    market = fetch(delays={"history": 0.5, "info": 0.5, "cashflow": 0.05}, budget=0.2)
+
+    # Per-call deadlines are longer, the request budget runs out first
+    assert sorted(market.missing) == ["history", "info"]
+    assert market.cashflow.equals(CASHFLOW)
+    assert market.history.empty
+    assert 0.15 < market.seconds < 0.45
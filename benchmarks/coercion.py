@@ -0,0 +1,122 @@
+"""
+Benchmark: coercion.to_numeric_frame vs. the per-cell
+DilutionModel.clean_numeric / algorith.safe_num it replaces, over every file
+in a dataset tree (raw CSVs or Parquet partitions, all columns). That the
+outputs match is checked in tests/test_coercion.py, which uses the reference
+copies below.
+
+Run from the repository root:
+
+    python -m benchmarks.coercion [datasets_fmp_free]
+"""
+
+import ast
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import storage
+from coercion import to_numeric_frame
+
+DATA_DIR = "datasets_fmp_free"
+
+
+def clean_numeric(x):
+    """Reference copy of the original DilutionModel.clean_numeric."""
+    if isinstance(x, (int, float, np.int64, np.float64)):
+        return float(x)
+
+    if isinstance(x, (list, tuple, np.ndarray)):
+        return clean_numeric(x[0])
+
+    if isinstance(x, str):
+        txt = x.strip()
+
+        # Possible stringified list "[123, 14]"
+        if txt.startswith("[") and txt.endswith("]"):
+            try:
+                arr = ast.literal_eval(txt)
+                return clean_numeric(arr[0])
+            except:
+                pass
+
+        for ch in [",", "$", "%"]:
+            txt = txt.replace(ch, "")
+
+        try:
+            return float(txt)
+        except:
+            return np.nan
+
+    return np.nan
+
+
+def safe_num(x):
+    """Reference copy of the original algorith.safe_num."""
+    if isinstance(x, (int, float, np.number)):
+        return float(x)
+
+    if isinstance(x, (list, tuple, np.ndarray)):
+        return safe_num(x[0])
+
+    if isinstance(x, str):
+        txt = x.strip()
+
+        if txt.startswith("[") and txt.endswith("]"):
+            try:
+                arr = ast.literal_eval(txt)
+                return safe_num(arr[0])
+            except:
+                pass
+
+        txt = txt.replace(",", "").replace("$", "").replace("%", "")
+        try:
+            return float(txt)
+        except:
+            return np.nan
+
+    return np.nan
+
+
+def load_frames(root):
+    """Every file in the tree, uncoerced, as the loaders see it"""
+    partitions = storage.list_partitions(root)
+    if partitions:
+        return [pd.read_parquet(path) for _, _, path in partitions]
+
+    frames = []
+    for path in sorted(os.listdir(root)):
+        if path.endswith(".csv"):
+            frames.append(
+                pd.read_csv(os.path.join(root, path), low_memory=False)
+            )
+    return frames
+
+
+def timed(fn, frames):
+    start = time.perf_counter()
+    out = [fn(df) for df in frames]
+    return time.perf_counter() - start, out
+
+
+def main():
+    root = sys.argv[1] if len(sys.argv) > 1 else DATA_DIR
+    frames = load_frames(root)
+    cells = sum(df.size for df in frames)
+    print(f"{root}: {len(frames)} files, {cells:,} cells")
+
+    ref_time, _ = timed(lambda df: df.map(clean_numeric), frames)
+    safe_time, _ = timed(lambda df: df.map(safe_num), frames)
+    vec_time, _ = timed(to_numeric_frame, frames)
+
+    print(f"  clean_numeric map: {ref_time:8.2f} s")
+    print(f"  safe_num map:      {safe_time:8.2f} s")
+    print(f"  to_numeric_frame:  {vec_time:8.2f} s")
+    print(f"  speedup:           {ref_time / vec_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: StockPredictor's compiled scoring (scoring.py) vs. its pandas path
+(features, alignment, scaler, model), on messy primitives: zeros, negatives,
+NaN/inf, formatted strings and missing inputs.
+
+Timed for a synthetic linear bundle over every column build_features() makes
+from primitives, plus any trained bundles passed on the command line
+(model.bundle or the legacy pickles). tests/test_scoring.py checks that the
+two paths agree, on the same inputs.
+
+Run from the repository root:
+
+    python -m benchmarks.scoring [alg Stock-Market-Web-App/alg ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from features import PRIMITIVE_INPUTS
+from model_bundle import BUNDLE_FILE, ModelBundle
+
+sys.path.insert(0, os.path.join("Stock-Market-Web-App", "app"))
+from algorith import StockPredictor, add_engineered_features  # noqa: E402
+
+ROWS = 2000
+CALLS = 2000
+
+
+def messy_primitives(rows, seed=0):
+    """Primitive rows spanning the awkward cases the pandas path handles"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            name: rng.lognormal(18, 3, rows) * rng.choice([-1, 1], rows)
+            for name in PRIMITIVE_INPUTS
+        }
+    )
+    df["marketPrice"] = rng.lognormal(4, 1, rows)
+    df["employees"] = rng.integers(0, 500_000, rows).astype("float64")
+
+    values = df.to_numpy()
+    values[rng.random(values.shape) < 0.05] = 0.0
+    values[rng.random(values.shape) < 0.03] = np.nan
+    values[rng.random(values.shape) < 0.01] = np.inf
+    df = pd.DataFrame(values, columns=PRIMITIVE_INPUTS)
+
+    # Formatted strings as scraped values arrive
+    text = df["totalDebt"].astype(object)
+    picks = rng.random(rows) < 0.2
+    text[picks] = [f"${value:,.2f}" for value in df["totalDebt"][picks]]
+    df["totalDebt"] = text
+    return df
+
+
+def synthetic_bundle(seed=0):
+    """Random linear bundle over everything build_features() derives"""
+    rng = np.random.default_rng(seed)
+    sample = add_engineered_features(messy_primitives(10, seed))
+    columns = [col for col in sample.columns if col != "ticker"]
+    return ModelBundle(
+        columns,
+        mean=rng.normal(0, 1e6, len(columns)),
+        scale=rng.lognormal(10, 3, len(columns)),
+        coef=rng.normal(0, 1, len(columns)),
+        intercept=0.25,
+    )
+
+
+def timed(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def bench(predictor, df):
+    one = df.iloc[:1]
+    record = one.to_dict("records")[0]
+    numeric = df.drop(columns="totalDebt")
+    array = numeric.reindex(columns=PRIMITIVE_INPUTS, fill_value=0).to_numpy()
+
+    pandas_one = timed(lambda: predictor.predict_frame(one), CALLS // 10)
+    dict_one = timed(lambda: predictor.scorer.score(record), CALLS)
+    array_one = timed(lambda: predictor.scorer.score(array[0]), CALLS)
+    pandas_all = timed(lambda: predictor.predict_frame(df), 5)
+    array_all = timed(lambda: predictor.scorer.score(array), 50)
+
+    print(f"  one company, pandas path:  {pandas_one * 1e6:10.1f} µs")
+    print(
+        f"  one company, dict:         {dict_one * 1e6:10.1f} µs "
+        f"({pandas_one / dict_one:.0f}x)"
+    )
+    print(
+        f"  one company, array:        {array_one * 1e6:10.1f} µs "
+        f"({pandas_one / array_one:.0f}x)"
+    )
+    print(f"  {len(df)} rows, pandas path: {pandas_all * 1e3:10.2f} ms")
+    print(
+        f"  {len(df)} rows, array:       {array_all * 1e3:10.2f} ms "
+        f"({pandas_all / array_all:.0f}x)"
+    )
+
+
+def main():
+    # The pandas path divides by zeros and infs on purpose
+    warnings.simplefilter("ignore", RuntimeWarning)
+    df = messy_primitives(ROWS)
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_bundle().save(os.path.join(tmp, BUNDLE_FILE))
+        predictor = StockPredictor(tmp)
+        print("synthetic bundle:")
+        bench(predictor, df)
+
+    for alg_path in sys.argv[1:]:
+        predictor = StockPredictor(alg_path)
+        if predictor.scorer is None:
+            print(f"{alg_path}: {predictor.bundle.kind} bundle, not compiled")
+            continue
+        print(f"{alg_path}:")
+        bench(predictor, df)
+
+
+if __name__ == "__main__":
+    main()
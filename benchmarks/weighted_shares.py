@@ -0,0 +1,143 @@
+"""
+Benchmark: vectorized calculate_weighted_shares_outstanding vs. the original
+per-date loop on a 30-year daily frame with annual reports.
+
+Run from the repository root:
+
+    python -m benchmarks.weighted_shares
+"""
+
+import contextlib
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from fundamentals import calculate_weighted_shares_outstanding
+
+YEARS = 30
+OUTPUT_COLS = [
+    "market_derived_shares",
+    "reported_shares",
+    "weighted_shares_outstanding",
+]
+
+
+def calculate_weighted_shares_outstanding_loop(df):
+    """Reference copy of the original per-date loop implementation."""
+    shares_cols = [
+        col
+        for col in df.columns
+        if "sharesOutstanding" in col.lower() or "commonstock" in col.lower()
+    ]
+    marketcap_cols = [col for col in df.columns if "marketcap" in col.lower()]
+
+    if not shares_cols or not marketcap_cols:
+        print("    ⚠ No shares/marketcap cols for weighting")
+        return df
+
+    shares_col = shares_cols[0]
+    marketcap_col = marketcap_cols[0]
+
+    price_col = "adjClose" if "adjClose" in df.columns else "close"
+    if price_col not in df.columns:
+        print("    ⚠ No price col for market-derived shares")
+        return df
+
+    df["market_derived_shares"] = df[marketcap_col] / df[price_col]
+    df["reported_shares"] = df[shares_col]
+    df["shares_changed"] = df["reported_shares"].ne(df["reported_shares"].shift())
+
+    report_dates = df[df["shares_changed"]].index
+
+    df["days_since_report"] = 0
+    df["days_until_next_report"] = 0
+
+    for date in df.index:
+        recent = report_dates[report_dates <= date]
+        upcoming = report_dates[report_dates > date]
+
+        if len(recent) > 0:
+            df.loc[date, "days_since_report"] = (date - recent[-1]).days
+        if len(upcoming) > 0:
+            df.loc[date, "days_until_next_report"] = (upcoming[0] - date).days
+
+    df["report_progress"] = df["days_since_report"] / (
+        df["days_since_report"] + df["days_until_next_report"] + 1
+    )
+    df["report_progress"] = df["report_progress"].fillna(0.5)
+    df["market_weight"] = df["report_progress"] ** 2
+    df["reported_weight"] = 1 - df["market_weight"]
+
+    df["weighted_shares_outstanding"] = (
+        df["reported_weight"] * df["reported_shares"]
+        + df["market_weight"] * df["market_derived_shares"]
+    )
+
+    mask_nan = df["reported_shares"].isna()
+    df.loc[mask_nan, "weighted_shares_outstanding"] = df.loc[
+        mask_nan, "market_derived_shares"
+    ]
+
+    print(
+        f"    ✓ Weighted shares calc'd (reported weight avg: {df['reported_weight'].mean():.2%})"
+    )
+
+    # Cleanup
+    drop_cols = [
+        "shares_changed",
+        "days_since_report",
+        "days_until_next_report",
+        "report_progress",
+        "market_weight",
+        "reported_weight",
+    ]
+    df.drop(columns=drop_cols, errors="ignore", inplace=True)
+
+    return df
+
+
+def make_frame(years=YEARS, seed=0):
+    """Business-day prices with annual balance sheet / key metric fills"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2025-12-31", periods=years * 261, name="date")
+
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+    df = pd.DataFrame({"close": close, "adjClose": close}, index=dates)
+
+    # One report per year, forward filled onto the daily rows like main.py does
+    report_year = dates.year - (dates.month < 10)
+    shares = 1e9 * (1 + 0.02 * (report_year - report_year.min()))
+    df["balance_annual_commonStock"] = shares
+    df["metrics_annual_marketCap"] = shares * close[0] * (1 + 0.05 * rng.random(len(df)))
+    return df
+
+
+def timed(fn, df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        frame = df.copy()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            out = fn(frame)
+            best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main():
+    df = make_frame()
+    print(f"Frame: {len(df)} rows ({YEARS} years of business days)")
+
+    loop_time, expected = timed(calculate_weighted_shares_outstanding_loop, df, 1)
+    vec_time, actual = timed(calculate_weighted_shares_outstanding, df, 5)
+
+    pd.testing.assert_frame_equal(actual[OUTPUT_COLS], expected[OUTPUT_COLS])
+
+    print(f"  loop:       {loop_time * 1000:10.1f} ms")
+    print(f"  vectorized: {vec_time * 1000:10.1f} ms")
+    print(f"  speedup:    {loop_time / vec_time:10.1f}x (outputs identical)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Manifest of a data directory: one entry per partition file, so readers can
+prune by ticker, date range and columns, and spot schema drift, without
+opening any partition.
+
+    {root}/_manifest.json
+
+    {"version": 2,
+     "schemas": {"3f2a…": {"columns": [...], "types": [...]}},
+     "files": {"ticker=AAPL/year=2024/part.parquet": {
+        "ticker": "AAPL", "year": 2024, "format": "parquet", "rows": 251,
+        "min_date": "2024-01-02", "max_date": "2024-12-31",
+        "schema_hash": "3f2a…", "checksum": "sha256…",
+        "size": 123456, "mtime_ns": 1700000000000000000}}}
+
+Files share a handful of schemas, so each distinct column list is stored once
+and entries refer to it by hash. storage.write_partitions() records all of a
+ticker's files in one update; the read-modify-write runs under a lock file
+and the manifest is replaced atomically, so parallel writers never lose an
+entry. An entry whose size/mtime no longer match its file is ignored (treated
+as unknown) rather than trusted. Build or refresh the manifest of an existing
+tree with:
+
+    python storage.py catalog datasets
+"""
+
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer only
+    fcntl = None
+
+MANIFEST_FILE = "_manifest.json"
+MANIFEST_VERSION = 2
+DATE_COLUMN = "date"
+
+
+# ===== DESCRIBING FILES =====
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def schema_hash(fields):
+    """Hash of (column, type) pairs, in file order"""
+    payload = json.dumps([[name, kind] for name, kind in fields])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _iso(value):
+    return None if value is None or pd.isna(value) else pd.Timestamp(value).isoformat()
+
+
+def parquet_summary(path):
+    """(rows, fields, min date, max date) from the footer alone when possible"""
+    metadata = pq.read_metadata(path)
+    schema = metadata.schema.to_arrow_schema()
+    fields = [(field.name, str(field.type)) for field in schema]
+
+    low = high = None
+    if DATE_COLUMN in schema.names:
+        column = schema.get_field_index(DATE_COLUMN)
+        for group in range(metadata.num_row_groups):
+            stats = metadata.row_group(group).column(column).statistics
+            if stats is None or not stats.has_min_max:
+                # No statistics: read just the date column
+                dates = pq.read_table(path, columns=[DATE_COLUMN])[DATE_COLUMN]
+                dates = dates.to_pandas()
+                low, high = dates.min(), dates.max()
+                break
+            low = stats.min if low is None else min(low, stats.min)
+            high = stats.max if high is None else max(high, stats.max)
+
+    return metadata.num_rows, fields, low, high
+
+
+def frame_summary(df):
+    """(rows, fields, min date, max date) of a date-indexed frame"""
+    fields = [(df.index.name or DATE_COLUMN, str(df.index.dtype))]
+    fields += [(str(col), str(dtype)) for col, dtype in df.dtypes.items()]
+    dates = pd.to_datetime(pd.Series(df.index), errors="coerce")
+    return len(df), fields, dates.min(), dates.max()
+
+
+def describe(path, ticker, year, df=None):
+    """
+    Manifest entry for one file, with its "columns" and "types" (moved to
+    the schema table when recorded). Parquet is described from its footer;
+    any other format needs the loaded, date-indexed `df`.
+    """
+    if path.endswith(".parquet"):
+        file_format = "parquet"
+        rows, fields, low, high = parquet_summary(path)
+    else:
+        file_format = os.path.splitext(path)[1].lstrip(".")
+        rows, fields, low, high = frame_summary(df)
+
+    fields = [(name, kind) for name, kind in fields if name != DATE_COLUMN]
+    stat = os.stat(path)
+    return {
+        "ticker": ticker,
+        "year": year,
+        "format": file_format,
+        "rows": int(rows),
+        "min_date": _iso(low),
+        "max_date": _iso(high),
+        "columns": [name for name, _ in fields],
+        "types": [kind for _, kind in fields],
+        "schema_hash": schema_hash(fields),
+        "checksum": file_checksum(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+# ===== MANIFEST =====
+def manifest_path(root):
+    return os.path.join(root, MANIFEST_FILE)
+
+
+@contextmanager
+def locked(root):
+    """Exclusive lock around a manifest read-modify-write"""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(root, exist_ok=True)
+    with open(f"{manifest_path(root)}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class Catalog:
+    """The manifest of one data directory; paths are relative to `root`."""
+
+    def __init__(self, root):
+        self.root = root
+        self.path = manifest_path(root)
+        self.schemas = {}
+        self.files = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                self.schemas = manifest["schemas"]
+                self.files = manifest["files"]
+            elif manifest.get("version") == 1:
+                # Schemas inline in every entry; incomplete entries are dropped
+                for key, entry in manifest["files"].items():
+                    if "columns" in entry and "types" in entry:
+                        self._add(key, entry)
+
+    def __bool__(self):
+        return bool(self.files)
+
+    def key(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def _add(self, key, entry):
+        entry = dict(entry)
+        schema = {"columns": entry.pop("columns"), "types": entry.pop("types")}
+        self.schemas.setdefault(entry["schema_hash"], schema)
+        self.files[key] = entry
+
+    def add(self, path, entry):
+        """Add or replace the entry (from describe()) for `path`"""
+        self._add(self.key(path), entry)
+
+    def schema(self, schema_hash):
+        """{column: type} of a recorded schema"""
+        schema = self.schemas[schema_hash]
+        return dict(zip(schema["columns"], schema["types"]))
+
+    def entry(self, path):
+        """The entry for `path` if it still matches the file on disk, else None"""
+        entry = self.files.get(self.key(path))
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if (stat.st_size, stat.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+            return None
+        return entry
+
+    def save(self):
+        used = {entry["schema_hash"] for entry in self.files.values()}
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "schemas": {h: self.schemas[h] for h in used},
+                    "files": self.files,
+                },
+                f,
+                indent=1,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
+
+    # ----- pruning -----
+    def keep(self, path, start=None, end=None, columns=None):
+        """
+        False only when the entry proves `path` holds no rows in [start, end]
+        or none of `columns`; unknown or stale files are always kept.
+        """
+        entry = self.entry(path)
+        if entry is None:
+            return True
+
+        if start is not None and entry["max_date"] is not None:
+            if pd.Timestamp(entry["max_date"]) < pd.Timestamp(start):
+                return False
+        if end is not None and entry["min_date"] is not None:
+            if pd.Timestamp(entry["min_date"]) > pd.Timestamp(end):
+                return False
+        if columns:
+            stored = self.schemas[entry["schema_hash"]]["columns"]
+            if not set(columns) & set(stored):
+                return False
+        return True
+
+    # ----- schema drift -----
+    def drift(self):
+        """
+        Per format, files whose schema differs from the most common one:
+        {path: {"missing": [...], "added": [...], "retyped": [...]}}
+        """
+        report = {}
+        by_format = {}
+        for key, entry in self.files.items():
+            by_format.setdefault(entry["format"], []).append((key, entry))
+
+        for entries in by_format.values():
+            hashes = pd.Series([entry["schema_hash"] for _, entry in entries])
+            dominant = hashes.mode().iloc[0]
+            reference = self.schema(dominant)
+            for key, entry in entries:
+                if entry["schema_hash"] == dominant:
+                    continue
+                schema = self.schema(entry["schema_hash"])
+                report[key] = {
+                    "missing": sorted(set(reference) - set(schema)),
+                    "added": sorted(set(schema) - set(reference)),
+                    "retyped": sorted(
+                        col
+                        for col in set(schema) & set(reference)
+                        if schema[col] != reference[col]
+                    ),
+                }
+        return report
+
+
+def record(root, entries):
+    """Add or replace manifest entries ({path: entry}) under the lock"""
+    with locked(root):
+        catalog = Catalog(root)
+        for path, entry in entries.items():
+            catalog.add(path, entry)
+        catalog.save()
+    return catalog
+
+
+def replace(root, entries):
+    """Write a manifest holding exactly `entries` ({path: entry})"""
+    with locked(root):
+        catalog = Catalog(root)
+        catalog.schemas, catalog.files = {}, {}
+        for path, entry in entries.items():
+            catalog.add(path, entry)
+        catalog.save()
+    return catalog
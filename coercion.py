@@ -0,0 +1,129 @@
+"""
+Column-wise numeric coercion shared by the model (index.py) and the web app.
+
+to_numeric_frame() yields the same floats as calling the old per-cell
+clean_numeric / safe_num on every value, a column at a time: numeric columns
+pass straight through, text goes through vectorized string ops (strip "$", ","
+and "%"), anything unparseable is NaN. The few strings pd.to_numeric reads
+differently from float() / literal_eval ("[a, b]" lists, "1_000", non-ASCII
+digits) are parsed per cell with the reference coerce_scalar().
+"""
+
+import ast
+
+import numpy as np
+import pandas as pd
+
+STRIP_CHARS_RE = r"[,$%]"
+
+NUMERIC_KINDS = {"integer", "floating", "mixed-integer-float", "decimal", "boolean"}
+
+
+def coerce_scalar(x):
+    """Per-cell reference semantics, for sequences and unusual strings"""
+    if isinstance(x, (int, float, np.number)):
+        return float(x)
+
+    if isinstance(x, (list, tuple, np.ndarray)):
+        return coerce_scalar(x[0]) if len(x) else np.nan
+
+    if isinstance(x, str):
+        txt = x.strip()
+        if txt.startswith("[") and txt.endswith("]"):
+            try:
+                return coerce_scalar(ast.literal_eval(txt)[0])
+            except Exception:
+                pass
+        try:
+            return float(txt.replace(",", "").replace("$", "").replace("%", ""))
+        except ValueError:
+            return np.nan
+
+    return np.nan
+
+
+def parse_strings(text):
+    """Vectorized string → float for a Series of str"""
+    text = text.astype(str).str.strip()
+    out = pd.Series(np.nan, index=text.index, dtype="float64")
+
+    # Stringified lists may hold quoted or nested items; float() also takes
+    # "1_000" and non-ASCII digits. Those cells are rare: parse them one by one
+    per_cell = (
+        (text.str.startswith("[") & text.str.endswith("]"))
+        | text.str.contains("_", regex=False)
+        | ~text.str.isascii()
+    )
+    if per_cell.any():
+        out[per_cell] = text[per_cell].map(coerce_scalar).astype("float64")
+
+    plain = text[~per_cell].str.replace(STRIP_CHARS_RE, "", regex=True).str.strip()
+    out[~per_cell] = pd.to_numeric(plain, errors="coerce").astype("float64")
+    return out
+
+
+def to_numeric_series(values):
+    """One column to float64; numeric dtypes skip the string work entirely"""
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+        return values.astype("float64")
+
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    if kind in NUMERIC_KINDS:
+        return pd.to_numeric(values, errors="coerce").astype("float64")
+    if kind == "empty":
+        return pd.Series(np.nan, index=values.index, dtype="float64")
+    if kind == "string":
+        out = pd.Series(np.nan, index=values.index, dtype="float64")
+        present = values.notna()
+        out[present] = parse_strings(values[present])
+        return out
+
+    # Mixed column: route each cell type through its own vectorized path
+    out = pd.Series(np.nan, index=values.index, dtype="float64")
+    is_str = values.map(lambda v: isinstance(v, str)).astype(bool)
+    is_num = values.map(
+        lambda v: isinstance(v, (int, float, np.number)) and not isinstance(v, str)
+    ).astype(bool)
+    is_seq = values.map(lambda v: isinstance(v, (list, tuple, np.ndarray))).astype(bool)
+
+    if is_str.any():
+        out[is_str] = parse_strings(values[is_str])
+    if is_num.any():
+        out[is_num] = values[is_num].astype("float64")
+    if is_seq.any():
+        out[is_seq] = values[is_seq].map(coerce_scalar).astype("float64")
+    return out
+
+
+def to_numeric_frame(df):
+    """
+    Every column of `df` as float64, the vectorized clean_numeric/safe_num.
+    Numeric columns are cast as one block and all pure-text columns are
+    parsed as one long array, so the cost doesn't scale with column count.
+    """
+    out = np.full(df.shape, np.nan, dtype="float64")
+    numeric, text = [], []
+
+    for i, dtype in enumerate(df.dtypes):
+        if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype):
+            numeric.append(i)
+        elif isinstance(dtype, pd.StringDtype):
+            text.append(i)
+        elif pd.api.types.infer_dtype(df.iloc[:, i], skipna=True) == "string":
+            text.append(i)
+        else:
+            out[:, i] = to_numeric_series(df.iloc[:, i]).to_numpy()
+
+    if numeric:
+        out[:, numeric] = df.iloc[:, numeric].to_numpy(dtype="float64", na_value=np.nan)
+
+    if text:
+        cells = df.iloc[:, text].to_numpy(dtype=object).ravel(order="F")
+        present = pd.notna(cells)
+        parsed = np.full(len(cells), np.nan)
+        # Text repeats heavily (forward-filled statement fields): parse each value once
+        codes, uniques = pd.factorize(cells[present])
+        parsed[present] = parse_strings(pd.Series(uniques)).to_numpy()[codes]
+        out[:, text] = parsed.reshape((len(df), len(text)), order="F")
+
+    return pd.DataFrame(out, index=df.index, columns=df.columns)
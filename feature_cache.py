@@ -0,0 +1,180 @@
+"""
+On-disk cache of the engineered training matrix.
+
+Two content-addressed layers, both Arrow/Feather files:
+
+    {cache_dir}/raw/{key}.feather       one cleaned input file (CSV or partition)
+    {cache_dir}/features/{key}.feather  one ticker's engineered rows
+
+Raw keys hash the pipeline version plus the input file's fingerprint (path,
+size, mtime; or its bytes with hash_contents=True). Ticker keys hash the version
+plus the fingerprints of every file that ticker is built from, since lags and
+rolling windows span its year files. Changing one partition therefore re-reads
+that one file and re-engineers only its ticker; everything else is loaded back
+as is. Entries no longer referenced are pruned after each build.
+"""
+
+import hashlib
+import os
+
+import pandas as pd
+
+CACHE_DIR = ".feature_cache"
+
+
+def pipeline_version(*modules, extra=()):
+    """Hash of the source of `modules` plus `extra` values"""
+    digest = hashlib.sha256()
+    for module in modules:
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    for value in extra:
+        digest.update(repr(value).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class FeatureCache:
+    """Per-file and per-ticker feature cache keyed on input fingerprints."""
+
+    def __init__(self, cache_dir=CACHE_DIR, version="", hash_contents=False):
+        self.cache_dir = cache_dir
+        self.version = version
+        self.hash_contents = hash_contents
+        # Reuse counts of the last build(), for run reports
+        self.stats = {}
+
+    def fingerprint(self, path):
+        """Identity of an input file, or "missing" for an absent optional one"""
+        if not os.path.exists(path):
+            return f"{path}:missing"
+        if self.hash_contents:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            return f"{path}:{digest.hexdigest()}"
+        stat = os.stat(path)
+        return f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _key(self, *parts):
+        payload = "\n".join([self.version, *parts])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, layer, key):
+        return os.path.join(self.cache_dir, layer, f"{key}.feather")
+
+    def _read(self, path):
+        return pd.read_feather(path)
+
+    def _write(self, df, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        df.reset_index(drop=True).to_feather(tmp_path)
+        os.replace(tmp_path, path)
+
+    def build(self, sources, read_sources, engineer, depends_on=None):
+        """
+        Engineered matrix for `sources`, a list of (ticker, path).
+
+        read_sources(list of sources) -> list of cleaned frames (or None) is
+        only called for files not in the raw layer; engineer(frame) builds one
+        ticker's features. depends_on(ticker) lists extra files (e.g. the
+        profile table) that also feed that ticker.
+        """
+        by_ticker = {}
+        for ticker, path in sources:
+            by_ticker.setdefault(ticker, []).append(path)
+
+        deps = {
+            ticker: sorted(depends_on(ticker)) if depends_on else []
+            for ticker in by_ticker
+        }
+        prints = {
+            path: self.fingerprint(path)
+            for paths in list(by_ticker.values()) + list(deps.values())
+            for path in paths
+        }
+
+        ticker_keys = {}
+        raw_keys = {}
+        for ticker, paths in by_ticker.items():
+            dep_prints = [prints[path] for path in deps[ticker]]
+            ticker_keys[ticker] = self._key(
+                "features", ticker, *[prints[path] for path in paths], *dep_prints
+            )
+            for path in paths:
+                raw_keys[path] = self._key("raw", ticker, prints[path], *dep_prints)
+
+        stale = [
+            ticker
+            for ticker in by_ticker
+            if not os.path.exists(self._path("features", ticker_keys[ticker]))
+        ]
+
+        # Raw layer: only files of stale tickers that aren't cached yet
+        raw = {}
+        to_read = []
+        for ticker in stale:
+            for path in by_ticker[ticker]:
+                raw_path = self._path("raw", raw_keys[path])
+                if os.path.exists(raw_path):
+                    raw[path] = self._read(raw_path)
+                else:
+                    to_read.append((ticker, path))
+
+        if to_read:
+            for (_, path), df in zip(to_read, read_sources(to_read)):
+                if df is None:
+                    continue
+                self._write(df, self._path("raw", raw_keys[path]))
+                raw[path] = df
+
+        frames = []
+        for ticker in by_ticker:
+            feature_path = self._path("features", ticker_keys[ticker])
+            if ticker in stale:
+                parts = [raw[path] for path in by_ticker[ticker] if path in raw]
+                if not parts:
+                    continue
+                df = engineer(pd.concat(parts, ignore_index=True))
+                # A file that failed to load is retried next run
+                if len(parts) == len(by_ticker[ticker]):
+                    self._write(df, feature_path)
+            else:
+                df = self._read(feature_path)
+            frames.append(df)
+
+        reused = len(by_ticker) - len(stale)
+        self.stats = {
+            "tickers": len(by_ticker),
+            "tickers_reused": reused,
+            "files": len(sources),
+            "files_read": len(to_read),
+        }
+        print(
+            f"✓ Feature cache: {reused}/{len(by_ticker)} tickers reused, "
+            f"{len(to_read)} of {len(sources)} files re-read"
+        )
+
+        self.prune(
+            {self._path("features", key) for key in ticker_keys.values()}
+            | {self._path("raw", key) for key in raw_keys.values()}
+        )
+
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def prune(self, keep):
+        """Remove cache files not in `keep`"""
+        for layer in ("raw", "features"):
+            directory = os.path.join(self.cache_dir, layer)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if path not in keep:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
@@ -0,0 +1,181 @@
+"""
+Feature pipeline shared by training (index.py) and serving (the web app's
+StockPredictor), so both compute identical columns.
+
+Every engineered column is declared once below. build_features() derives them
+all in one pass: row-wise ratios directly, and lag / change / rolling columns
+per ticker on date-ordered rows, so they never bleed from one ticker (or one
+year file) into the next.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Bump when a change outside this module alters the features (e.g. loading);
+# edits here already invalidate the training feature cache (feature_cache.py)
+FEATURE_VERSION = 1
+
+GROUP_COL = "ticker"
+ORDER_COL = "date"
+
+# Raw model inputs, as stored by main.py
+BASE_COLS = [
+    "market_derived_shares",
+    "cashflow_annual_netStockIssuance",
+    "balance_annual_totalDebt",
+    "cashflow_annual_commonStockRepurchased",
+    "profile_lastDividend",
+    "metrics_annual_earningsYield",
+    "profile_fullTimeEmployees",
+    "metrics_annual_peRatio",
+]
+
+# name -> (input columns, row-wise function)
+ROW_FEATURES = {
+    "feature_debt_per_share": (
+        ["balance_annual_totalDebt", "market_derived_shares"],
+        lambda df: df["balance_annual_totalDebt"] / df["market_derived_shares"],
+    ),
+    "feature_dilution_ratio": (
+        [
+            "cashflow_annual_netStockIssuance",
+            "cashflow_annual_commonStockRepurchased",
+        ],
+        lambda df: df["cashflow_annual_netStockIssuance"]
+        / (abs(df["cashflow_annual_commonStockRepurchased"]) + 1),
+    ),
+    "feature_price_to_earnings_inverse": (
+        ["metrics_annual_earningsYield"],
+        lambda df: 1 / (df["metrics_annual_earningsYield"] + 1e-9),
+    ),
+    "feature_log_totalDebt": (
+        ["balance_annual_totalDebt"],
+        lambda df: np.log(df["balance_annual_totalDebt"] + 1),
+    ),
+    "feature_log_shares": (
+        ["market_derived_shares"],
+        lambda df: np.log(df["market_derived_shares"] + 1),
+    ),
+}
+
+# Per-ticker time-series features: {col}_change and {col}_prev{n} per base column
+LAGS = [1, 2]
+# name -> column whose per-ticker pct_change it is
+CHANGE_FEATURES = {
+    "feature_dividend_change": "profile_lastDividend",
+    "feature_earningsYield_change": "metrics_annual_earningsYield",
+}
+# column -> trailing windows (rows) for {col}_roll{n} means
+ROLLING_FEATURES = {
+    "market_derived_shares": [21],
+}
+
+# Rows of earlier history a chunk needs for exact lags/changes/rolling windows
+HISTORY_ROWS = max(
+    LAGS + [1] + [window for windows in ROLLING_FEATURES.values() for window in windows]
+)
+
+# Web app inputs (yfinance primitives) -> BASE_COLS
+PRIMITIVE_INPUTS = [
+    "marketPrice",
+    "sharesOutstanding",
+    "netIncome",
+    "stockIssued",
+    "totalDebt",
+    "stockRepurchased",
+    "dividendsPaid",
+    "employees",
+]
+
+
+def base_from_primitives(values):
+    """BASE_COLS from a mapping of primitive columns (Series or arrays)"""
+    base = {}
+    market_cap = values["marketPrice"] * values["sharesOutstanding"]
+
+    base["market_derived_shares"] = values["sharesOutstanding"]
+    base["cashflow_annual_netStockIssuance"] = values["stockIssued"]
+    base["balance_annual_totalDebt"] = values["totalDebt"]
+    base["cashflow_annual_commonStockRepurchased"] = values["stockRepurchased"]
+    base["profile_lastDividend"] = values["dividendsPaid"]
+    base["metrics_annual_earningsYield"] = values["netIncome"] / market_cap
+    base["profile_fullTimeEmployees"] = values["employees"]
+    base["metrics_annual_peRatio"] = 1 / (base["metrics_annual_earningsYield"] + 1e-9)
+    return base
+
+
+def from_primitives(df):
+    """
+    Map one-row-per-company primitives onto the stored column names, so
+    serving runs the same build_features() as training
+    """
+    base = pd.DataFrame(base_from_primitives(df), index=df.index)
+
+    # Without a ticker every row is its own company
+    if GROUP_COL in df.columns:
+        base[GROUP_COL] = df[GROUP_COL]
+    else:
+        base[GROUP_COL] = np.arange(len(df))
+    return base
+
+
+def build_features(df):
+    """
+    All declared features for `df`, returned sorted by (ticker, date) with the
+    original index. Features whose inputs are missing are skipped.
+    """
+    order = [c for c in (GROUP_COL, ORDER_COL) if c in df.columns]
+    if order:
+        df = df.sort_values(order, kind="stable")
+
+    new = {}
+    for name, (inputs, fn) in ROW_FEATURES.items():
+        if all(col in df.columns for col in inputs):
+            new[name] = fn(df)
+
+    present = [col for col in BASE_COLS if col in df.columns]
+    series = df[present]
+    if GROUP_COL in df.columns:
+        series = series.groupby(df[GROUP_COL], sort=False)
+
+    if present:
+        changes = series.pct_change()
+        lags = {lag: series.shift(lag) for lag in LAGS}
+        for col in present:
+            new[f"{col}_change"] = changes[col]
+            for lag in LAGS:
+                new[f"{col}_prev{lag}"] = lags[lag][col]
+
+    for name, col in CHANGE_FEATURES.items():
+        if col in present:
+            new[name] = changes[col]
+
+    for col, windows in ROLLING_FEATURES.items():
+        if col not in present:
+            continue
+        for window in windows:
+            rolled = series[col].rolling(window, min_periods=1).mean()
+            if GROUP_COL in df.columns:
+                rolled = rolled.reset_index(level=0, drop=True)
+            new[f"{col}_roll{window}"] = rolled
+
+    df = df.drop(columns=[name for name in new if name in df.columns])
+    return pd.concat([df, pd.DataFrame(new, index=df.index)], axis=1)
+
+
+def snapshot_features(base):
+    """
+    What build_features() derives for rows that are each their own company,
+    from a mapping of BASE_COLS arrays: the base and row-wise columns, and
+    rolling means (a one-row window is the value itself). Changes and lags
+    need a previous row, so they are undefined there and left out.
+    """
+    out = {col: base[col] for col in BASE_COLS if col in base}
+    for name, (inputs, fn) in ROW_FEATURES.items():
+        if all(col in base for col in inputs):
+            out[name] = fn(base)
+    for col, windows in ROLLING_FEATURES.items():
+        if col in base:
+            for window in windows:
+                out[f"{col}_roll{window}"] = base[col]
+    return out
@@ -3,17 +3,38 @@ import yfinance as yf
 from datetime import datetime
 import os
 
-os.makedirs("datasets", exist_ok=True)
+import storage
+
+"""
+
+S&P 500 benchmark series, kept in its own store so the index never shows up
+as a "ticker" among the companies in datasets/:
+
+    datasets_index/ticker=SP/year=YYYY/part.parquet
+
+This used to write datasets/sp_data.csv (the whole series) and
+datasets/sp_{year}.csv. The full series is now
+storage.read_dataset(INDEX_DIR, ["SP"]). Trees written by an earlier version
+of this script move over with:
+
+    mv datasets/ticker=SP datasets_index/
+
+"""
+
+INDEX_DIR = "datasets_index"
+
+os.makedirs(INDEX_DIR, exist_ok=True)
 
 print("Downloading S&P 500 (3 years)...")
 sp500 = yf.download("^GSPC", period="3y", interval="1d")
-
-sp500.to_csv("datasets/sp_data.csv")
+sp500 = storage.flatten_columns(sp500)
 
 sp500["Year"] = sp500.index.year
 
-for year, df_year in sp500.groupby("Year"):
-    df_year.drop(columns=["Year"], inplace=True)
-    df_year.to_csv(f"datasets/sp_{year}.csv")
+frames = {
+    year: df_year.drop(columns=["Year"])
+    for year, df_year in sp500.groupby("Year")
+}
+storage.write_partitions(frames, INDEX_DIR, "SP")
 
 print("done!")
@@ -0,0 +1,163 @@
+"""
+Daily API-call budget for the FMP free tier.
+
+BudgetLedger persists, across runs, how many calls were spent today and when
+each (ticker, endpoint) pair was last fetched from the network. plan_refresh()
+turns that into a refresh order: tickers whose endpoint groups are most stale
+(age / TTL, never-fetched first) go first, as long as their cost still fits in
+today's remaining calls. The rest are deferred, so a universe larger than the
+budget is refreshed round-robin over several days.
+
+CallAllowance is the hard cap the client checks before every network call; it
+lives in shared memory so a process pool cannot overspend it either.
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from datetime import datetime, timezone
+
+from fmp_cache import DEFAULT_TTL, DEFAULT_TTLS
+
+DAILY_LIMIT = 250
+LEDGER_PATH = ".fmp_budget.json"
+
+# One main.py ticker run requests every endpoint once
+ENDPOINT_GROUPS = {
+    "prices": ["stable/historical-price-eod/full"],
+    "statements": [
+        "stable/income-statement",
+        "stable/balance-sheet-statement",
+        "stable/cash-flow-statement",
+        "stable/key-metrics",
+    ],
+    "profile": ["stable/profile"],
+    "actions": ["stable/splits", "stable/dividends"],
+}
+
+
+def today():
+    """FMP's daily quota resets on the UTC date"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+# ===== LEDGER =====
+class BudgetLedger:
+    """Calls spent today plus last-fetch times per ticker/endpoint, kept in JSON."""
+
+    def __init__(self, path=LEDGER_PATH, daily_limit=DAILY_LIMIT):
+        self.path = path
+        self.daily_limit = daily_limit
+        self.day = today()
+        self.calls = 0
+        self.fetched = {}  # ticker -> endpoint -> epoch seconds
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+
+        self.fetched = state.get("fetched", {})
+        if state.get("day") == self.day:
+            self.calls = state.get("calls", 0)
+
+    def remaining(self):
+        return max(0, self.daily_limit - self.calls)
+
+    def spend(self, calls):
+        self.calls += calls
+
+    def record(self, ticker, endpoints, when=None):
+        """Mark `endpoints` as freshly fetched for `ticker`"""
+        when = when or time.time()
+        entry = self.fetched.setdefault(ticker, {})
+        for endpoint in endpoints:
+            entry[endpoint] = when
+
+    def staleness(self, ticker, group, now=None, ttls=None):
+        """Oldest endpoint age in `group` over its TTL; inf if any was never fetched"""
+        now = now or time.time()
+        ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        entry = self.fetched.get(ticker, {})
+
+        worst = 0.0
+        for endpoint in ENDPOINT_GROUPS[group]:
+            if endpoint not in entry:
+                return float("inf")
+            age = now - entry[endpoint]
+            worst = max(worst, age / ttls.get(endpoint, DEFAULT_TTL))
+        return worst
+
+    def save(self):
+        state = {"day": self.day, "calls": self.calls, "fetched": self.fetched}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+# ===== PLANNING =====
+def plan_refresh(ledger, tickers, budget=None, ttls=None, now=None):
+    """
+    Split `tickers` into (planned, deferred, fresh).
+
+    A ticker's cost is the number of calls its stale groups need (fresh groups
+    are served by the response cache); its value is the summed staleness of
+    those groups. Tickers are taken highest value first while their cost fits
+    in `budget` (default: what the ledger has left today). `planned` is a list
+    of (ticker, cost) in that order.
+    """
+    budget = ledger.remaining() if budget is None else budget
+    now = now or time.time()
+
+    candidates = []
+    fresh = []
+    for position, ticker in enumerate(tickers):
+        cost = 0
+        value = 0.0
+        for group, endpoints in ENDPOINT_GROUPS.items():
+            staleness = ledger.staleness(ticker, group, now, ttls)
+            if staleness >= 1:
+                cost += len(endpoints)
+                value += staleness
+
+        if cost == 0:
+            fresh.append(ticker)
+        else:
+            candidates.append((-value, position, ticker, cost))
+
+    planned = []
+    deferred = []
+    for _, _, ticker, cost in sorted(candidates):
+        if cost <= budget:
+            planned.append((ticker, cost))
+            budget -= cost
+        else:
+            deferred.append(ticker)
+
+    return planned, deferred, fresh
+
+
+# ===== HARD CAP =====
+class CallAllowance:
+    """Process-shared countdown of calls the client may still make today."""
+
+    def __init__(self, calls, context=None):
+        context = context or multiprocessing.get_context()
+        self._value = context.Value("i", int(calls))
+
+    def try_spend(self):
+        with self._value.get_lock():
+            if self._value.value <= 0:
+                return False
+            self._value.value -= 1
+            return True
+
+    def remaining(self):
+        return self._value.value
@@ -0,0 +1,158 @@
+"""
+Persistent on-disk cache for FMP responses.
+
+Entries are content-addressed by endpoint + params (the apikey is never part of
+the key), expire after a per-endpoint TTL, and the cache directory is kept under
+`max_bytes` by evicting the least recently used entries. Writes keep a running
+size, so the directory is only walked when that passes `max_bytes`; eviction
+then trims to EVICT_TO of it. Other processes' writes are picked up by that
+walk, so several writers can overshoot briefly. In offline mode every cached
+entry is served regardless of age and misses never reach the network.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# Annual statements change a few times a year at most; profiles drift daily
+DEFAULT_TTLS = {
+    "stable/historical-price-eod/full": 12 * HOUR,
+    "stable/income-statement": 30 * DAY,
+    "stable/balance-sheet-statement": 30 * DAY,
+    "stable/cash-flow-statement": 30 * DAY,
+    "stable/key-metrics": 30 * DAY,
+    "stable/splits": 7 * DAY,
+    "stable/dividends": 7 * DAY,
+    "stable/profile": 1 * DAY,
+    "stable/batch-quote": 5 * 60,
+}
+DEFAULT_TTL = 1 * DAY
+# Eviction frees space down to this fraction of max_bytes
+EVICT_TO = 0.9
+
+
+class ResponseCache:
+    """Content-addressed JSON cache with per-endpoint TTLs and size-bounded eviction."""
+
+    def __init__(
+        self,
+        cache_dir=".fmp_cache",
+        ttls=None,
+        default_ttl=DEFAULT_TTL,
+        max_bytes=512 * 1024 * 1024,
+        offline=False,
+    ):
+        self.cache_dir = cache_dir
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._size = None  # bytes of entries; walked on the first write
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(endpoint, params=None):
+        """Stable hash of endpoint + params, ignoring the apikey"""
+        params = {k: str(v) for k, v in (params or {}).items() if k != "apikey"}
+        payload = json.dumps({"endpoint": endpoint, "params": params}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def ttl_for(self, endpoint):
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def get(self, endpoint, params=None):
+        """Return (hit, data). Expired entries are misses unless offline."""
+        path = self._path(self.key(endpoint, params))
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return False, None
+
+        age = time.time() - entry.get("fetched_at", 0)
+        if not self.offline and age > self.ttl_for(endpoint):
+            return False, None
+
+        # Touch so eviction is least-recently-used rather than oldest-written
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return True, entry["data"]
+
+    def put(self, endpoint, params, data):
+        """Atomically store a response; evict once the cache passes max_bytes"""
+        path = self._path(self.key(endpoint, params))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+
+        entry = {
+            "endpoint": endpoint,
+            "params": {k: v for k, v in (params or {}).items() if k != "apikey"},
+            "fetched_at": time.time(),
+            "data": data,
+        }
+        # Unique per process and thread: pool threads can write the same key
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+            written = f.tell()
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += written - replaced
+            full = self._size > self.max_bytes
+        if full:
+            self.evict()
+
+    def _entries(self):
+        """(mtime, size, path) of every cached entry"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """
+        Once the cache is over max_bytes, drop least recently used entries
+        until it fits in EVICT_TO of it
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes * EVICT_TO:
+                    break
+
+        with self._lock:
+            self._size = total
@@ -0,0 +1,286 @@
+"""
+Concurrent fetch engine for the FMP API.
+
+FMPClient runs requests on a thread pool so many calls can be in flight at once,
+and a shared TokenBucket caps the request rate instead of sleeping after every
+call. An optional ResponseCache (fmp_cache.py) answers repeat requests from disk,
+and an optional CallAllowance (fmp_budget.py) plus a per-symbol cap stop calls
+once the day's budget is spent instead of running into 429s. Requests share
+one keep-alive session and transient failures (429/5xx, dropped connections)
+are retried a bounded number of times with jittered exponential backoff.
+Point `base_url` at a local stub server to exercise it without the network.
+"""
+
+import multiprocessing
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = "https://financialmodelingprep.com"
+
+# Worth retrying: rate limited or the server side hiccuped
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+# ===== RATE LIMITING =====
+class TokenBucket:
+    """Thread-safe token bucket: refills `rate` tokens/sec, holds at most `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._state = [self.capacity, time.monotonic()]  # tokens, last refill
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available, then take them"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                available = min(
+                    self.capacity, self._state[0] + (now - self._state[1]) * self.rate
+                )
+                self._state[1] = now
+
+                if available >= tokens:
+                    self._state[0] = available - tokens
+                    return
+
+                self._state[0] = available
+                wait = (tokens - available) / self.rate
+
+            time.sleep(wait)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    TokenBucket whose state lives in shared memory, so every worker process of
+    a pool draws from one rate budget. Hand it to workers via the pool
+    initializer (processes must inherit it, not receive it per task).
+    """
+
+    def __init__(self, rate, capacity=None, context=None):
+        super().__init__(rate, capacity)
+        context = context or multiprocessing.get_context()
+        self._state = context.Array("d", self._state)
+        self._lock = self._state.get_lock()
+
+
+# ===== CLIENT =====
+class FMPClient:
+    """Rate-limited FMP client with a worker pool for fanning out requests."""
+
+    def __init__(
+        self,
+        api_key,
+        base_url=BASE_URL,
+        rate=5.0,
+        burst=None,
+        max_workers=8,
+        timeout=30,
+        cache=None,
+        bucket=None,
+        allowance=None,
+        max_calls_per_symbol=None,
+        retries=3,
+        backoff=0.5,
+        max_backoff=8.0,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache = cache
+        self.allowance = allowance
+        self.max_calls_per_symbol = max_calls_per_symbol
+
+        # A SharedTokenBucket passed in caps the rate across processes
+        self.bucket = bucket
+        if self.bucket is None and rate and rate > 0:
+            self.bucket = TokenBucket(rate, burst)
+
+        self.call_count = 0
+        self.cache_hits = 0
+        self.calls_by_symbol = Counter()
+        self.hits_by_symbol = Counter()
+        self.refused_by_symbol = Counter()
+        self.fetched_by_symbol = defaultdict(set)
+        self._count_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="fmp"
+        )
+
+        # One connection per worker thread, reused across requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, endpoint, params=None):
+        """Blocking, rate-limited GET. Returns parsed JSON or None on error."""
+        params = dict(params or {})
+        symbol = params.get("symbol")
+
+        if self.cache:
+            hit, data = self.cache.get(endpoint, params)
+            if hit:
+                with self._count_lock:
+                    self.cache_hits += 1
+                    self.hits_by_symbol[symbol] += 1
+                return data
+            if self.cache.offline:
+                print(f"      [API] {endpoint} ({symbol}) not cached (offline)")
+                return None
+
+        data = self._fetch(endpoint, params, symbol)
+        if data is None:
+            return None
+
+        if self.cache:
+            self.cache.put(endpoint, params, data)
+        with self._count_lock:
+            self.fetched_by_symbol[symbol].add(endpoint)
+        return data
+
+    def get_batch(
+        self, endpoint, symbols, params=None, symbol_param="symbol", batch_size=50
+    ):
+        """
+        Fetch `symbols` from an endpoint that takes a comma-separated symbol
+        list in `symbol_param` ("symbols" for batch-quote), `batch_size` per
+        request. Responses are split back by each record's "symbol" and cached
+        as if every symbol had been requested on its own, so later
+        single-symbol get() calls are cache hits.
+        Returns {symbol: [records]}; symbols that failed are left out.
+        """
+        params = dict(params or {})
+        results = {}
+        missing = []
+
+        for symbol in symbols:
+            single = {**params, symbol_param: symbol}
+            if self.cache:
+                hit, data = self.cache.get(endpoint, single)
+                if hit:
+                    with self._count_lock:
+                        self.cache_hits += 1
+                        self.hits_by_symbol[symbol] += 1
+                    results[symbol] = data
+                    continue
+            missing.append(symbol)
+
+        if self.cache and self.cache.offline:
+            return results
+
+        for start in range(0, len(missing), batch_size):
+            chunk = missing[start : start + batch_size]
+            label = ",".join(chunk)
+            data = self._fetch(endpoint, {**params, symbol_param: label}, label)
+            if data is None:
+                continue
+
+            records = {symbol: [] for symbol in chunk}
+            for record in data:
+                if isinstance(record, dict) and record.get("symbol") in records:
+                    records[record["symbol"]].append(record)
+
+            for symbol, rows in records.items():
+                if self.cache:
+                    self.cache.put(endpoint, {**params, symbol_param: symbol}, rows)
+                with self._count_lock:
+                    self.fetched_by_symbol[symbol].add(endpoint)
+                results[symbol] = rows
+
+        return results
+
+    def _fetch(self, endpoint, params, symbol):
+        """Network GET with bounded, jittered retries. Parsed JSON or None."""
+        query = {**params, "apikey": self.api_key}
+        url = f"{self.base_url}/{endpoint}"
+
+        for attempt in range(self.retries + 1):
+            if not self._reserve(symbol):
+                print(f"      [API] {endpoint} ({symbol}) skipped: call budget spent")
+                return None
+
+            if self.bucket:
+                self.bucket.acquire()
+
+            last_try = attempt == self.retries
+            try:
+                response = self.session.get(url, params=query, timeout=self.timeout)
+                if response.status_code in RETRY_STATUSES and not last_try:
+                    delay = self._backoff(attempt, response.headers.get("Retry-After"))
+                    print(
+                        f"      [API] {endpoint} ({symbol}) HTTP {response.status_code}, "
+                        f"retrying in {delay:.1f}s"
+                    )
+                    time.sleep(delay)
+                    continue
+                response.raise_for_status()
+                return response.json()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_try:
+                    print(f"      [API] {endpoint} ({symbol}) Error: {e}")
+                    return None
+                time.sleep(self._backoff(attempt))
+            except Exception as e:
+                print(f"      [API] {endpoint} ({symbol}) Error: {e}")
+                return None
+
+        return None
+
+    def _backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential delay, never shorter than a Retry-After hint"""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+        try:
+            return max(delay, float(retry_after))
+        except (TypeError, ValueError):
+            return delay
+
+    def _reserve(self, symbol):
+        """Count a network call against the per-symbol cap and daily allowance"""
+        with self._count_lock:
+            over_cap = (
+                self.max_calls_per_symbol is not None
+                and self.calls_by_symbol[symbol] >= self.max_calls_per_symbol
+            )
+            if over_cap or (self.allowance and not self.allowance.try_spend()):
+                self.refused_by_symbol[symbol] += 1
+                return False
+
+            self.call_count += 1
+            self.calls_by_symbol[symbol] += 1
+            return True
+
+    def submit(self, fn, *args, **kwargs):
+        """Run `fn` on the worker pool and return its Future"""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def calls_for(self, symbol):
+        with self._count_lock:
+            return self.calls_by_symbol[symbol]
+
+    def cache_hits_for(self, symbol):
+        with self._count_lock:
+            return self.hits_by_symbol[symbol]
+
+    def refused_for(self, symbol):
+        with self._count_lock:
+            return self.refused_by_symbol[symbol]
+
+    def endpoints_for(self, symbol):
+        """Endpoints fetched from the network (not the cache) for `symbol`"""
+        with self._count_lock:
+            return sorted(self.fetched_by_symbol[symbol])
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        self.session.close()
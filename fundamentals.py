@@ -0,0 +1,145 @@
+"""
+Fundamentals merged onto, and derived from, the daily frame built by main.py.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Most specific first: acceptance timestamp, then filing date
+AVAILABILITY_COLS = ["acceptedDate", "filingDate"]
+
+
+def filing_dates(df):
+    """When each statement row became public: acceptedDate, else filingDate, else NaT"""
+    filed = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    for col in AVAILABILITY_COLS:
+        if col in df.columns and filed.isna().any():
+            parsed = pd.to_datetime(df[col], errors="coerce", format="ISO8601")
+            filed = filed.fillna(parsed.astype("datetime64[ns]"))
+    return filed
+
+
+def merge_fundamental_data(daily_df, fundamental_dfs, lag_days=0):
+    """
+    Point-in-time as-of join of every fundamental source onto the daily rows.
+
+    A statement is only visible from its filing (see filing_dates) plus
+    `lag_days`, so values never leak onto days before they were filed. Sources
+    without filing dates (key metrics) borrow them from the statements of the
+    same fiscal period, and fall back to the fiscal `date` otherwise. Each
+    source is resolved with one searchsorted and a single block-wise take, and
+    the output is assembled with one concat instead of growing the frame once
+    per source.
+    """
+    sources = {
+        name: df
+        for name, df in fundamental_dfs.items()
+        if not df.empty and "date" in df.columns
+    }
+    filed = {name: filing_dates(df) for name, df in sources.items()}
+
+    # Fiscal period end -> earliest known filing, for rows that lack one
+    known = pd.Series(dtype="datetime64[ns]")
+    if sources:
+        known = pd.concat(
+            pd.Series(filed[name].to_numpy(), index=df["date"])
+            for name, df in sources.items()
+        )
+        known = known.dropna().groupby(level=0).min()
+
+    dates = daily_df.index.to_numpy().astype("datetime64[ns]")
+    lag = pd.Timedelta(days=lag_days)
+    parts = [daily_df]
+
+    for name, df in sources.items():
+        fiscal = df["date"].astype("datetime64[ns]")
+        borrowed = pd.Series(known.reindex(fiscal).to_numpy(), index=df.index)
+        available = filed[name].fillna(borrowed).fillna(fiscal) + lag
+        available = available.to_numpy()
+        order = np.argsort(available, kind="stable")
+
+        # Latest statement available on or before each day; -1 means none yet
+        pos = np.searchsorted(available[order], dates, side="right") - 1
+        rows = np.where(pos >= 0, order[np.maximum(pos, 0)], -1)
+
+        values = df.drop(columns=["date"]).reset_index(drop=True).reindex(rows)
+        values.index = daily_df.index
+        values.columns = [f"{name}_{col}" for col in values.columns]
+        parts.append(values)
+
+    return pd.concat(parts, axis=1)
+
+
+def calculate_weighted_shares_outstanding(df):
+    """
+    Blends reported shares with market-derived (marketCap / price) based on report proximity.
+    Adapted for annual data (365-day scale).
+
+    Report distances come from one searchsorted over the report dates, so the
+    cost is O(rows log reports). Expects `df` sorted by date, as main.py builds it.
+    """
+    shares_cols = [
+        col
+        for col in df.columns
+        if "sharesOutstanding" in col.lower() or "commonstock" in col.lower()
+    ]
+    marketcap_cols = [col for col in df.columns if "marketcap" in col.lower()]
+
+    if not shares_cols or not marketcap_cols:
+        print("    ⚠ No shares/marketcap cols for weighting")
+        return df
+
+    shares_col = shares_cols[0]
+    marketcap_col = marketcap_cols[0]
+
+    price_col = "adjClose" if "adjClose" in df.columns else "close"
+    if price_col not in df.columns:
+        print("    ⚠ No price col for market-derived shares")
+        return df
+
+    df["market_derived_shares"] = df[marketcap_col] / df[price_col]
+    df["reported_shares"] = df[shares_col]
+    shares_changed = df["reported_shares"].ne(df["reported_shares"].shift()).to_numpy()
+
+    dates = df.index.values
+    report_dates = dates[shares_changed]
+    one_day = np.timedelta64(1, "D")
+
+    days_since_report = np.zeros(len(df), dtype=np.int64)
+    days_until_next_report = np.zeros(len(df), dtype=np.int64)
+
+    if len(report_dates) > 0:
+        # Number of reports on or before each date: the last one is "recent",
+        # the next one (if any) is "upcoming"
+        n_before = np.searchsorted(report_dates, dates, side="right")
+        has_recent = n_before > 0
+        has_upcoming = n_before < len(report_dates)
+
+        recent = report_dates[np.maximum(n_before - 1, 0)]
+        upcoming = report_dates[np.minimum(n_before, len(report_dates) - 1)]
+
+        days_since_report[has_recent] = (dates - recent)[has_recent] // one_day
+        days_until_next_report[has_upcoming] = (upcoming - dates)[has_upcoming] // one_day
+
+    report_progress = days_since_report / (
+        days_since_report + days_until_next_report + 1
+    )
+    report_progress = pd.Series(report_progress, index=df.index).fillna(0.5)
+    market_weight = report_progress**2
+    reported_weight = 1 - market_weight
+
+    df["weighted_shares_outstanding"] = (
+        reported_weight * df["reported_shares"]
+        + market_weight * df["market_derived_shares"]
+    )
+
+    mask_nan = df["reported_shares"].isna()
+    df.loc[mask_nan, "weighted_shares_outstanding"] = df.loc[
+        mask_nan, "market_derived_shares"
+    ]
+
+    print(
+        f"    ✓ Weighted shares calc'd (reported weight avg: {reported_weight.mean():.2%})"
+    )
+
+    return df
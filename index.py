@@ -1,32 +1,65 @@
+import argparse
+import hashlib
 import os
-import ast
+import time
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
 import pandas as pd
+from sklearn.base import clone
 from sklearn.metrics import r2_score
-from sklearn.linear_model import LinearRegression
+from sklearn.linear_model import LinearRegression, SGDRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 import joblib
 
+import storage
+from coercion import coerce_scalar, to_numeric_frame
+from feature_cache import CACHE_DIR, FeatureCache, pipeline_version
+from features import BASE_COLS, HISTORY_ROWS, build_features
+from model_bundle import BUNDLE_FILE, save_bundle
+from model_registry import CANDIDATE, CURRENT, publish
+from profiling import StageProfiler, cprofile
+import model_search
+import coercion
+import features
 
-class DilutionModel:
-    DESIRED_COLS = [
-        "market_derived_shares",
-        "cashflow_annual_netStockIssuance",
-        "balance_annual_totalDebt",
-        "cashflow_annual_commonStockRepurchased",
-        "profile_lastDividend",
-        "metrics_annual_earningsYield",
-        "profile_fullTimeEmployees",
-        "metrics_annual_peRatio",
-    ]
 
-    def __init__(self, data_path="./datasets_fmp_free/", alg_path="alg"):
+class DilutionModel:
+    DESIRED_COLS = BASE_COLS
+    PROFILE_FILE = "stage_profile.json"
+
+    def __init__(
+        self,
+        data_path="./datasets_fmp_free/",
+        alg_path="alg",
+        cache_dir=CACHE_DIR,
+        profiler=None,
+        publish_as=CURRENT,
+        compact=False,
+    ):
         self.data_path = data_path
         self.alg_path = alg_path
+        # Registry pointer a trained model is published under (model_registry.py)
+        self.publish_as = publish_as
+        # Shrink each cleaned file's dtypes (storage.compact_frame) as it loads
+        self.compact = compact
+
+        # One cache per data directory, invalidated by any feature code change;
+        # compact frames have other dtypes, so they are cached apart
+        data_key = hashlib.sha256(os.path.abspath(data_path).encode()).hexdigest()
+        cache_name = data_key[:12] + ("-compact" if compact else "")
+        self.feature_cache = FeatureCache(
+            os.path.join(cache_dir, cache_name),
+            version=pipeline_version(
+                coercion, features, extra=(features.FEATURE_VERSION, BASE_COLS)
+            ),
+        )
         self.model = None
         self.scaler = None
         self.columns = None
+        # Per-stage timings/memory (profiling.py); cheap enough to stay on
+        self.profiler = profiler or StageProfiler()
         os.makedirs(self.alg_path, exist_ok=True)
 
     # ==================================================
@@ -35,174 +68,532 @@ class DilutionModel:
     @staticmethod
     def clean_numeric(x):
         """Safely convert a messy cell to float."""
-        if isinstance(x, (int, float, np.int64, np.float64)):
-            return float(x)
-
-        if isinstance(x, (list, tuple, np.ndarray)):
-            return DilutionModel.clean_numeric(x[0])
-
-        if isinstance(x, str):
-            txt = x.strip()
-
-            # Possible stringified list "[123, 14]"
-            if txt.startswith("[") and txt.endswith("]"):
-                try:
-                    arr = ast.literal_eval(txt)
-                    return DilutionModel.clean_numeric(arr[0])
-                except:
-                    pass
+        return coerce_scalar(x)
 
-            for ch in [",", "$", "%"]:
-                txt = txt.replace(ch, "")
-
-            try:
-                return float(txt)
-            except:
-                return np.nan
-
-        return np.nan
+    @staticmethod
+    def clean_frame(df):
+        """clean_numeric over a whole frame, column-wise (see coercion.py)."""
+        return to_numeric_frame(df)
 
     # ==================================================
     # FEATURE ENGINEERING
     # ==================================================
     def engineer_features(self, df):
-        """Generate meaningful predictive features."""
-
-        df["feature_debt_per_share"] = (
-            df["balance_annual_totalDebt"] / df["market_derived_shares"]
-        )
-
-        df["feature_dilution_ratio"] = df["cashflow_annual_netStockIssuance"] / (
-            abs(df["cashflow_annual_commonStockRepurchased"]) + 1
-        )
-
-        df["feature_price_to_earnings_inverse"] = 1 / (
-            df["metrics_annual_earningsYield"] + 1e-9
-        )
-
-        df["feature_log_totalDebt"] = np.log(df["balance_annual_totalDebt"] + 1)
-        df["feature_log_shares"] = np.log(df["market_derived_shares"] + 1)
-
-        # time-series change features
-        for col in self.DESIRED_COLS:
-            if col in df.columns:
-                df[f"{col}_change"] = df[col].pct_change()
-                df[f"{col}_prev1"] = df[col].shift(1)
-                df[f"{col}_prev2"] = df[col].shift(2)
-
-        df["feature_dividend_change"] = df["profile_lastDividend"].pct_change()
-        df["feature_earningsYield_change"] = df[
-            "metrics_annual_earningsYield"
-        ].pct_change()
-
-        return df
+        """Generate meaningful predictive features (see features.py)."""
+        with self.profiler.stage("engineer_features", df) as stage:
+            return stage.output(build_features(df))
 
     # ==================================================
     # LOAD FINANCIAL DATA
     # ==================================================
-    def load_financial_data(self):
-        dfs = []
-
-        for filename in os.listdir(self.data_path):
-            if not filename.endswith(".csv"):
-                continue
-
-            print(f"Loading: {filename}")
-
+    def list_sources(self):
+        """(ticker, path) of every input: store partitions and legacy CSVs"""
+        # With a manifest, files holding none of the model columns are skipped
+        columns = self.DESIRED_COLS
+        partitions = storage.list_all_partitions(self.data_path, columns=columns)
+        return [(ticker, path) for ticker, _, path in partitions]
+
+    def read_csv_file(self, path, ticker):
+        """One {ticker}_{year}.csv, parsing only the date and the model columns."""
+        wanted = set(self.DESIRED_COLS) | {"date"}
+
+        with self.profiler.stage("parse_csv") as stage:
             try:
                 df = pd.read_csv(
-                    os.path.join(self.data_path, filename), low_memory=False
+                    path,
+                    usecols=lambda col: col in wanted,
+                    dtype=dict.fromkeys(self.DESIRED_COLS, "float64"),
                 )
-
-                available = [c for c in self.DESIRED_COLS if c in df.columns]
-                reduced_df = df[available].copy()
-                reduced_df = reduced_df.map(self.clean_numeric)
-
-                dfs.append(reduced_df)
-            except Exception as e:
-                print(f"Failed reading {filename}: {e}")
-
-        if not dfs:
+            except ValueError:
+                # A messy cell ("$1,000", "[1, 2]"): read as text, coerce below
+                df = pd.read_csv(
+                    path,
+                    usecols=lambda col: col in wanted,
+                    dtype=dict.fromkeys(self.DESIRED_COLS, "object"),
+                )
+            stage.output(df)
+
+        available = [c for c in self.DESIRED_COLS if c in df.columns]
+        with self.profiler.stage("clean_numeric", df[available]) as stage:
+            df[available] = stage.output(self.clean_frame(df[available]))
+
+        df["ticker"] = ticker
+        if "date" in df.columns:
+            df["date"] = pd.to_datetime(df["date"], errors="coerce")
+        return self.compact_frame(df)
+
+    def read_partition(self, path, ticker):
+        """One store partition: only the model columns are decoded."""
+        with self.profiler.stage("read_partition") as stage:
+            df = storage.read_ticker_partition(
+                self.data_path, ticker, path, self.DESIRED_COLS
+            )
+            stage.output(df)
+        available = [c for c in self.DESIRED_COLS if c in df.columns]
+        df = df[available + ["ticker"]].reset_index()
+        with self.profiler.stage("clean_numeric", df[available]) as stage:
+            df[available] = stage.output(self.clean_frame(df[available]))
+        return self.compact_frame(df)
+
+    def compact_frame(self, df):
+        """`df` in compact dtypes when this model loads compact, else as is"""
+        if not self.compact:
+            return df
+        with self.profiler.stage("compact", df) as stage:
+            return stage.output(storage.compact_frame(df))
+
+    def read_source(self, source):
+        ticker, path = source
+        try:
+            if path.endswith(".csv"):
+                return self.read_csv_file(path, ticker)
+            return self.read_partition(path, ticker)
+        except Exception as e:
+            print(f"Failed reading {path}: {e}")
+            return None
+
+    def read_source_in_worker(self, source, profiler):
+        """read_source in a pool process, returning its stage records too"""
+        self.profiler = profiler
+        df = self.read_source(source)
+        profiler.close()
+        return df, profiler.records
+
+    def read_sources(self, sources, workers=None):
+        """Cleaned frames (None for failures) for `sources`, in order"""
+        workers = min(workers or os.cpu_count() or 1, max(len(sources), 1))
+        print(f"Loading {len(sources)} files from: {self.data_path}")
+
+        if workers <= 1:
+            return [self.read_source(source) for source in sources]
+
+        # CSV parsing holds the GIL, so CSVs are spread over processes;
+        # Arrow releases it, so partitions only need threads
+        if any(path.endswith(".csv") for _, path in sources):
+            read = partial(self.read_source_in_worker, profiler=self.profiler.child())
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(read, sources))
+            for _, records in results:
+                self.profiler.merge(records)
+            return [df for df, _ in results]
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self.profiler.nested(self.read_source), sources))
+
+    def load_financial_data(self, workers=None, use_cache=True):
+        """
+        Engineered model columns plus date and ticker for every row. Only the
+        model columns are parsed, files load on `workers` in parallel, and the
+        result comes from the feature cache when its inputs haven't changed.
+        """
+        sources = self.list_sources()
+
+        with self.profiler.stage("load") as stage:
+            if use_cache:
+                df = self.feature_cache.build(
+                    sources,
+                    lambda missing: self.read_sources(missing, workers),
+                    self.engineer_features,
+                    depends_on=self.source_dependencies,
+                )
+            else:
+                dfs = [
+                    df for df in self.read_sources(sources, workers) if df is not None
+                ]
+                df = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+                df = self.engineer_features(df).reset_index(drop=True) if dfs else df
+            stage.output(df)
+
+        if df.empty:
             raise RuntimeError("❗ No usable financial data found.")
 
-        df = pd.concat(dfs, ignore_index=True)
-        df = df.apply(pd.to_numeric, errors="coerce")
-        df = self.engineer_features(df)
-
         return df
 
+    def source_dependencies(self, ticker):
+        """Files besides its partitions that feed a ticker's rows"""
+        if storage.list_partitions(self.data_path, [ticker]):
+            return [storage.profile_path(self.data_path, ticker)]
+        return []
+
     # ==================================================
     # TARGET LABEL
     # ==================================================
-    def compute_target(self, df):
-        df["netIssuance"] = (
-            df["cashflow_annual_netStockIssuance"]
-            - df["cashflow_annual_commonStockRepurchased"]
-        )
-
-        max_abs = df["netIssuance"].abs().max()
-        df["dilution_signal"] = (df["netIssuance"] / max_abs).clip(-1, 1)
-
-        return df
+    def compute_target(self, df, max_abs=None):
+        """
+        `max_abs` defaults to this frame's; streaming passes the global one.
+        train() and search_models() rescale netIssuance by their training rows.
+        """
+        with self.profiler.stage("compute_target", df) as stage:
+            df["netIssuance"] = (
+                df["cashflow_annual_netStockIssuance"]
+                - df["cashflow_annual_commonStockRepurchased"]
+            )
+
+            if max_abs is None:
+                max_abs = df["netIssuance"].abs().max()
+            df["dilution_signal"] = (df["netIssuance"] / max_abs).clip(-1, 1)
+
+            return stage.output(df)
 
     # ==================================================
     # TRAINING
     # ==================================================
-    def train(self, df):
+    # The target and the column it is computed from never go into X
+    TARGET_COLS = ["dilution_signal", "netIssuance"]
+    # compute_target's inputs. They and every feature built from them (ratios,
+    # changes, lags: the annual values repeat on each daily row, so a lag is
+    # almost always today's value) restate the target and stay out of X too.
+    TARGET_INPUTS = [
+        "cashflow_annual_netStockIssuance",
+        "cashflow_annual_commonStockRepurchased",
+    ]
+
+    def target_columns(self, columns):
+        """The columns of `columns` that are, or are derived from, the target"""
+        derived = {
+            name
+            for name, (inputs, _) in features.ROW_FEATURES.items()
+            if set(inputs) & set(self.TARGET_INPUTS)
+        }
+        prefixes = tuple(self.TARGET_INPUTS)
+        return [
+            col
+            for col in columns
+            if col in self.TARGET_COLS or col in derived or col.startswith(prefixes)
+        ]
+
+    def feature_matrix(self, df):
+        """(X, y, meta) with complete finite rows; meta keeps date/ticker for splits"""
         df = df.dropna(subset=["dilution_signal"])
-        df = df.select_dtypes(include=[np.number])
+        numeric = df.select_dtypes(include=[np.number])
 
-        X = df.drop(columns=["dilution_signal"])
-        y = df["dilution_signal"]
+        X = numeric.drop(columns=self.target_columns(numeric.columns))
+        y = numeric["dilution_signal"]
 
         X = X.replace([np.inf, -np.inf], np.nan).dropna()
         y = y.loc[X.index]
+        meta = df.loc[X.index, [c for c in ("date", "ticker") if c in df.columns]]
+        return X, y, meta
 
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
+    def train(self, df):
+        with self.profiler.stage("feature_matrix", df) as stage:
+            X, _, _ = self.feature_matrix(df)
+            stage.output(X)
 
-        self.scaler = StandardScaler()
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        # Target scaled by the training rows' max |netIssuance| only
+        train_rows, test_rows = train_test_split(np.arange(len(X)), test_size=0.2)
+        raw = df.loc[X.index, "netIssuance"].to_numpy()
+        y = model_search.fold_target(raw, train_rows)
+        X_train, X_test = X.iloc[train_rows], X.iloc[test_rows]
+        y_train, y_test = y[train_rows], y[test_rows]
+
+        with self.profiler.stage("fit", X_train) as stage:
+            self.scaler = StandardScaler()
+            X_train_scaled = self.scaler.fit_transform(X_train)
+            X_test_scaled = self.scaler.transform(X_test)
 
-        self.model = LinearRegression()
-        self.model.fit(X_train_scaled, y_train)
+            self.model = LinearRegression()
+            self.model.fit(X_train_scaled, y_train)
 
-        preds = self.model.predict(X_test_scaled)
-        score = r2_score(y_test, preds)
+        with self.profiler.stage("score", X_test) as stage:
+            preds = stage.output(self.model.predict(X_test_scaled))
+            score = r2_score(y_test, preds)
 
         print("=====================================")
         print(f"MODEL TRAINED – R²: {score:.4f}")
         print("=====================================")
 
         self.columns = list(X.columns)
-        self.save_model()
+        self.save_model(training="random 80/20 split", rows=len(X_train), r2=score)
 
         return score
 
+    def search_models(self, df, splitter="walk-forward", n_splits=5, n_jobs=-1):
+        """
+        Cross-validate the candidate grid (model_search.py) on time-aware
+        folds, then refit the best mean R² on all rows and save it.
+        """
+        X, y, meta = self.feature_matrix(df)
+        splits = model_search.make_splits(meta, splitter, n_splits)
+        # Folds scale the raw target by their own training rows
+        raw = df.loc[X.index, "netIssuance"].to_numpy()
+
+        print(
+            f"Searching {len(model_search.candidate_grid())} models × "
+            f"{len(splits)} {splitter} folds on {len(X)} rows..."
+        )
+        start = time.perf_counter()
+        results = model_search.search(
+            X, raw, splits, n_jobs=n_jobs, target=model_search.fold_target
+        )
+        summary = model_search.summarize(results)
+        model_search.print_results(results, summary)
+
+        best = summary.index[0]
+        print(f"Best: {best} (mean R² {summary.loc[best, 'mean_r2']:.4f}) in ", end="")
+        print(f"{time.perf_counter() - start:.1f}s")
+
+        # Each fold scaled X and y on its own training rows; the refit uses all
+        self.scaler = StandardScaler()
+        X_scaled = self.scaler.fit_transform(X.to_numpy(dtype="float64"))
+        self.model = clone(model_search.candidate_grid()[best])
+        self.model.fit(X_scaled, y.to_numpy())
+        self.columns = list(X.columns)
+        self.save_model(
+            training=f"{splitter} search, refit on all rows",
+            rows=len(X),
+            candidate=best,
+            mean_r2=summary.loc[best, "mean_r2"],
+        )
+
+        return summary
+
+    # ==================================================
+    # STREAMING TRAINING
+    # ==================================================
+    def iter_chunks(self, sources, base_cols, max_abs):
+        """
+        (X, y) per ticker/year file with features and target. The last
+        HISTORY_ROWS rows of the previous file of the same ticker are carried
+        over, so lags match a full load, then dropped again.
+        """
+        history = None
+        for ticker, path in sources:
+            df = self.read_source((ticker, path))
+            if df is None:
+                continue
+            df = df.reindex(columns=["date", "ticker"] + base_cols)
+
+            carried = 0
+            if history is not None and history["ticker"].iloc[0] == ticker:
+                carried = len(history)
+                df = pd.concat([history, df], ignore_index=True)
+            history = df.tail(HISTORY_ROWS)
+
+            df = self.engineer_features(df).iloc[carried:]
+            df = self.compute_target(df, max_abs)
+            X, y, _ = self.feature_matrix(df)
+            yield X.reindex(columns=self.columns), y
+
+    def train_streaming(self, epochs=5, checkpoint_every=10, resume=True):
+        """
+        Out-of-core training: a StandardScaler and an SGDRegressor are updated
+        with partial_fit one ticker/year file at a time, so memory holds one
+        chunk. Pass 1 reads the base columns (column set, target scale), the
+        next fits the scaler, then `epochs` passes fit the model. Progress is
+        checkpointed every `checkpoint_every` chunks and resumed on restart.
+        """
+        sources = sorted(self.list_sources(), key=lambda source: source[0])
+        if not sources:
+            raise RuntimeError("❗ No usable financial data found.")
+
+        checkpoint_path = os.path.join(self.alg_path, "stream_checkpoint.pkl")
+        run_key = (self.feature_cache.version, tuple(sources), epochs)
+
+        state = None
+        if resume and os.path.exists(checkpoint_path):
+            state = joblib.load(checkpoint_path)
+            if state["run_key"] != run_key:
+                print("⚠ Checkpoint is for other data or settings, starting over")
+                state = None
+            else:
+                print(f"↻ Resuming at pass {state['pass']}, chunk {state['chunk']}")
+        if state is None:
+            state = self.streaming_state(sources, run_key)
+
+        def save_checkpoint():
+            tmp_path = f"{checkpoint_path}.{os.getpid()}.tmp"
+            joblib.dump(state, tmp_path)
+            os.replace(tmp_path, checkpoint_path)
+
+        self.columns = state["columns"]
+        # Pass 0 fits the scaler, passes 1..epochs the model
+        while state["pass"] <= epochs:
+            chunks = self.iter_chunks(sources, state["base_cols"], state["max_abs"])
+            for index, (X, y) in enumerate(chunks):
+                if index < state["chunk"]:
+                    continue
+                if not X.empty:
+                    if state["pass"] == 0:
+                        state["scaler"].partial_fit(X)
+                        state["rows"] += len(X)
+                    else:
+                        # Seeded per chunk, so a resumed run shuffles identically
+                        rng = np.random.default_rng([state["pass"], index])
+                        order = rng.permutation(len(X))
+                        X_scaled = state["scaler"].transform(X.iloc[order])
+                        state["model"].partial_fit(X_scaled, y.to_numpy()[order])
+
+                state["chunk"] = index + 1
+                if state["chunk"] % checkpoint_every == 0:
+                    save_checkpoint()
+
+            print(f"  ✓ {'scaler' if state['pass'] == 0 else 'epoch'} pass done")
+            state["pass"] += 1
+            state["chunk"] = 0
+            save_checkpoint()
+
+        if state["rows"] == 0:
+            raise RuntimeError("❗ No complete rows to train on.")
+
+        self.scaler = state["scaler"]
+        self.model = state["model"]
+        self.save_model(training="streaming", rows=state["rows"], epochs=epochs)
+        os.remove(checkpoint_path)
+
+        print("=====================================")
+        print(
+            f"MODEL STREAMED – {state['rows']} rows × {len(self.columns)} cols, "
+            f"{epochs} epochs"
+        )
+        print("=====================================")
+        return self.model
+
+    def streaming_state(self, sources, run_key):
+        """
+        Fresh checkpoint state. One pass over the base columns finds which
+        exist and the global netIssuance scale, so every chunk's target and
+        feature columns match a full in-memory load.
+        """
+        found = set()
+        max_abs = 0.0
+        for source in sources:
+            df = self.read_source(source)
+            if df is None:
+                continue
+            found.update(c for c in self.DESIRED_COLS if c in df.columns)
+            if set(self.TARGET_INPUTS) <= set(df.columns):
+                df = self.compute_target(df, max_abs=1.0)
+                max_abs = max(max_abs, df["netIssuance"].abs().max(skipna=True))
+
+        base_cols = [c for c in self.DESIRED_COLS if c in found]
+        template = pd.DataFrame(
+            {c: pd.Series(dtype="float64") for c in base_cols},
+        )
+        template = self.compute_target(self.engineer_features(template), 1.0)
+        X, _, _ = self.feature_matrix(template)
+
+        return {
+            "run_key": run_key,
+            "base_cols": base_cols,
+            "max_abs": max_abs,
+            "columns": list(X.columns),
+            "scaler": StandardScaler(),
+            # Scaled features are heavy-tailed; the default eta0=0.01 diverges
+            "model": SGDRegressor(alpha=1e-4, eta0=1e-3, random_state=0),
+            "pass": 0,
+            "chunk": 0,
+            "rows": 0,
+        }
+
     # ==================================================
     # SAVE MODEL
     # ==================================================
-    def save_model(self):
-        joblib.dump(self.model, f"{self.alg_path}/model.pkl")
-        joblib.dump(self.scaler, f"{self.alg_path}/scaler.pkl")
-        joblib.dump(self.columns, f"{self.alg_path}/columns.pkl")
-        print("✔ Model saved successfully.")
+    def save_model(self, **metadata):
+        """
+        One bundle (model_bundle.py) with the model, scaler and columns,
+        published to the registry and made CURRENT (or CANDIDATE)
+        """
+        with self.profiler.stage("save_model"):
+            path = save_bundle(
+                os.path.join(self.alg_path, BUNDLE_FILE),
+                self.model,
+                self.scaler,
+                self.columns,
+                {
+                    "pipeline_version": self.feature_cache.version,
+                    "data_path": os.path.abspath(self.data_path),
+                    **metadata,
+                },
+            )
+            version = publish(self.alg_path, path, self.publish_as)
+        print(f"✔ Model saved successfully: {version} ({self.publish_as}).")
 
     # ==================================================
     # FULL TRAINING PIPELINE
     # ==================================================
-    def run_full_training(self):
+    def run_full_training(self, report_path=None, cprofile_path=None):
+        """
+        Train, then write the per-stage report (JSON, alg/stage_profile.json
+        by default) and, with `cprofile_path`, a cProfile dump of the run.
+        """
+        with cprofile(cprofile_path):
+            df = self.load_financial_data()
+            df = self.compute_target(df)
+            score = self.train(df)
+
+        self.profiler.close()
+        self.profiler.print_summary()
+        self.profiler.write(
+            report_path or os.path.join(self.alg_path, self.PROFILE_FILE),
+            run="full_training",
+            data_path=os.path.abspath(self.data_path),
+            pipeline_version=self.feature_cache.version,
+            feature_cache=self.feature_cache.stats,
+            rows=len(df),
+            columns=len(self.columns),
+            r2=score,
+        )
+        return score
+
+    def run_model_search(self, splitter="walk-forward", n_splits=5, n_jobs=-1):
         df = self.load_financial_data()
         df = self.compute_target(df)
-        return self.train(df)
+        return self.search_models(df, splitter, n_splits, n_jobs)
 
 
 # ======================================================
 # MAIN SCRIPT
 # ======================================================
 def main():
-    dm = DilutionModel()
-    dm.run_full_training()
+    parser = argparse.ArgumentParser(description="Train the dilution model")
+    parser.add_argument(
+        "--search", action="store_true", help="cross-validate the model grid"
+    )
+    parser.add_argument(
+        "--split", choices=model_search.SPLITTERS, default="walk-forward"
+    )
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel fits")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="train out-of-core, one partition in memory at a time",
+    )
+    parser.add_argument("--epochs", type=int, default=5, help="streaming passes")
+    parser.add_argument(
+        "--profile-json",
+        help=f"stage report path (default alg/{DilutionModel.PROFILE_FILE})",
+    )
+    parser.add_argument("--cprofile", help="also dump cProfile stats to this path")
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="add per-stage tracemalloc peaks to the report (slower)",
+    )
+    parser.add_argument(
+        "--candidate",
+        action="store_true",
+        help="publish as the shadow-scored candidate instead of serving it",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="load files in compact dtypes (float32/int32/categories)",
+    )
+    args = parser.parse_args()
+
+    dm = DilutionModel(
+        profiler=StageProfiler(trace_memory=args.trace_memory),
+        publish_as=CANDIDATE if args.candidate else CURRENT,
+        compact=args.compact,
+    )
+    if args.stream:
+        dm.train_streaming(args.epochs)
+    elif args.search:
+        dm.run_model_search(args.split, args.folds, args.jobs)
+    else:
+        dm.run_full_training(args.profile_json, args.cprofile)
 
 
 if __name__ == "__main__":
@@ -1,57 +1,110 @@
 # I would like to thank grok for doing the refactoring
 # the prompt was to refactor from the previous yfinance data to FMP... it needed help but hey it did a 1 hour job in 10 minutes!!!!
 
-import requests
-import pandas as pd
+"""
+FMP ingestion pipeline: fetch → merge → weighted shares → write, per ticker.
+
+    python main.py --universe tickers.txt --start 2021-01-01 --workers 4
+
+Tickers run across a process pool that shares one request-rate budget; each
+process fans a ticker's endpoint calls out over its own thread pool. Without a
+universe file the default 10-symbol list is used.
+"""
+
+import argparse
+import json
 import os
-from datetime import datetime, timedelta
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
 
+import pandas as pd
 from dotenv import load_dotenv
 
+from fmp_budget import BudgetLedger, CallAllowance, plan_refresh
+from fmp_cache import ResponseCache
+from fmp_client import FMPClient, SharedTokenBucket
+from fundamentals import calculate_weighted_shares_outstanding, merge_fundamental_data
+import storage
+
 load_dotenv()
 FMP_API_KEY = os.getenv("FMP_API_KEY")
-BASE_URL = "https://financialmodelingprep.com"
-api_call_count = 0
+BASE_URL = os.getenv("FMP_BASE_URL", "https://financialmodelingprep.com")
+REQUESTS_PER_SECOND = float(os.getenv("FMP_RATE_LIMIT", "5"))
+MAX_WORKERS = int(os.getenv("FMP_MAX_WORKERS", "8"))  # fetch threads per process
 MAX_CALLS_PER_TICKER = 15
 
-tickers = ["NVDA", "AAPL", "MSFT", "TSLA", "ORCL", "META", "GOOG", "JPM", "TSM", "XOM"]
+# Extra days after a statement's filing before it shows up on daily rows
+FILING_LAG_DAYS = int(os.getenv("FMP_FILING_LAG_DAYS", "0"))
+
+# Responses are cached on disk so re-runs only spend calls on stale data.
+# FMP_OFFLINE=1 serves everything from the cache and never hits the API.
+CACHE_DIR = os.getenv("FMP_CACHE_DIR", ".fmp_cache")
+CACHE_MAX_MB = int(os.getenv("FMP_CACHE_MAX_MB", "512"))
+OFFLINE = os.getenv("FMP_OFFLINE", "0") == "1"
+
+# Calls spent today and per-endpoint fetch times persist here (fmp_budget.py);
+# each run refreshes the stalest tickers that fit in what is left of the day
+DAILY_CALL_LIMIT = int(os.getenv("FMP_DAILY_LIMIT", "250"))
+BUDGET_FILE = os.getenv("FMP_BUDGET_FILE", ".fmp_budget.json")
+
+DEFAULT_TICKERS = [
+    "NVDA", "AAPL", "MSFT", "TSLA", "ORCL", "META", "GOOG", "JPM", "TSM", "XOM"
+]  # fmt: skip
 
 # Free tier: ~5 years historical prices max, so adjust start_date
-start_date = (datetime.today() - timedelta(days=5 * 365 + 1)).strftime("%Y-%m-%d")
-end_date = datetime.today().strftime("%Y-%m-%d")
-output_dir = "datasets_fmp_free"
+DEFAULT_START = (datetime.today() - timedelta(days=5 * 365 + 1)).strftime("%Y-%m-%d")
+DEFAULT_END = datetime.today().strftime("%Y-%m-%d")
+DEFAULT_OUTPUT_DIR = "datasets_fmp_free"
 
-os.makedirs(output_dir, exist_ok=True)
+# Partitions are stored as {output_dir}/ticker=X/year=Y/part.parquet (storage.py).
+# FMP_INCREMENTAL=1 only requests bars newer than what is already stored and
+# rewrites just the partitions those bars (and any new report) can change.
+# Migrate an old CSV tree first with: python storage.py convert datasets_fmp_free
+INCREMENTAL = os.getenv("FMP_INCREMENTAL", "0") == "1"
 
+# One client per process, created by init_client()
+client = None
 
-# ===== HELPER FUNCTIONS =====
-def fetch_fmp(endpoint, params=None):
-    """Fetch data from FMP API with error handling"""
-    global api_call_count
 
-    if params is None:
-        params = {}
-    params["apikey"] = FMP_API_KEY
+def init_client(options, bucket=None, allowance=None):
+    """
+    Per-process setup. `bucket` (SharedTokenBucket) and `allowance`
+    (CallAllowance) are shared by every process of a pool.
+    """
+    global client
 
-    try:
-        api_call_count += 1
-        print(f"      [API Call #{api_call_count}]", end=" ")
-
-        response = requests.get(f"{BASE_URL}/{endpoint}", params=params)
-        response.raise_for_status()
-        data = response.json()
-        time.sleep(0.5)
-        return data
-    except Exception as e:
-        print(f"Error: {e}")
-        return None
+    cache = ResponseCache(
+        options["cache_dir"],
+        max_bytes=options["cache_max_mb"] * 1024 * 1024,
+        offline=options["offline"],
+    )
+    client = FMPClient(
+        FMP_API_KEY,
+        options["base_url"],
+        rate=options["rate"],
+        max_workers=options["fetch_threads"],
+        cache=cache,
+        bucket=bucket,
+        allowance=allowance,
+        max_calls_per_symbol=MAX_CALLS_PER_TICKER,
+    )
+
+
+# ===== HELPER FUNCTIONS =====
+def fetch_fmp(endpoint, params=None):
+    """Fetch data from FMP API through the shared rate-limited client"""
+    return client.get(endpoint, params)
 
 
 def fetch_historical_prices(ticker, from_date, to_date):
     """Fetch historical daily EOD prices - Free tier (~5yr max)"""
     endpoint = "stable/historical-price-eod/full"
-    params = {"symbol": ticker}
+    params = {
+        "symbol": ticker,
+        "from": from_date.strftime("%Y-%m-%d"),
+        "to": to_date.strftime("%Y-%m-%d"),
+    }
     data = fetch_fmp(endpoint, params)
 
     if data:
@@ -138,98 +191,18 @@ def fetch_company_profile(ticker):
     return {}
 
 
-def merge_fundamental_data(daily_df, fundamental_dfs):
-    """Merge fundamental data with daily price data using forward fill"""
-    merged = daily_df.copy()
+def fetch_company_profiles(tickers, batch_size=50):
+    """Batch variant of fetch_company_profile: one call per `batch_size` symbols"""
+    data = client.get_batch("stable/profile", tickers, batch_size=batch_size)
+    return {ticker: rows[0] for ticker, rows in data.items() if rows}
 
-    for name, df in fundamental_dfs.items():
-        if df.empty:
-            continue
-
-        if "date" in df.columns:
-            df_indexed = df.set_index("date").sort_index()
-            df_indexed.columns = [f"{name}_{col}" for col in df_indexed.columns]
-            df_reindexed = df_indexed.reindex(merged.index, method="ffill")
-            merged = pd.concat([merged, df_reindexed], axis=1)
-
-    return merged
-
-
-def calculate_weighted_shares_outstanding(df):
-    """
-    Blends reported shares with market-derived (marketCap / price) based on report proximity.
-    Adapted for annual data (365-day scale).
-    """
-    shares_cols = [
-        col
-        for col in df.columns
-        if "sharesOutstanding" in col.lower() or "commonstock" in col.lower()
-    ]
-    marketcap_cols = [col for col in df.columns if "marketcap" in col.lower()]
-
-    if not shares_cols or not marketcap_cols:
-        print("    ⚠ No shares/marketcap cols for weighting")
-        return df
-
-    shares_col = shares_cols[0]
-    marketcap_col = marketcap_cols[0]
-
-    price_col = "adjClose" if "adjClose" in df.columns else "close"
-    if price_col not in df.columns:
-        print("    ⚠ No price col for market-derived shares")
-        return df
-
-    df["market_derived_shares"] = df[marketcap_col] / df[price_col]
-    df["reported_shares"] = df[shares_col]
-    df["shares_changed"] = df["reported_shares"].ne(df["reported_shares"].shift())
-
-    report_dates = df[df["shares_changed"]].index
 
-    df["days_since_report"] = 0
-    df["days_until_next_report"] = 0
-
-    for date in df.index:
-        recent = report_dates[report_dates <= date]
-        upcoming = report_dates[report_dates > date]
-
-        if len(recent) > 0:
-            df.loc[date, "days_since_report"] = (date - recent[-1]).days
-        if len(upcoming) > 0:
-            df.loc[date, "days_until_next_report"] = (upcoming[0] - date).days
-
-    df["report_progress"] = df["days_since_report"] / (
-        df["days_since_report"] + df["days_until_next_report"] + 1
-    )
-    df["report_progress"] = df["report_progress"].fillna(0.5)
-    df["market_weight"] = df["report_progress"] ** 2
-    df["reported_weight"] = 1 - df["market_weight"]
-
-    df["weighted_shares_outstanding"] = (
-        df["reported_weight"] * df["reported_shares"]
-        + df["market_weight"] * df["market_derived_shares"]
-    )
-
-    mask_nan = df["reported_shares"].isna()
-    df.loc[mask_nan, "weighted_shares_outstanding"] = df.loc[
-        mask_nan, "market_derived_shares"
-    ]
-
-    print(
-        f"    ✓ Weighted shares calc'd (reported weight avg: {df['reported_weight'].mean():.2%})"
+def fetch_quotes(tickers, batch_size=50):
+    """Latest quote per ticker via the batch-quote endpoint"""
+    data = client.get_batch(
+        "stable/batch-quote", tickers, symbol_param="symbols", batch_size=batch_size
     )
-
-    # Cleanup
-    drop_cols = [
-        "shares_changed",
-        "days_since_report",
-        "days_until_next_report",
-        "report_progress",
-        "market_weight",
-        "reported_weight",
-    ]
-    df.drop(columns=drop_cols, errors="ignore", inplace=True)
-
-    return df
+    return {ticker: rows[0] for ticker, rows in data.items() if rows}
 
 
 def fetch_stock_splits(ticker):
@@ -270,65 +243,149 @@ def fetch_dividends(ticker):
     return pd.DataFrame()
 
 
-# ===== MAIN EXECUTION =====
-print(
-    f"🔥 Free-tier FMP fetch v2: {len(tickers)} tickers (stable endpoints, EOD prices, annual funds)"
-)
-print(f"Range: {start_date} to {end_date}\n")
+# ===== INCREMENTAL REFRESH =====
+def last_stored_date(output_dir, ticker):
+    """Most recent stored bar for a ticker, or None if nothing is saved yet"""
+    years = storage.stored_years(output_dir, ticker)
+    if not years:
+        return None
+    path = storage.partition_path(output_dir, ticker, years[-1])
+    stored = storage.read_partition(path, columns=[])
+    return stored.index.max() if len(stored.index) > 0 else None
 
-for ticker in tickers:
-    print(f"\n{'=' * 60}")
-    print(f"Processing {ticker}...")
-    print(f"{'=' * 60}")
 
-    # Prices first
-    print(f"  → Fetching EOD historical prices...")
-    daily_data = fetch_historical_prices(
-        ticker, pd.to_datetime(start_date), pd.to_datetime(end_date)
+def load_refresh_window(output_dir, ticker, since):
+    """
+    Stored rows a refresh can change: everything from the last shares report
+    on or before `since` (weighted shares are measured between reports).
+    Reads partitions newest-first and stops once that report is found.
+    """
+    frames = []
+    for year in reversed(storage.stored_years(output_dir, ticker)):
+        path = storage.partition_path(output_dir, ticker, year)
+        frames.insert(0, storage.read_partition(path))
+        stored = pd.concat(frames)
+        if "reported_shares" not in stored.columns:
+            continue
+
+        shares = stored["reported_shares"]
+        changed = shares.ne(shares.shift())
+        changed.iloc[0] = False  # earliest loaded row isn't a known report
+        report_dates = stored.index[changed & (stored.index <= since)]
+        if len(report_dates) > 0:
+            return stored.loc[report_dates[-1] :]
+
+    return pd.concat(frames) if frames else pd.DataFrame()
+
+
+def fetch_ticker_data(ticker, from_date, to_date):
+    """Fan out every per-ticker endpoint onto the client pool; returns futures by name"""
+    return {
+        "prices": client.submit(fetch_historical_prices, ticker, from_date, to_date),
+        "income_annual": client.submit(fetch_income_statements, ticker, "annual", 5),
+        "balance_annual": client.submit(fetch_balance_sheets, ticker, "annual", 5),
+        "cashflow_annual": client.submit(fetch_cash_flow, ticker, "annual", 5),
+        "metrics_annual": client.submit(fetch_key_metrics, ticker, "annual", 5),
+        "profile": client.submit(fetch_company_profile, ticker),
+        "splits": client.submit(fetch_stock_splits, ticker),
+        "dividends": client.submit(fetch_dividends, ticker),
+    }
+
+
+# ===== PIPELINE =====
+def log(ticker, message):
+    print(f"  [{ticker}] {message}")
+
+
+def start_ticker(ticker, options):
+    """Queue a ticker's requests; returns (futures, last stored date or None)"""
+    last_date = None
+    if options["incremental"]:
+        last_date = last_stored_date(options["output_dir"], ticker)
+
+    from_date = (
+        last_date + timedelta(days=1)
+        if last_date is not None
+        else pd.to_datetime(options["start_date"])
     )
+    futures = fetch_ticker_data(ticker, from_date, pd.to_datetime(options["end_date"]))
+    return futures, last_date
+
+
+def finish_ticker(ticker, options, futures, last_date, started=None):
+    """Merge, weight and write a ticker once its requests resolve; returns its summary"""
+    started = started if started is not None else time.perf_counter()
+    output_dir = options["output_dir"]
+    summary = {"ticker": ticker, "status": "ok", "rows": 0, "cols": 0}
+
+    def done(status):
+        summary["status"] = status
+        summary["calls"] = client.calls_for(ticker)
+        summary["cached"] = client.cache_hits_for(ticker)
+        summary["refreshed"] = client.endpoints_for(ticker)
+        summary["elapsed"] = round(time.perf_counter() - started, 3)
+        return summary
+
+    def over_budget():
+        # Don't overwrite good partitions with a half-fetched ticker
+        if client.refused_for(ticker):
+            log(ticker, "⚠ Call budget spent mid-ticker, not saving.")
+            return True
+        return False
 
-    if daily_data.empty:
-        print(f"  ✗ No price data for {ticker}, skipping.")
-        continue
+    # Prices first
+    daily_data = futures["prices"].result()
 
-    print(f"  ✓ {len(daily_data)} days of EOD data")
+    if daily_data.empty:
+        for future in futures.values():
+            future.cancel()
+        if over_budget():
+            return done("over-budget")
+        if last_date is not None:
+            log(ticker, f"✓ Up to date through {last_date.date()}, skipping.")
+            return done("up-to-date")
+        log(ticker, "✗ No price data, skipping.")
+        return done("no-prices")
+
+    log(ticker, f"✓ {len(daily_data)} days of EOD data")
 
     # Fundamentals (annual, stable)
     fundamental_data = {}
+    for name in ["income_annual", "balance_annual", "cashflow_annual", "metrics_annual"]:
+        fundamental_data[name] = futures[name].result()
+    log(
+        ticker,
+        "✓ Fundamentals: "
+        + ", ".join(f"{name} {len(df)}" for name, df in fundamental_data.items()),
+    )
 
-    print(f"  → Income statements (annual, 5yr)...")
-    fundamental_data["income_annual"] = fetch_income_statements(ticker, "annual", 5)
-    print(f"  ✓ {len(fundamental_data['income_annual'])} records")
-
-    print(f"  → Balance sheets (annual, 5yr)...")
-    fundamental_data["balance_annual"] = fetch_balance_sheets(ticker, "annual", 5)
-    print(f"  ✓ {len(fundamental_data['balance_annual'])} records")
-
-    print(f"  → Cash flows (annual, 5yr)...")
-    fundamental_data["cashflow_annual"] = fetch_cash_flow(ticker, "annual", 5)
-    print(f"  ✓ {len(fundamental_data['cashflow_annual'])} records")
-
-    print(f"  → Key metrics (annual, 5yr)...")
-    fundamental_data["metrics_annual"] = fetch_key_metrics(ticker, "annual", 5)
-    print(f"  ✓ {len(fundamental_data['metrics_annual'])} records")
-
-    # Profile (stable)
-    print(f"  → Company profile...")
-    profile = fetch_company_profile(ticker)
+    # Incremental: re-derive only the stored tail the new bars/reports can touch
+    if last_date is not None:
+        statement_dates = [
+            df["date"].max() for df in fundamental_data.values() if not df.empty
+        ]
+        since = min([daily_data.index[0]] + statement_dates)
+        window = load_refresh_window(output_dir, ticker, since)
+        window = window.reindex(columns=daily_data.columns)
+        window = window[window.index < daily_data.index[0]]
+        daily_data = pd.concat([window, daily_data])
+        log(ticker, f"✓ Recomputing {len(daily_data)} tail rows from {since.date()}")
+
+    # Profile (stable): stored once per ticker as a dated snapshot
+    profile = futures["profile"].result()
     if profile:
-        for key, value in profile.items():
-            if isinstance(value, (int, float, str)) and not isinstance(value, bool):
-                if isinstance(value, str) and len(value) < 200:
-                    daily_data[f"profile_{key}"] = value
-                elif isinstance(value, (int, float)):
-                    daily_data[f"profile_{key}"] = value
-        print(f"  ✓ Profile added")
+        if storage.write_profile_snapshot(output_dir, ticker, profile):
+            log(ticker, "✓ Profile snapshot saved")
+        else:
+            log(ticker, "✓ Profile unchanged")
+        # Weighted shares prices off the profile market cap; not saved per row
+        if isinstance(profile.get("marketCap"), (int, float)):
+            daily_data["profile_marketCap"] = profile["marketCap"]
     else:
-        print(f"  ⚠ No profile data")
+        log(ticker, "⚠ No profile data")
 
     # Splits & Divs (stable, fixed overlap)
-    print(f"  → Stock splits...")
-    splits = fetch_stock_splits(ticker)
+    splits = futures["splits"].result()
     if not splits.empty:
         daily_data = daily_data.join(
             splits.rename(
@@ -338,37 +395,298 @@ for ticker in tickers:
                 }
             ).fillna(0)
         )  # Ffill 0 for no-split days
-    print(f"  ✓ {len(splits)} splits")
 
-    print(f"  → Dividends...")
-    dividends = fetch_dividends(ticker)
+    dividends = futures["dividends"].result()
     if not dividends.empty:
         daily_data = daily_data.join(dividends)
-    print(f"  ✓ {len(dividends)} div records")
+    log(ticker, f"✓ {len(splits)} splits, {len(dividends)} div records")
 
-    # Merge & calc
-    print(f"  → Merging fundamentals...")
-    merged_data = merge_fundamental_data(daily_data, fundamental_data)
+    if over_budget():
+        return done("over-budget")
 
-    print(f"  → Weighted shares calc...")
+    # Merge & calc
+    merged_data = merge_fundamental_data(
+        daily_data, fundamental_data, lag_days=options["filing_lag_days"]
+    )
     merged_data = calculate_weighted_shares_outstanding(merged_data)
 
+    merged_data = merged_data.drop(columns=["profile_marketCap"], errors="ignore")
+    summary["rows"] = len(merged_data)
+    summary["cols"] = len(merged_data.columns)
     merged_data["Year"] = merged_data.index.year
 
-    print(f"  ✓ Dataset: {len(merged_data)} rows × {len(merged_data.columns)} cols")
+    log(ticker, f"✓ Dataset: {summary['rows']} rows × {summary['cols']} cols")
 
-    # Save yearly CSVs
-    print(f"  → Saving by year...")
+    # Save yearly partitions, one manifest update for the ticker
+    frames = {}
     for year, df_year in merged_data.groupby("Year"):
         df_year = df_year.drop(columns=["Year"], errors="ignore")
-        file_path = f"{output_dir}/{ticker}_{year}.csv"
-        df_year.to_csv(file_path, index=True)
-        print(f"    ✓ {file_path} ({len(df_year)} rows)")
+        file_path = storage.partition_path(output_dir, ticker, year)
+        if last_date is not None and os.path.exists(file_path):
+            # Keep the untouched head of a partially recomputed year
+            stored = storage.read_partition(file_path)
+            df_year = pd.concat([stored[stored.index < df_year.index[0]], df_year])
+        frames[year] = df_year
+
+    paths = storage.write_partitions(frames, output_dir, ticker)
+    for year, file_path in paths.items():
+        log(ticker, f"✓ {file_path} ({len(frames[year])} rows)")
+
+    return done("ok")
+
+
+def process_ticker(ticker, options):
+    """Pool task: the whole pipeline for one ticker in this worker process"""
+    started = time.perf_counter()
+    try:
+        futures, last_date = start_ticker(ticker, options)
+        return finish_ticker(ticker, options, futures, last_date, started)
+    except Exception as e:
+        log(ticker, f"✗ Failed: {e}")
+        return {
+            "ticker": ticker,
+            "status": "error",
+            "rows": 0,
+            "cols": 0,
+            "calls": client.calls_for(ticker),
+            "cached": client.cache_hits_for(ticker),
+            "refreshed": client.endpoints_for(ticker),
+            "elapsed": round(time.perf_counter() - started, 3),
+        }
+
+
+def prefetch_profiles(tickers):
+    """
+    Warm the response cache with batched profile calls, so each ticker's own
+    fetch_company_profile is a cache hit. Returns the endpoints refreshed per
+    ticker and the calls spent, for the budget ledger.
+    """
+    if client.cache is None or len(tickers) < 2:
+        return {}, 0
 
-    print(f"\n  📊 Calls for {ticker}: {api_call_count}")
+    calls_before = client.call_count
+    profiles = fetch_company_profiles(tickers)
+    calls = client.call_count - calls_before
+    if calls:
+        print(f"📇 {len(profiles)} profiles in {calls} batched call(s)\n")
+    return {ticker: client.endpoints_for(ticker) for ticker in tickers}, calls
 
-print("\n" + "=" * 60)
-print("=" * 60)
-print(
-    f"Total calls: {api_call_count}/250 | Data in '{output_dir}' – FCF, shares, ROE primed for buyback magic."
-)
+
+def quote_day(quote):
+    """Trading day of an FMP quote (from its unix timestamp), or None"""
+    timestamp = quote.get("timestamp")
+    return pd.Timestamp(timestamp, unit="s").normalize() if timestamp else None
+
+
+def skip_up_to_date(tickers, output_dir):
+    """
+    Incremental runs: one batched quote call per 50 tickers instead of eight
+    per-ticker calls for tickers with nothing new. A ticker whose stored bars
+    already reach its latest quote's day is dropped. Returns (tickers to
+    run, tickers up to date, calls spent).
+    """
+    calls_before = client.call_count
+    quotes = fetch_quotes(tickers)
+    calls = client.call_count - calls_before
+
+    run, current = [], []
+    for ticker in tickers:
+        latest = quote_day(quotes.get(ticker, {}))
+        stored = last_stored_date(output_dir, ticker)
+        if latest is not None and stored is not None and stored >= latest:
+            current.append(ticker)
+        else:
+            run.append(ticker)
+
+    if current:
+        print(f"💤 {len(current)} tickers up to date ({calls} batched quote calls)\n")
+    return run, current, calls
+
+
+def run_pipeline(tickers, options, workers=1, allowance=None):
+    """
+    Run every ticker and return (summaries in the given order, calls made
+    outside any ticker, endpoints those calls refreshed per ticker)
+    """
+    os.makedirs(options["output_dir"], exist_ok=True)
+
+    bucket = None
+    if workers > 1 and options["rate"] and options["rate"] > 0:
+        bucket = SharedTokenBucket(options["rate"])
+
+    init_client(options, bucket, allowance)
+
+    order = tickers
+    summaries = {}
+    quote_calls = 0
+    if options["incremental"]:
+        tickers, current, quote_calls = skip_up_to_date(tickers, options["output_dir"])
+        summaries = {t: skipped_summary(t, "up-to-date") for t in current}
+
+    prefetched, batch_calls = prefetch_profiles(tickers)
+    batch_calls += quote_calls
+
+    if workers <= 1:
+        # In-process: queue every ticker's requests up front so the thread
+        # pool stays busy while earlier tickers are merged and written
+        pending = {ticker: start_ticker(ticker, options) for ticker in tickers}
+        for ticker in tickers:
+            summaries[ticker] = finish_ticker(ticker, options, *pending.pop(ticker))
+        client.shutdown()
+        return [summaries[ticker] for ticker in order], batch_calls, prefetched
+
+    client.shutdown()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_client, initargs=(options, bucket, allowance)
+    ) as pool:
+        futures = {
+            pool.submit(process_ticker, ticker, options): ticker for ticker in tickers
+        }
+        for future in as_completed(futures):
+            summaries[futures[future]] = future.result()
+
+    return [summaries[ticker] for ticker in order], batch_calls, prefetched
+
+
+def skipped_summary(ticker, status):
+    return {
+        "ticker": ticker,
+        "status": status,
+        "rows": 0,
+        "cols": 0,
+        "calls": 0,
+        "cached": 0,
+        "refreshed": [],
+        "elapsed": 0.0,
+    }
+
+
+def print_summary(summaries, output_dir, ledger=None, batch_calls=0):
+    print("\n" + "=" * 60)
+    print(f"{'Ticker':<8}{'Status':<12}{'Rows':>7}{'Cols':>6}{'Calls':>7}{'Cached':>8}{'Secs':>8}")
+    for row in summaries:
+        print(
+            f"{row['ticker']:<8}{row['status']:<12}{row['rows']:>7}{row['cols']:>6}"
+            f"{row['calls']:>7}{row['cached']:>8}{row['elapsed']:>8.2f}"
+        )
+    print("=" * 60)
+
+    calls = batch_calls + sum(row["calls"] for row in summaries)
+    cached = sum(row["cached"] for row in summaries)
+    spent = f"{ledger.calls}/{ledger.daily_limit} today" if ledger else f"{calls}"
+    print(
+        f"Total calls: {calls} ({spent}, +{cached} cached) | Data in '{output_dir}' – FCF, shares, ROE primed for buyback magic."
+    )
+
+
+def load_universe(path):
+    """Symbols from a file: one per line or comma/space separated, # comments"""
+    tickers = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            for symbol in line.replace(",", " ").split():
+                symbol = symbol.strip().upper()
+                if symbol and symbol not in tickers:
+                    tickers.append(symbol)
+    return tickers
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="FMP free-tier ingestion pipeline")
+    parser.add_argument("--universe", help="file of ticker symbols")
+    parser.add_argument("--tickers", nargs="+", help="symbols (overrides --universe)")
+    parser.add_argument("--start", default=DEFAULT_START, help="YYYY-MM-DD")
+    parser.add_argument("--end", default=DEFAULT_END, help="YYYY-MM-DD")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="processes (1 = run in-process)"
+    )
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--incremental", action="store_true", default=INCREMENTAL)
+    parser.add_argument("--offline", action="store_true", default=OFFLINE)
+    parser.add_argument("--daily-limit", type=int, default=DAILY_CALL_LIMIT)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="run every ticker, not just stale ones (still capped by the budget)",
+    )
+    parser.add_argument("--summary-json", help="write per-ticker summaries here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.tickers:
+        tickers = [t.upper() for t in args.tickers]
+    elif args.universe:
+        tickers = load_universe(args.universe)
+    else:
+        tickers = DEFAULT_TICKERS
+
+    options = {
+        "base_url": BASE_URL,
+        "rate": REQUESTS_PER_SECOND,
+        "fetch_threads": MAX_WORKERS,
+        "cache_dir": CACHE_DIR,
+        "cache_max_mb": CACHE_MAX_MB,
+        "offline": args.offline,
+        "output_dir": args.output_dir,
+        "start_date": args.start,
+        "end_date": args.end,
+        "incremental": args.incremental,
+        "filing_lag_days": FILING_LAG_DAYS,
+    }
+
+    print(
+        f"🔥 Free-tier FMP fetch v2: {len(tickers)} tickers (stable endpoints, EOD prices, annual funds)"
+    )
+    print(f"Range: {args.start} to {args.end} | {args.workers} worker(s)\n")
+
+    # Offline runs never touch the API, so there is nothing to budget
+    ledger = None
+    allowance = None
+    skipped = []
+    if not args.offline:
+        ledger = BudgetLedger(BUDGET_FILE, args.daily_limit)
+        allowance = CallAllowance(ledger.remaining())
+
+        if not args.force:
+            planned, deferred, fresh = plan_refresh(ledger, tickers)
+            tickers = [ticker for ticker, _ in planned]
+            skipped = [skipped_summary(t, "deferred") for t in deferred]
+            skipped += [skipped_summary(t, "fresh") for t in fresh]
+
+            print(
+                f"📅 Budget: {ledger.remaining()}/{ledger.daily_limit} calls left today | "
+                f"{len(planned)} planned (~{sum(cost for _, cost in planned)} calls), "
+                f"{len(deferred)} deferred, {len(fresh)} fresh\n"
+            )
+
+    summaries, batch_calls, prefetched = [], 0, {}
+    if tickers:
+        summaries, batch_calls, prefetched = run_pipeline(
+            tickers, options, args.workers, allowance
+        )
+
+    if ledger:
+        ledger.spend(batch_calls)
+        for ticker, endpoints in prefetched.items():
+            ledger.record(ticker, endpoints)
+        for row in summaries:
+            ledger.spend(row["calls"])
+            ledger.record(row["ticker"], row["refreshed"])
+        ledger.save()
+
+    summaries += skipped
+    print_summary(summaries, args.output_dir, ledger, batch_calls)
+
+    if args.summary_json:
+        with open(args.summary_json, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, indent=2)
+
+    return summaries
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Single-file model bundle written by training (index.py) and loaded by the web
+app's StockPredictor, replacing model.pkl + scaler.pkl + columns.pkl.
+
+Layout of {alg}/model.bundle:
+
+    magic (8) | format version (u32) | header length (u32) | sha256 (32)
+    header    JSON: columns, metadata, model kind, array offsets/dtypes/shapes
+    arrays    raw little-endian, each 64-byte aligned
+
+The checksum covers the header and the arrays; its first 16 hex digits are
+the bundle's version, which identifies the exact model in stored scores.
+Arrays are opened with np.memmap, so loading costs the same for any model
+size and every worker process maps the same pages. Linear models (LinearRegression, Ridge, Lasso,
+SGDRegressor) are stored as coefficients and predicted with one matmul; any
+other estimator is kept as a pickled blob inside the bundle. The file is
+written to a temp name and renamed, so a half-written bundle is never seen.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import struct
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+
+BUNDLE_FILE = "model.bundle"
+LEGACY_FILES = ("model.pkl", "scaler.pkl", "columns.pkl")
+
+MAGIC = b"DILBNDL\0"
+FORMAT_VERSION = 1
+PREFIX = struct.Struct("<8sII32s")
+ALIGN = 64
+
+
+class BundleError(ValueError):
+    """Bundle is missing, truncated, corrupt or of an unknown version."""
+
+
+def _pad(n):
+    return -n % ALIGN
+
+
+class ModelBundle:
+    """Scaler statistics, column order and estimator, ready to predict."""
+
+    def __init__(
+        self,
+        columns,
+        mean,
+        scale,
+        coef=None,
+        intercept=0.0,
+        estimator=None,
+        metadata=None,
+        path=None,
+        version=None,
+    ):
+        self.columns = list(columns)
+        self.mean = mean
+        self.scale = scale
+        self.coef = coef
+        self.intercept = intercept
+        self.estimator = estimator
+        self.metadata = metadata or {}
+        self.path = path
+        # None until saved or loaded; legacy pickles have no checksum
+        self.version = version
+
+    @classmethod
+    def from_fitted(cls, model, scaler, columns, metadata=None):
+        """Bundle a fitted estimator and StandardScaler"""
+        mean = getattr(scaler, "mean_", None)
+        scale = getattr(scaler, "scale_", None)
+        n = len(columns)
+        mean = np.zeros(n) if mean is None else mean
+        scale = np.ones(n) if scale is None else scale
+
+        coef = getattr(model, "coef_", None)
+        if coef is not None and np.ndim(coef) == 1:
+            return cls(
+                columns,
+                mean,
+                scale,
+                coef=np.asarray(coef, dtype="float64"),
+                intercept=float(np.ravel(model.intercept_)[0]),
+                metadata=metadata,
+            )
+        return cls(columns, mean, scale, estimator=model, metadata=metadata)
+
+    @property
+    def kind(self):
+        return "pickle" if self.estimator is not None else "linear"
+
+    def transform(self, X):
+        return (np.asarray(X, dtype="float64") - self.mean) / self.scale
+
+    def predict(self, X):
+        """Predictions for rows of X, already in `columns` order"""
+        X_scaled = self.transform(X)
+        if self.estimator is not None:
+            return self.estimator.predict(X_scaled)
+        return X_scaled @ self.coef + self.intercept
+
+    # ----- write -----
+    def save(self, path):
+        arrays = {
+            "mean": np.asarray(self.mean, dtype="<f8"),
+            "scale": np.asarray(self.scale, dtype="<f8"),
+        }
+        if self.estimator is not None:
+            blob = pickle.dumps(self.estimator, protocol=pickle.HIGHEST_PROTOCOL)
+            arrays["estimator"] = np.frombuffer(blob, dtype="u1")
+        else:
+            arrays["coef"] = np.asarray(self.coef, dtype="<f8")
+
+        specs, offset = {}, 0
+        for name, array in arrays.items():
+            specs[name] = {
+                "offset": offset,
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+            }
+            offset += array.nbytes + _pad(array.nbytes)
+
+        header = {
+            "kind": self.kind,
+            "columns": self.columns,
+            "intercept": self.intercept,
+            "metadata": self.metadata,
+            "arrays": specs,
+        }
+        header = json.dumps(header, default=str).encode("utf-8")
+        header += b" " * _pad(PREFIX.size + len(header))
+
+        payload = b"".join(
+            array.tobytes() + b"\0" * _pad(array.nbytes) for array in arrays.values()
+        )
+        digest = hashlib.sha256(header + payload).digest()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(PREFIX.pack(MAGIC, FORMAT_VERSION, len(header), digest))
+            f.write(header)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self.path = path
+        self.version = version_of(digest)
+        return path
+
+
+def version_of(digest):
+    return digest.hex()[:16]
+
+
+def save_bundle(path, model, scaler, columns, metadata=None):
+    """Write model + scaler + columns (+ metadata) as one bundle at `path`"""
+    metadata = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "estimator": type(model).__name__,
+        **(metadata or {}),
+    }
+    return ModelBundle.from_fitted(model, scaler, columns, metadata).save(path)
+
+
+def load_bundle(path, verify=True):
+    """Memory-map a bundle; `verify` checks the checksum first"""
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            magic, version, header_len, digest = PREFIX.unpack(f.read(PREFIX.size))
+            header_bytes = f.read(header_len)
+    except (OSError, struct.error) as e:
+        raise BundleError(f"Cannot read model bundle {path}: {e}") from e
+
+    if magic != MAGIC:
+        raise BundleError(f"{path} is not a model bundle")
+    if version != FORMAT_VERSION:
+        raise BundleError(f"{path} has format {version}, expected {FORMAT_VERSION}")
+    if len(header_bytes) != header_len:
+        raise BundleError(f"{path} is truncated")
+
+    header = json.loads(header_bytes)
+    start = PREFIX.size + header_len
+    data = np.memmap(path, dtype="u1", mode="r", offset=start) if size > start else b""
+
+    if verify:
+        check = hashlib.sha256(header_bytes)
+        check.update(memoryview(data))
+        if check.digest() != digest:
+            raise BundleError(f"{path} failed its checksum")
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        end = spec["offset"] + count * dtype.itemsize
+        if end > len(data):
+            raise BundleError(f"{path} is truncated")
+        arrays[name] = (
+            data[spec["offset"] : end].view(dtype).reshape(spec["shape"])
+        )
+
+    estimator = None
+    if header["kind"] == "pickle":
+        estimator = pickle.loads(arrays["estimator"].tobytes())
+
+    return ModelBundle(
+        header["columns"],
+        arrays["mean"],
+        arrays["scale"],
+        coef=arrays.get("coef"),
+        intercept=header["intercept"],
+        estimator=estimator,
+        metadata=header["metadata"],
+        path=path,
+        version=version_of(digest),
+    )
+
+
+def load_model(alg_path="alg", verify=True):
+    """
+    The bundle in `alg_path`, or a bundle built from the legacy three pickles
+    when a model was trained before bundles existed
+    """
+    path = os.path.join(alg_path, BUNDLE_FILE)
+    if os.path.exists(path):
+        return load_bundle(path, verify)
+
+    legacy = [os.path.join(alg_path, name) for name in LEGACY_FILES]
+    if not all(os.path.exists(p) for p in legacy):
+        raise BundleError(f"No {BUNDLE_FILE} (or legacy pickles) in {alg_path}")
+
+    print(f"⚠ Loading legacy pickles from {alg_path}; retrain to write a bundle")
+    model, scaler, columns = (joblib.load(p) for p in legacy)
+    return ModelBundle.from_fitted(model, scaler, columns, {"legacy": True})
@@ -0,0 +1,179 @@
+"""
+Versioned model registry in the alg directory:
+
+    alg/versions/{version}/model.bundle   every published bundle
+    alg/CURRENT                           the version the web app serves
+    alg/CANDIDATE                         optional, shadow-scored next to it
+
+A version is the bundle's checksum prefix (model_bundle.py). Training
+(index.py) saves a bundle, publishes it under its version and then points
+CURRENT (or CANDIDATE) at it. A pointer is a one-line file replaced with
+os.replace once its bundle has passed its checksum, so readers only ever see
+a complete, verified model. Running web workers poll the pointers and swap
+models in the background (app/live_model.py). Without a CURRENT pointer
+(trees from before the registry), alg/model.bundle or the legacy pickles are
+served.
+
+    python model_registry.py list alg
+    python model_registry.py promote alg VERSION      # also rolls back
+    python model_registry.py candidate alg [VERSION]  # no VERSION: clear
+    python model_registry.py prune alg --keep 5
+"""
+
+import argparse
+import os
+import shutil
+
+from model_bundle import BUNDLE_FILE, BundleError, load_bundle, load_model
+
+VERSIONS_DIR = "versions"
+CURRENT = "CURRENT"
+CANDIDATE = "CANDIDATE"
+POINTERS = [CURRENT, CANDIDATE]
+
+
+# ===== LAYOUT =====
+def bundle_path(alg_path, version):
+    return os.path.join(alg_path, VERSIONS_DIR, version, BUNDLE_FILE)
+
+
+def read_pointer(alg_path, name=CURRENT):
+    """Version a pointer names, None if it isn't set"""
+    try:
+        with open(os.path.join(alg_path, name)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_pointer(alg_path, version, name=CURRENT):
+    """Atomically point `name` at `version`, after verifying its bundle"""
+    load_bundle(bundle_path(alg_path, version))
+
+    path = os.path.join(alg_path, name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(f"{version}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def clear_pointer(alg_path, name):
+    try:
+        os.remove(os.path.join(alg_path, name))
+    except FileNotFoundError:
+        pass
+
+
+# ===== PUBLISH / LOAD =====
+def publish(alg_path, path, pointer=CURRENT):
+    """
+    Move the bundle at `path` into the registry and point `pointer` at it
+    (None: publish only). Returns its version.
+    """
+    version = load_bundle(path).version
+    target = bundle_path(alg_path, version)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(path, target)
+    if pointer:
+        write_pointer(alg_path, version, pointer)
+    return version
+
+
+def load_pointed(alg_path, name=CURRENT):
+    """
+    The bundle `name` points at. Without a CURRENT pointer this is the
+    pre-registry alg/model.bundle (or legacy pickles); without a CANDIDATE
+    pointer it is None.
+    """
+    version = read_pointer(alg_path, name)
+    if version is not None:
+        return load_bundle(bundle_path(alg_path, version))
+    if name == CURRENT:
+        return load_model(alg_path)
+    return None
+
+
+def load_current(alg_path="alg"):
+    return load_pointed(alg_path, CURRENT)
+
+
+# ===== MAINTENANCE =====
+def list_versions(alg_path):
+    """(version, metadata) of every published bundle, oldest first"""
+    root = os.path.join(alg_path, VERSIONS_DIR)
+    if not os.path.isdir(root):
+        return []
+
+    found = []
+    for version in os.listdir(root):
+        try:
+            bundle = load_bundle(bundle_path(alg_path, version), verify=False)
+        except BundleError:
+            continue
+        found.append((version, bundle.metadata))
+    return sorted(found, key=lambda item: item[1].get("created", ""))
+
+
+def prune(alg_path, keep=5):
+    """Delete all but the newest `keep` versions; pointed-to ones always stay"""
+    pinned = {read_pointer(alg_path, name) for name in POINTERS}
+    versions = [version for version, _ in list_versions(alg_path)]
+    removed = [v for v in versions[: max(len(versions) - keep, 0)] if v not in pinned]
+    for version in removed:
+        shutil.rmtree(os.path.dirname(bundle_path(alg_path, version)))
+    return removed
+
+
+# ======================================================
+# MAIN SCRIPT
+# ======================================================
+def main():
+    parser = argparse.ArgumentParser(description="Manage published models")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    listing = commands.add_parser("list", help="published versions")
+    listing.add_argument("alg")
+
+    promote = commands.add_parser("promote", help="serve VERSION (or roll back)")
+    promote.add_argument("alg")
+    promote.add_argument("version")
+
+    candidate = commands.add_parser("candidate", help="shadow-score VERSION")
+    candidate.add_argument("alg")
+    candidate.add_argument("version", nargs="?")
+
+    pruning = commands.add_parser("prune", help="delete old versions")
+    pruning.add_argument("alg")
+    pruning.add_argument("--keep", type=int, default=5)
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        pointed = {read_pointer(args.alg, name): name for name in POINTERS}
+        for version, metadata in list_versions(args.alg):
+            score = metadata.get("r2", metadata.get("mean_r2"))
+            score = f"R² {score:.4f}" if isinstance(score, float) else ""
+            print(
+                f"{version}  {metadata.get('created', '?'):<25} "
+                f"{metadata.get('estimator', '?'):<30} {score:<10} "
+                f"{pointed.get(version, '')}"
+            )
+    elif args.command == "promote":
+        write_pointer(args.alg, args.version, CURRENT)
+        print(f"✓ Serving {args.version}")
+    elif args.command == "candidate":
+        if args.version:
+            write_pointer(args.alg, args.version, CANDIDATE)
+            print(f"✓ Shadow-scoring {args.version}")
+        else:
+            clear_pointer(args.alg, CANDIDATE)
+            print("✓ Candidate cleared")
+    elif args.command == "prune":
+        removed = prune(args.alg, args.keep)
+        print(f"✓ Removed {len(removed)} old versions")
+
+
+if __name__ == "__main__":
+    main()
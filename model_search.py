@@ -0,0 +1,154 @@
+"""
+Cross-validated model search for DilutionModel (index.py).
+
+Candidates are fitted on time-aware folds instead of one random split:
+
+    walk-forward  train on every date before a cutoff, test on the next block
+    ticker        GroupKFold over tickers, so a company is never in both sides
+
+Every (candidate, fold) fit runs as its own joblib task across cores. The
+feature matrix is built once and shared with the workers read-only (joblib
+memory-maps large arrays instead of pickling a copy per task). Each fit is
+its own make_pipeline(StandardScaler(), estimator), fitted on the fold's
+training rows only, and with a `target` function (fold_target) the label is
+scaled per fold too, so test rows never inform either scaling.
+"""
+
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.metrics import r2_score
+from sklearn.model_selection import GroupKFold, TimeSeriesSplit
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+SPLITTERS = ["walk-forward", "ticker"]
+
+
+def candidate_grid():
+    """name -> unfitted estimator; the current LinearRegression is the baseline"""
+    grid = {"linear": LinearRegression()}
+    for alpha in [0.1, 1.0, 10.0]:
+        grid[f"ridge_a{alpha:g}"] = Ridge(alpha=alpha)
+    for alpha in [1e-4, 1e-3, 1e-2]:
+        grid[f"lasso_a{alpha:g}"] = Lasso(alpha=alpha, max_iter=5000)
+    for depth in [3, 6]:
+        grid[f"gbr_d{depth}"] = HistGradientBoostingRegressor(
+            max_depth=depth, max_iter=200, random_state=0
+        )
+    return grid
+
+
+# ===== SPLITS =====
+def walk_forward_splits(dates, n_splits=5):
+    """(train rows, test rows) per fold; folds cut on whole dates, in order"""
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+    unique = np.unique(dates)
+    folds = []
+    for train_dates, test_dates in TimeSeriesSplit(n_splits).split(unique):
+        cutoff = unique[test_dates[0]]
+        end = unique[test_dates[-1]]
+        train_rows = np.flatnonzero(dates < cutoff)
+        test_rows = np.flatnonzero((dates >= cutoff) & (dates <= end))
+        folds.append((train_rows, test_rows))
+    return folds
+
+
+def ticker_splits(tickers, n_splits=5):
+    """(train rows, test rows) per fold with each ticker in exactly one test fold"""
+    tickers = np.asarray(tickers)
+    n_splits = min(n_splits, len(np.unique(tickers)))
+    return list(GroupKFold(n_splits).split(tickers, groups=tickers))
+
+
+def make_splits(meta, splitter="walk-forward", n_splits=5):
+    if splitter == "walk-forward":
+        return walk_forward_splits(meta["date"], n_splits)
+    if splitter == "ticker":
+        return ticker_splits(meta["ticker"], n_splits)
+    raise ValueError(f"Unknown splitter {splitter!r}, expected one of {SPLITTERS}")
+
+
+# ===== SEARCH =====
+def fold_target(raw, train_rows):
+    """
+    `raw` over the largest |raw| of the training rows, clipped to [-1, 1]:
+    DilutionModel.compute_target's scaling, without the test rows' scale
+    """
+    max_abs = np.abs(raw[train_rows]).max() if len(train_rows) else 0.0
+    if not max_abs > 0:
+        max_abs = 1.0  # all-zero (or empty) training rows
+    return np.clip(raw / max_abs, -1, 1)
+
+
+def fit_fold(name, estimator, X, y, fold, train_rows, test_rows, target=None):
+    """
+    Fit one candidate (scaler included) on one fold; X and y are shared, only
+    rows are indexed. `target(y, train_rows)` turns y into the fold's label.
+    """
+    if target is not None:
+        y = target(y, train_rows)
+    model = make_pipeline(StandardScaler(), clone(estimator))
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        # An unconverged lasso just scores worse; the fold table shows it
+        warnings.simplefilter("ignore", ConvergenceWarning)
+        model.fit(X[train_rows], y[train_rows])
+    fit_seconds = time.perf_counter() - start
+
+    score = r2_score(y[test_rows], model.predict(X[test_rows]))
+    return {
+        "model": name,
+        "fold": fold,
+        "r2": score,
+        "fit_seconds": fit_seconds,
+        "n_train": len(train_rows),
+        "n_test": len(test_rows),
+    }
+
+
+def search(X, y, splits, candidates=None, n_jobs=-1, target=None):
+    """
+    Per-fold results for every candidate, fitted in parallel. With `target`
+    (e.g. fold_target), y is the raw target and each fold derives its label
+    from its own training rows.
+    """
+    candidates = candidates or candidate_grid()
+    X = np.ascontiguousarray(X, dtype="float64")
+    y = np.ascontiguousarray(y, dtype="float64")
+
+    rows = Parallel(n_jobs=n_jobs)(
+        delayed(fit_fold)(name, estimator, X, y, fold, train_rows, test_rows, target)
+        for name, estimator in candidates.items()
+        for fold, (train_rows, test_rows) in enumerate(splits)
+    )
+    return pd.DataFrame(rows)
+
+
+def summarize(results):
+    """One row per candidate, best mean R² first"""
+    summary = results.groupby("model").agg(
+        mean_r2=("r2", "mean"),
+        std_r2=("r2", "std"),
+        min_r2=("r2", "min"),
+        fit_seconds=("fit_seconds", "sum"),
+    )
+    return summary.sort_values("mean_r2", ascending=False)
+
+
+def print_results(results, summary):
+    print("=====================================")
+    print("PER-FOLD R²")
+    folds = results.pivot(index="model", columns="fold", values="r2")
+    folds.columns = [f"fold{fold}" for fold in folds.columns]
+    print(folds.loc[summary.index].round(4).to_string())
+    print("-------------------------------------")
+    print(summary.round(4).to_string())
+    print("=====================================")
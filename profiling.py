@@ -0,0 +1,370 @@
+"""
+Stage-level instrumentation for the training pipeline (index.py).
+
+Every stage records its calls, wall and CPU seconds, rows/columns in and out,
+how much resident memory it added (RSS at exit minus RSS at entry, the
+largest over its calls) and the process's RSS high-water mark when it ended.
+Repeated calls (one per file) add up into one entry, so a stage run on a pool
+can show more time than the stage around it. Stages nest and are named by
+path ("load/parse_csv"), so reports from different runs line up stage by
+stage:
+
+    python -m profiling before.json after.json    # per-stage deltas
+
+CPU time and RSS are process-wide: time.process_time() counts every thread,
+so CPU burnt on pool threads (file reads, joblib, BLAS) while a stage is open
+is charged to that stage, and to each stage open in parallel on another
+thread. The same goes for memory those threads allocate. Read cpu_s and
+rss_delta_mb of concurrent stages as "while this stage ran", not "by it".
+
+All of that costs microseconds per call, so it stays on. trace_memory=True
+adds each stage's own peak from tracemalloc (Python and NumPy allocations,
+not Arrow's pool), but that roughly doubles the run time, so it is opt-in.
+"""
+
+import cProfile
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, max RSS is reported as None
+    resource = None
+
+# 2: max_rss_mb became process_max_rss_mb, rss_delta_mb added
+REPORT_VERSION = 2
+MB = 1024 * 1024
+
+# Summed over calls; the rest are maxima
+SUMMED = ["calls", "wall_s", "cpu_s", "rows_in", "rows_out"]
+# ru_maxrss is in KiB on Linux, bytes on macOS
+MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def max_rss_mb():
+    """Resident-memory high-water mark of this process so far (None: unknown)"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * MAXRSS_UNIT / MB
+
+
+def rss_mb():
+    """Current resident memory of this process (None: no /proc, e.g. macOS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / MB
+
+
+def shape(obj):
+    """(rows, cols) of a frame/array/series, (None, None) for anything else"""
+    dims = getattr(obj, "shape", None)
+    if not dims:
+        return None, None
+    return dims[0], dims[1] if len(dims) > 1 else 1
+
+
+class StageHandle:
+    """Yielded by StageProfiler.stage(); call output() with the stage result"""
+
+    def __init__(self, record):
+        self.record = record
+
+    def output(self, obj):
+        rows, cols = shape(obj)
+        if rows is not None:
+            self.record["rows_out"] += rows
+            self.record["cols_out"] = max(self.record["cols_out"], cols)
+        return obj
+
+
+class StageProfiler:
+    """Accumulates per-stage timings, shapes and memory peaks."""
+
+    def __init__(self, enabled=True, trace_memory=False, base=""):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.base = base
+        self.records = {}
+        self._tracing = False
+        self.started = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    # ----- pickling (process pool workers get a copy) -----
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_local"], state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def child(self):
+        """Empty profiler for a pool process, nested under the current stage"""
+        return StageProfiler(self.enabled, self.trace_memory, self.current_path())
+
+    def nested(self, fn):
+        """`fn` recording its stages under the current one from pool threads"""
+        parent = self.current_path()
+
+        def run(*args):
+            stack = self._stack()
+            if stack:
+                return fn(*args)
+            stack.append([parent, 0])
+            try:
+                return fn(*args)
+            finally:
+                stack.pop()
+
+        return run
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def current_path(self):
+        stack = self._stack()
+        return stack[-1][0] if stack else self.base
+
+    def _record(self, path):
+        with self._lock:
+            if path not in self.records:
+                self.records[path] = {
+                    "calls": 0,
+                    "wall_s": 0.0,
+                    "cpu_s": 0.0,
+                    "rows_in": 0,
+                    "cols_in": 0,
+                    "rows_out": 0,
+                    "cols_out": 0,
+                    "rss_delta_mb": None,
+                    "process_max_rss_mb": None,
+                    "peak_mb": None,
+                }
+            return self.records[path]
+
+    def _memory_peak(self):
+        if not self.trace_memory:
+            return 0
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        return tracemalloc.get_traced_memory()[1]
+
+    @contextmanager
+    def stage(self, name, data=None):
+        """
+        Time the block as `name` under the current stage; `data` is its input.
+        Call handle.output(result) to record the output shape.
+        """
+        if not self.enabled:
+            yield StageHandle({"rows_out": 0, "cols_out": 0})
+            return
+
+        parent = self.current_path()
+        path = f"{parent}/{name}" if parent else name
+        record = self._record(path)
+        rows, cols = shape(data)
+        if rows is not None:
+            record["rows_in"] += rows
+            record["cols_in"] = max(record["cols_in"], cols)
+
+        # tracemalloc keeps one peak: hand it to the open stages, then restart it
+        stack = self._stack()
+        peak = self._memory_peak()
+        for frame in stack:
+            frame[1] = max(frame[1], peak)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+
+        frame = [path, 0]
+        stack.append(frame)
+        wall, cpu, rss = time.perf_counter(), time.process_time(), rss_mb()
+        try:
+            yield StageHandle(record)
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            stack.pop()
+            frame[1] = max(frame[1], self._memory_peak())
+            for outer in stack:
+                outer[1] = max(outer[1], frame[1])
+
+            exit_rss = rss_mb()
+            delta = exit_rss - rss if rss is not None and exit_rss is not None else None
+
+            with self._lock:
+                record["calls"] += 1
+                record["wall_s"] += wall
+                record["cpu_s"] += cpu
+                _keep_max(record, "rss_delta_mb", delta)
+                _keep_max(record, "process_max_rss_mb", max_rss_mb())
+                if self.trace_memory:
+                    _keep_max(record, "peak_mb", frame[1] / MB)
+
+    def close(self):
+        """Stop tracemalloc if this profiler started it"""
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def merge(self, records):
+        """Fold in another profiler's records (e.g. from a pool worker)"""
+        for path, other in records.items():
+            record = self._record(path)
+            with self._lock:
+                for key, value in other.items():
+                    if value is None:
+                        continue
+                    if key in SUMMED:
+                        record[key] += value
+                    else:
+                        _keep_max(record, key, value)
+
+    # ----- report -----
+    def report(self, **meta):
+        """JSON-serialisable report; stages in the order they first ran"""
+        return {
+            "version": REPORT_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "total_wall_s": round(time.perf_counter() - self.started, 6),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "pandas": pd.__version__,
+                "numpy": np.__version__,
+            },
+            "trace_memory": self.trace_memory,
+            "meta": meta,
+            "stages": [
+                {"stage": path, **_rounded(record)}
+                for path, record in self.records.items()
+            ],
+        }
+
+    def write(self, path, **meta):
+        report = self.report(**meta)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+        print(f"✓ Stage report written to {path}")
+        return report
+
+    def print_summary(self):
+        print("=====================================")
+        memory = "traced peak" if self.trace_memory else "RSS added"
+        print(f"STAGE PROFILE (memory: {memory})")
+        for path, record in self.records.items():
+            depth = path.count("/")
+            name = "  " * depth + path.rsplit("/", 1)[-1]
+            memory = record["peak_mb"] if self.trace_memory else record["rss_delta_mb"]
+            memory = f"{memory:8.1f}" if memory is not None else f"{'-':>8}"
+            print(
+                f"  {name:<28} {record['wall_s']:8.3f}s wall "
+                f"{record['cpu_s']:8.3f}s cpu  {memory} MB  "
+                f"×{record['calls']}"
+            )
+        print("=====================================")
+
+
+def _keep_max(record, key, value):
+    """record[key] = max(record[key], value), where None means no value yet"""
+    if value is not None:
+        current = record[key]
+        record[key] = value if current is None else max(current, value)
+
+
+def _rounded(record):
+    return {
+        key: round(value, 6) if isinstance(value, float) else value
+        for key, value in record.items()
+    }
+
+
+@contextmanager
+def cprofile(path):
+    """cProfile the block and dump the stats to `path` (None: do nothing)"""
+    if not path:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+        print(f"✓ cProfile stats written to {path}")
+
+
+# ===== COMPARE REPORTS =====
+def compare(before, after):
+    """
+    Rows of (stage, wall before, wall after, change %, memory before, after).
+    Memory is the traced peak when both runs traced it, else the RSS each
+    stage added (version 1 reports have neither: shown as "-").
+    """
+    traced = before.get("trace_memory") and after.get("trace_memory")
+    memory = "peak_mb" if traced else "rss_delta_mb"
+
+    old = {stage["stage"]: stage for stage in before["stages"]}
+    new = {stage["stage"]: stage for stage in after["stages"]}
+    rows = []
+    for path in list(old) + [path for path in new if path not in old]:
+        a, b = old.get(path, {}), new.get(path, {})
+        wall_a, wall_b = a.get("wall_s"), b.get("wall_s")
+        change = None
+        if wall_a and wall_b is not None:
+            change = 100 * (wall_b - wall_a) / wall_a
+        rows.append((path, wall_a, wall_b, change, a.get(memory), b.get(memory)))
+    return rows
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: python -m profiling BEFORE.json AFTER.json")
+        return 2
+
+    reports = []
+    for path in argv:
+        with open(path) as f:
+            reports.append(json.load(f))
+
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else "-"
+
+    print(
+        f"{'stage':<36} {'before s':>10} {'after s':>10} {'change':>8} "
+        f"{'memory MB':>17}"
+    )
+    for path, wall_a, wall_b, change, memory_a, memory_b in compare(*reports):
+        change = f"{change:+.1f}%" if change is not None else "-"
+        print(
+            f"{path:<36} {fmt(wall_a, '10.3f'):>10} {fmt(wall_b, '10.3f'):>10} "
+            f"{change:>8} {fmt(memory_a, '8.1f'):>8}→{fmt(memory_b, '.1f'):<8}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
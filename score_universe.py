@@ -0,0 +1,158 @@
+"""
+Heat scores for every ticker in the local store, for the nightly run:
+
+    python score_universe.py                   # every ticker/date
+    python score_universe.py --latest          # latest row per ticker
+    python score_universe.py --data datasets_fmp_free --alg alg \\
+        --out heat_scores.parquet --workers 4
+
+Rows load exactly as for training (DilutionModel): only the model columns
+are decoded, files are read on a worker pool, and engineered features come
+from the feature cache while the files are unchanged, so lags and changes
+see each ticker's whole history. Rows with a missing or non-finite model
+input are dropped, as in training, rather than scored on zero-filled values.
+The rest are scored in one vectorized predict (in this process: it is
+negligible next to reading) and written as Parquet:
+
+    ticker | date | heat | model_version | input_hash
+
+model_version is the bundle's version and input_hash a hash of the row's
+model inputs, so loaders (the web app's heat_scores table) can skip rows
+that haven't changed. The model's metadata goes in the schema metadata.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from index import DilutionModel
+from model_registry import load_current
+from scoring import complete_rows, model_matrix
+
+OUTPUT_FILE = "heat_scores.parquet"
+METADATA_KEY = b"heat_scores"
+
+
+# ======================================================
+# SCORING
+# ======================================================
+def latest_rows(df):
+    """Each ticker's most recent row"""
+    df = df.sort_values(["ticker", "date"], kind="stable")
+    return df.groupby("ticker", sort=False).tail(1)
+
+
+def input_hashes(X):
+    """16-hex-digit hash of each row of model inputs"""
+    X = np.ascontiguousarray(X, dtype="<f8")
+    return [hashlib.blake2b(row.tobytes(), digest_size=8).hexdigest() for row in X]
+
+
+def score_universe(
+    data_path, alg_path="alg", latest=False, workers=None, compact=False
+):
+    """(scores frame, bundle) for every stored row, or each ticker's latest"""
+    bundle = load_current(alg_path)
+    dm = DilutionModel(data_path, alg_path, compact=compact)
+
+    trained_on = bundle.metadata.get("pipeline_version")
+    if trained_on and trained_on != dm.feature_cache.version:
+        print("⚠ Features changed since this model was trained; retrain it")
+
+    # Features need each ticker's full history, so select rows afterwards
+    df = dm.load_financial_data(workers)
+    if latest:
+        df = latest_rows(df)
+
+    X = model_matrix(bundle, df)
+    complete = complete_rows(X)
+    if not complete.all():
+        print(f"↷ Skipping {(~complete).sum():,} rows with incomplete model inputs")
+        df, X = df[complete], X[complete]
+
+    scores = pd.DataFrame(
+        {
+            "ticker": df["ticker"].astype(str).to_numpy(),
+            "date": pd.to_datetime(df["date"]).to_numpy(),
+            "heat": bundle.predict(X),
+            "model_version": bundle.version or "legacy",
+            "input_hash": input_hashes(X),
+        }
+    )
+    return scores, bundle
+
+
+# ======================================================
+# OUTPUT
+# ======================================================
+def write_scores(scores, path, metadata):
+    """Atomically write `scores` as Parquet, `metadata` in the schema"""
+    table = pa.Table.from_pandas(scores, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {
+            **(table.schema.metadata or {}),
+            METADATA_KEY: json.dumps(metadata, default=str).encode("utf-8"),
+        }
+    )
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def read_scores(path):
+    """(scores, metadata) written by write_scores"""
+    table = pq.read_table(path)
+    metadata = json.loads((table.schema.metadata or {}).get(METADATA_KEY, b"{}"))
+    return table.to_pandas(), metadata
+
+
+# ======================================================
+# MAIN SCRIPT
+# ======================================================
+def main():
+    parser = argparse.ArgumentParser(description="Score every stored ticker")
+    parser.add_argument("--data", default="./datasets_fmp_free/", help="data store")
+    parser.add_argument("--alg", default="alg", help="model registry directory")
+    parser.add_argument("--out", default=OUTPUT_FILE, help="Parquet output path")
+    parser.add_argument(
+        "--latest", action="store_true", help="only each ticker's latest row"
+    )
+    parser.add_argument("--workers", type=int, help="file reading processes")
+    parser.add_argument(
+        "--compact", action="store_true", help="load files in compact dtypes"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    scores, bundle = score_universe(
+        args.data, args.alg, args.latest, args.workers, args.compact
+    )
+    write_scores(
+        scores,
+        args.out,
+        {
+            "scored": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "data_path": os.path.abspath(args.data),
+            "latest": args.latest,
+            "model": bundle.metadata,
+        },
+    )
+    seconds = time.perf_counter() - start
+    print(
+        f"✓ Scored {len(scores):,} rows ({scores['ticker'].nunique()} tickers) "
+        f"in {seconds:.2f}s → {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Compiled scoring for linear model bundles, used by the web app's
+StockPredictor instead of its pandas path.
+
+The pandas path coerces a frame, runs build_features(), aligns to the
+model's columns (zero-filling missing and non-finite values), scales, and
+predicts. For a linear model and one snapshot per company, that reduces to
+
+    prediction = features(primitives) @ (coef / scale) + bias
+
+features() keeps only the model columns that a snapshot can define (see
+features.snapshot_features). bias absorbs the intercept and the
+(0 - mean) / scale term of every zero-filled column. CompiledScorer works
+all of that out once, at load time, and then scores dicts or NumPy arrays
+of primitives with a few array operations. tests/test_scoring.py checks it
+against the pandas path; to time the two:
+
+    python -m benchmarks.scoring
+
+score_features() is the batch counterpart for rows that already went through
+build_features() with their history (see score_universe.py): any bundle,
+every row in one vectorized predict. Unlike serving, it doesn't zero-fill:
+rows with a missing or non-finite model input get no score, as training
+drops those rows too.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from coercion import coerce_scalar, to_numeric_frame
+from features import PRIMITIVE_INPUTS, base_from_primitives, snapshot_features
+
+
+def primitive_matrix(values):
+    """
+    (rows, len(PRIMITIVE_INPUTS)) float64 matrix from:
+        dict        one company, {primitive: value}; messy values are coerced
+        DataFrame   one row per company, primitive columns by name
+        array       rows already in PRIMITIVE_INPUTS order (1-D: one row)
+    Missing primitives are 0, as in the pandas path.
+    """
+    if isinstance(values, pd.DataFrame):
+        present = [col for col in PRIMITIVE_INPUTS if col in values.columns]
+        frame = to_numeric_frame(values[present])
+        return frame.reindex(columns=PRIMITIVE_INPUTS, fill_value=0).to_numpy()
+
+    if isinstance(values, Mapping):
+        row = [
+            coerce_scalar(values[name]) if name in values else 0.0
+            for name in PRIMITIVE_INPUTS
+        ]
+        return np.array([row], dtype="float64")
+
+    matrix = np.asarray(values, dtype="float64")
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    if matrix.ndim != 2 or matrix.shape[1] != len(PRIMITIVE_INPUTS):
+        raise ValueError(
+            f"Expected rows of {len(PRIMITIVE_INPUTS)} primitives "
+            f"({', '.join(PRIMITIVE_INPUTS)}), got shape {matrix.shape}"
+        )
+    return matrix
+
+
+class CompiledScorer:
+    """A linear ModelBundle with the scaler folded into its coefficients."""
+
+    def __init__(self, bundle):
+        if bundle.kind != "linear":
+            estimator = bundle.metadata.get("estimator", bundle.kind)
+            raise ValueError(f"Only linear bundles compile, not {estimator}")
+
+        weights = np.asarray(bundle.coef) / np.asarray(bundle.scale)
+        self.bias = float(bundle.intercept - weights @ np.asarray(bundle.mean))
+
+        # Model columns a snapshot defines; every other column is always 0.
+        # Only the names matter, so the zero probe's 0/0 warnings are muted
+        zeros = {name: np.zeros(1) for name in PRIMITIVE_INPUTS}
+        with np.errstate(all="ignore"):
+            defined = snapshot_features(base_from_primitives(zeros))
+        index = [i for i, col in enumerate(bundle.columns) if col in defined]
+        self.features = [bundle.columns[i] for i in index]
+        self.weights = np.ascontiguousarray(weights[index])
+
+    def score(self, values):
+        """Predictions for a dict, DataFrame or array of primitives"""
+        primitives = primitive_matrix(values)
+        with np.errstate(all="ignore"):
+            base = base_from_primitives(dict(zip(PRIMITIVE_INPUTS, primitives.T)))
+            derived = snapshot_features(base)
+            columns = [derived[name] for name in self.features]
+        X = np.column_stack(columns) if columns else np.zeros((len(primitives), 0))
+        X[~np.isfinite(X)] = 0.0
+        return X @ self.weights + self.bias
+
+
+# ===== BATCH SCORING =====
+def model_matrix(bundle, df):
+    """`df`'s model columns as float64 rows; missing and non-finite values are NaN"""
+    X = df.reindex(columns=bundle.columns).to_numpy(
+        dtype="float64", na_value=np.nan, copy=True
+    )
+    X[~np.isfinite(X)] = np.nan
+    return X
+
+
+def complete_rows(X):
+    """Mask of rows whose model inputs are all finite (the rows training keeps)"""
+    return np.isfinite(X).all(axis=1)
+
+
+def score_features(bundle, df):
+    """
+    Predictions for engineered rows (build_features() output), in one pass;
+    NaN for rows with incomplete model inputs
+    """
+    X = model_matrix(bundle, df)
+    complete = complete_rows(X)
+    heat = np.full(len(X), np.nan)
+    if complete.any():
+        heat[complete] = bundle.predict(X[complete])
+    return heat
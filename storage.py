@@ -0,0 +1,675 @@
+"""
+Columnar dataset store: one compressed Parquet file per ticker/year partition.
+
+Layout (hive-style, so Arrow tools can read the tree directly):
+
+    {root}/ticker=AAPL/year=2024/part.parquet
+
+Company profiles are a separate dimension table, one versioned snapshot per
+fetch date, stored once per ticker instead of being repeated on every row:
+
+    {root}/_profiles/AAPL.parquet
+
+Writers call write_partition(); readers use read_dataset() with column
+projection and date-range filters so only the needed columns and row groups are
+decoded. Requested profile_* columns are joined in from the snapshots on read.
+Existing {ticker}_{year}.csv trees migrate with:
+
+    python storage.py convert datasets_fmp_free
+
+Every written partition is recorded in the directory's manifest (catalog.py;
+write_partitions() records a whole ticker at once),
+which lets readers prune by date range and columns without opening files.
+An existing tree (Parquet or {ticker}_{year}.csv) is catalogued with:
+
+    python storage.py catalog datasets
+
+Readers take compact=True to shrink frames with compact_frame() (float32 /
+int32 / nullable ints / categoricals); the saving per file is reported by:
+
+    python storage.py compact-report datasets
+"""
+
+import argparse
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+import catalog
+
+PARTITION_FILE = "part.parquet"
+PROFILE_DIR = "_profiles"
+PROFILE_PREFIX = "profile_"
+COMPRESSION = "zstd"
+CSV_PARTITION_RE = re.compile(r"^(?P<ticker>[A-Za-z0-9.\-]+)_(?P<year>\d{4})\.csv$")
+
+# compact_frame(): float64 -> float32 when every value stays within this
+# relative error; text -> category when distinct values <= ratio * rows
+FLOAT32_RTOL = 1e-6
+CATEGORY_MAX_RATIO = 0.5
+INT32_MIN, INT32_MAX = np.iinfo("int32").min, np.iinfo("int32").max
+
+
+# ===== LAYOUT =====
+def partition_path(root, ticker, year):
+    return os.path.join(root, f"ticker={ticker}", f"year={year}", PARTITION_FILE)
+
+
+def list_partitions(root, tickers=None, start=None, end=None, columns=None):
+    """
+    (ticker, year, path) for every stored partition, pruned by ticker and by
+    the years a [start, end] date range can touch. With a manifest, also by
+    exact date range and by holding any of `columns` (profile_* ones come
+    from the profile table, so they never prune). Nothing is opened.
+    """
+    if not os.path.isdir(root):
+        return []
+
+    wanted = {t.upper() for t in tickers} if tickers else None
+    first_year = pd.Timestamp(start).year if start is not None else None
+    last_year = pd.Timestamp(end).year if end is not None else None
+
+    partitions = []
+    for ticker_dir in sorted(os.listdir(root)):
+        if not ticker_dir.startswith("ticker="):
+            continue
+        ticker = ticker_dir[len("ticker=") :]
+        if wanted is not None and ticker not in wanted:
+            continue
+
+        for year_dir in sorted(os.listdir(os.path.join(root, ticker_dir))):
+            if not year_dir.startswith("year="):
+                continue
+            year = int(year_dir[len("year=") :])
+            if first_year is not None and year < first_year:
+                continue
+            if last_year is not None and year > last_year:
+                continue
+
+            path = os.path.join(root, ticker_dir, year_dir, PARTITION_FILE)
+            if os.path.exists(path):
+                partitions.append((ticker, year, path))
+
+    if columns is not None:
+        columns = [c for c in columns if not c.startswith(PROFILE_PREFIX)]
+    return prune(root, partitions, start, end, columns)
+
+
+def list_csv_partitions(root, tickers=None, start=None, end=None, columns=None):
+    """
+    (ticker, year, path) for the {ticker}_{year}.csv files of a legacy tree,
+    pruned like list_partitions(). Other files (data.csv, ...) are ignored.
+    """
+    if not os.path.isdir(root):
+        return []
+
+    wanted = {t.upper() for t in tickers} if tickers else None
+    first_year = pd.Timestamp(start).year if start is not None else None
+    last_year = pd.Timestamp(end).year if end is not None else None
+
+    partitions = []
+    for filename in sorted(os.listdir(root)):
+        match = CSV_PARTITION_RE.match(filename)
+        if not match:
+            continue
+        ticker, year = match["ticker"].upper(), int(match["year"])
+        if wanted is not None and ticker not in wanted:
+            continue
+        if first_year is not None and year < first_year:
+            continue
+        if last_year is not None and year > last_year:
+            continue
+        partitions.append((ticker, year, os.path.join(root, filename)))
+
+    return prune(root, partitions, start, end, columns)
+
+
+def list_all_partitions(root, tickers=None, start=None, end=None, columns=None):
+    """
+    Parquet partitions plus the {ticker}_{year}.csv files no partition has
+    replaced yet, sorted by ticker and year, so a tree that is only partly
+    migrated loses neither kind
+    """
+    partitions = list_partitions(root, tickers, start, end, columns)
+    stored = {(ticker, year) for ticker, year, _ in partitions}
+    partitions += [
+        partition
+        for partition in list_csv_partitions(root, tickers, start, end, columns)
+        if partition[:2] not in stored
+    ]
+    return sorted(partitions, key=lambda partition: partition[:2])
+
+
+def prune(root, partitions, start=None, end=None, columns=None):
+    """Drop partitions the manifest shows are outside [start, end] or `columns`"""
+    if start is None and end is None and not columns:
+        return partitions
+    manifest = catalog.Catalog(root)
+    if not manifest:
+        return partitions
+    return [
+        partition
+        for partition in partitions
+        if manifest.keep(partition[2], start, end, columns)
+    ]
+
+
+def stored_years(root, ticker):
+    """Years with a stored partition for `ticker`, ascending"""
+    return [year for _, year, _ in list_partitions(root, [ticker])]
+
+
+# ===== WRITING =====
+def coerce_types(df):
+    """
+    Give every column a concrete Parquet type: object columns that are fully
+    numeric become numbers, everything else non-string becomes text.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+
+        values = df[col]
+        numeric = pd.to_numeric(values, errors="coerce")
+        if numeric.notna().sum() == values.notna().sum():
+            df[col] = numeric
+            continue
+
+        kind = pd.api.types.infer_dtype(values, skipna=True)
+        if kind not in ("string", "boolean", "empty"):
+            df[col] = values.where(values.isna(), values.astype(str))
+
+    return df
+
+
+def write_partition(df, root, ticker, year, record=True):
+    """
+    Atomically write one ticker/year partition. `df` is indexed by date.
+    record=False leaves the manifest to the caller (see write_partitions).
+    """
+    path = partition_path(root, ticker, year)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    df = coerce_types(df)
+    df.index.name = "date"
+    df.columns = [str(col) for col in df.columns]
+
+    _write_atomic(df, path, index=True)
+    if record:
+        catalog.record(root, {path: catalog.describe(path, ticker, year)})
+    return path
+
+
+def write_partitions(frames, root, ticker):
+    """
+    Write a ticker's {year: df} partitions, then record them all in one
+    manifest update. Returns {year: path}.
+    """
+    paths = {
+        year: write_partition(df, root, ticker, year, record=False)
+        for year, df in frames.items()
+    }
+    entries = {
+        path: catalog.describe(path, ticker, year) for year, path in paths.items()
+    }
+    catalog.record(root, entries)
+    return paths
+
+
+def _write_atomic(df, path, index):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_path, engine="pyarrow", compression=COMPRESSION, index=index)
+    os.replace(tmp_path, path)
+
+
+# ===== COMPACT DTYPES =====
+def compact_column(values):
+    """
+    Smaller array for one non-float column, or None to keep it: int64 that
+    fits -> int32, True/False with gaps -> nullable boolean, repetitive text
+    -> category
+    """
+    dtype = values.dtype
+    if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return None
+
+    if pd.api.types.is_integer_dtype(dtype):
+        if values.notna().any() and (
+            INT32_MIN <= values.min() and values.max() <= INT32_MAX
+        ):
+            nullable = pd.api.types.is_extension_array_dtype(dtype)
+            return values.astype("Int32" if nullable else "int32").array
+        return None
+
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    if kind == "boolean":
+        return values.astype("boolean").array
+    if kind in ("string", "empty") and len(values):
+        codes, uniques = pd.factorize(values)
+        if len(uniques) <= CATEGORY_MAX_RATIO * len(values):
+            return pd.Categorical.from_codes(codes, uniques, validate=False)
+    return None
+
+
+def float_dtypes(data, float_rtol=FLOAT32_RTOL):
+    """
+    Smaller dtype per column of a 2-D float64 array, decided in one pass:
+    integral values -> int32, or nullable Int32 for counts with gaps; other
+    values -> float32 when all stay within float_rtol; else None.
+    """
+    missing = np.isnan(data)
+    filled = np.where(missing, 0.0, data)
+    with np.errstate(over="ignore", invalid="ignore"):
+        narrowed = filled.astype("float32")
+        integral = (
+            (filled == np.round(filled)).all(axis=0)
+            & (filled >= INT32_MIN).all(axis=0)
+            & (filled <= INT32_MAX).all(axis=0)
+        )
+        close = np.isclose(narrowed, filled, rtol=float_rtol, atol=0).all(axis=0)
+
+    dtypes = []
+    for col in range(data.shape[1]):
+        if missing[:, col].all():
+            dtypes.append("float32")
+        elif integral[col]:
+            dtypes.append("Int32" if missing[:, col].any() else "int32")
+        elif close[col]:
+            dtypes.append("float32")
+        else:
+            dtypes.append(None)
+    return dtypes
+
+
+def _is_wide_float(dtype):
+    return pd.api.types.is_float_dtype(dtype) and dtype != np.dtype("float32")
+
+
+def compact_frame(df, float_rtol=FLOAT32_RTOL):
+    """
+    `df` with every column in the smallest dtype that holds it (floats within
+    float_rtol); the index is left as is. float64 columns are checked and
+    cast as one block, so the cost barely grows with column count.
+    """
+    if not df.columns.is_unique:
+        raise ValueError("compact_frame needs unique column names")
+
+    columns = {col: df[col] for col in df.columns}
+    # float64 and nullable Float64 (what concat makes of Int32 + float32)
+    floats = [col for col, dtype in df.dtypes.items() if _is_wide_float(dtype)]
+    if floats and len(df):
+        data = df[floats].to_numpy(dtype="float64", na_value=np.nan)
+        plan = float_dtypes(data, float_rtol)
+        missing = np.isnan(data)
+        for dtype in ("float32", "int32", "Int32"):
+            idx = [i for i, target in enumerate(plan) if target == dtype]
+            if not idx:
+                continue
+            if dtype == "float32":
+                block = data[:, idx].astype("float32")
+            else:
+                block = np.where(missing[:, idx], 0, data[:, idx]).astype("int32")
+            for j, i in enumerate(idx):
+                if dtype == "Int32":
+                    columns[floats[i]] = pd.arrays.IntegerArray(
+                        block[:, j], missing[:, i]
+                    )
+                else:
+                    columns[floats[i]] = block[:, j]
+
+    for col, dtype in df.dtypes.items():
+        if not _is_wide_float(dtype):
+            compacted = compact_column(df[col])
+            if compacted is not None:
+                columns[col] = compacted
+
+    return pd.DataFrame(columns, index=df.index)
+
+
+def align_categories(frames):
+    """
+    Give categorical columns the same categories in every frame, so concat
+    keeps them categorical instead of falling back to object
+    """
+    columns = {
+        col
+        for df in frames
+        for col in df.columns
+        if isinstance(df[col].dtype, pd.CategoricalDtype)
+    }
+    for col in columns:
+        parts = [df[col] for df in frames if col in df.columns]
+        if not all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            continue
+        categories = pd.api.types.union_categoricals(parts).categories
+        for df in frames:
+            if col in df.columns:
+                df[col] = df[col].cat.set_categories(categories)
+    return frames
+
+
+def frame_bytes(df):
+    """In-memory size of `df`, strings and index included"""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+# ===== PROFILE DIMENSION =====
+def profile_path(root, ticker):
+    return os.path.join(root, PROFILE_DIR, f"{ticker}.parquet")
+
+
+def read_profiles(root, ticker):
+    """All profile snapshots for `ticker`, oldest first (empty if none)"""
+    path = profile_path(root, ticker)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_parquet(path).sort_values("fetched_on", kind="stable")
+
+
+def write_profile_snapshot(root, ticker, profile, fetched_on=None):
+    """
+    Record today's profile for `ticker`. A new version is only added when a
+    value changed; a second fetch on the same day replaces that day's row.
+    """
+    fields = {
+        key: value
+        for key, value in profile.items()
+        if isinstance(value, (int, float, str))
+        and not isinstance(value, bool)
+        and not (isinstance(value, str) and len(value) >= 200)
+    }
+    fetched_on = pd.Timestamp(fetched_on or pd.Timestamp.today()).normalize()
+
+    row = coerce_types(pd.DataFrame([{"fetched_on": fetched_on, **fields}]))
+
+    snapshots = read_profiles(root, ticker)
+    if not snapshots.empty:
+        latest = snapshots.iloc[-1].drop("fetched_on").dropna().to_dict()
+        if latest == row.iloc[0].drop("fetched_on").dropna().to_dict():
+            return False
+        snapshots = snapshots[snapshots["fetched_on"] != fetched_on]
+
+    snapshots = pd.concat([snapshots, row], ignore_index=True) if len(snapshots) else row
+
+    path = profile_path(root, ticker)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _write_atomic(coerce_types(snapshots), path, index=False)
+    return True
+
+
+def join_profiles(df, root, ticker, columns):
+    """
+    As-of join the requested profile_* columns onto one ticker's date-indexed
+    rows: each row gets the latest snapshot fetched on or before its date, and
+    rows older than the first fetch get the earliest snapshot.
+    """
+    snapshots = read_profiles(root, ticker)
+    if snapshots.empty:
+        return df
+
+    fetched = snapshots["fetched_on"].to_numpy()
+    pos = np.searchsorted(fetched, df.index.to_numpy(), side="right") - 1
+    pos = np.maximum(pos, 0)
+
+    for col in columns:
+        field = col[len(PROFILE_PREFIX) :]
+        if field in snapshots.columns:
+            df[col] = snapshots[field].to_numpy()[pos]
+    return df
+
+
+# ===== READING =====
+def read_partition(path, columns=None, start=None, end=None, compact=False):
+    """
+    Read one partition with optional column projection and date filter;
+    compact=True shrinks the dtypes with compact_frame()
+    """
+    available = pq.read_schema(path).names
+    if columns is not None:
+        columns = ["date"] + [c for c in columns if c in available and c != "date"]
+
+    filters = []
+    if start is not None:
+        filters.append(("date", ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append(("date", "<=", pd.Timestamp(end)))
+
+    table = pq.read_table(path, columns=columns, filters=filters or None)
+    df = table.to_pandas()
+    if "date" in df.columns:
+        df = df.set_index("date")
+    return compact_frame(df) if compact else df
+
+
+def read_ticker_partition(
+    root, ticker, path, columns=None, start=None, end=None, compact=False
+):
+    """read_partition plus requested profile_* columns and a `ticker` column"""
+    df = read_partition(path, columns, start, end)
+    if columns is not None:
+        profile_cols = [
+            c for c in columns if c.startswith(PROFILE_PREFIX) and c not in df
+        ]
+        if profile_cols:
+            df = join_profiles(df, root, ticker, profile_cols)
+    df["ticker"] = ticker
+    return compact_frame(df) if compact else df
+
+
+def read_dataset(
+    root,
+    tickers=None,
+    columns=None,
+    start=None,
+    end=None,
+    workers=None,
+    compact=False,
+):
+    """
+    Load partitions into one date-indexed frame with a `ticker` column, in
+    (ticker, year) order. Only `columns` (when given) are decoded; partitions
+    outside the ticker list or date range are never opened. Requested
+    profile_* columns a partition doesn't carry come from the profile table.
+    Partitions are decoded on `workers` threads (Arrow releases the GIL).
+    compact=True shrinks each partition as it is read (compact_frame()), so
+    the full history fits on small workers.
+    """
+    partitions = list_partitions(root, tickers, start, end)
+    if not partitions:
+        return pd.DataFrame()
+
+    def read(partition):
+        ticker, _, path = partition
+        return read_ticker_partition(root, ticker, path, columns, start, end, compact)
+
+    if workers == 1 or len(partitions) == 1:
+        frames = [read(partition) for partition in partitions]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(read, partitions))
+
+    if not compact:
+        return pd.concat(frames)
+    # A column narrowed differently per partition widens again on concat
+    return compact_frame(pd.concat(align_categories(frames)))
+
+
+# ===== CSV MIGRATION =====
+def flatten_columns(df):
+    """yfinance ("Close", "^GSPC") column pairs → "Close_^GSPC" like datasets/ uses"""
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = ["_".join(str(p) for p in col if p) for col in df.columns]
+    return df
+
+
+def read_csv_partition(path, compact=False):
+    """Read a legacy {ticker}_{year}.csv; its first column is the date"""
+    with open(path, "r", encoding="utf-8") as f:
+        second_line = f.readlines(4096)[1:2]
+
+    if second_line and second_line[0].startswith("Ticker,"):
+        # yf.download dump: Price/Ticker header rows, then an empty Date row
+        df = pd.read_csv(path, header=[0, 1], index_col=0, skiprows=[2])
+        df = flatten_columns(df)
+    else:
+        df = pd.read_csv(path, index_col=0, low_memory=False)
+
+    df.index = pd.to_datetime(df.index)
+    df.index.name = "date"
+    return compact_frame(df) if compact else df
+
+
+def convert_csv_tree(src, dst=None, remove=False):
+    """One-shot migration of a {ticker}_{year}.csv directory into the store"""
+    dst = dst or src
+    converted = 0
+    src_bytes = 0
+    dst_bytes = 0
+    entries = {}
+
+    for filename in sorted(os.listdir(src)):
+        match = CSV_PARTITION_RE.match(filename)
+        if not match:
+            print(f"  ↷ Skipping {filename}")
+            continue
+
+        csv_path = os.path.join(src, filename)
+        ticker = match["ticker"].upper()
+        year = int(match["year"])
+
+        try:
+            df = read_csv_partition(csv_path)
+            path = write_partition(df, dst, ticker, year, record=False)
+            entries[path] = catalog.describe(path, ticker, year)
+        except Exception as e:
+            print(f"  ✗ Failed converting {filename}: {e}")
+            continue
+
+        src_bytes += os.path.getsize(csv_path)
+        dst_bytes += os.path.getsize(path)
+        converted += 1
+        print(f"  ✓ {filename} → {path}")
+
+        if remove:
+            os.remove(csv_path)
+
+    catalog.record(dst, entries)
+    print(
+        f"Converted {converted} files: {src_bytes / 1e6:.1f} MB CSV → "
+        f"{dst_bytes / 1e6:.1f} MB Parquet"
+    )
+    return converted
+
+
+def compact_report(root, float_rtol=FLOAT32_RTOL):
+    """
+    Bytes in memory per file of a store or {ticker}_{year}.csv tree, as
+    loaded and after compact_frame(). Returns (file, before, after) rows.
+    """
+    paths = [path for _, _, path in list_all_partitions(root)]
+
+    rows = []
+    for path in paths:
+        read = read_csv_partition if path.endswith(".csv") else read_partition
+        try:
+            df = read(path)
+        except Exception as e:
+            print(f"  ✗ Failed reading {path}: {e}")
+            continue
+        before = frame_bytes(df)
+        after = frame_bytes(compact_frame(df, float_rtol))
+        rows.append((path, before, after))
+        print(
+            f"  ✓ {os.path.relpath(path, root)}: {before / 1e6:.2f} MB → "
+            f"{after / 1e6:.2f} MB ({after / before - 1:+.0%})"
+        )
+
+    before = sum(row[1] for row in rows)
+    after = sum(row[2] for row in rows)
+    if rows:
+        print(
+            f"{len(rows)} files: {before / 1e6:.1f} MB → {after / 1e6:.1f} MB in "
+            f"memory, {(before - after) / 1e6:.1f} MB saved ({after / before - 1:+.0%})"
+        )
+    return rows
+
+
+def catalog_tree(root):
+    """
+    (Re)build the manifest of a store or {ticker}_{year}.csv tree from the
+    files on disk, then report schema drift
+    """
+    partitions = list_all_partitions(root)
+    listed = {path for _, _, path in partitions}
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if name.endswith(".csv") and path not in listed:
+            if CSV_PARTITION_RE.match(name):
+                print(f"  ↷ Skipping {name} (a Parquet partition replaces it)")
+            else:
+                print(f"  ↷ Skipping {name} (not a {{ticker}}_{{year}}.csv file)")
+
+    entries = {}
+    for ticker, year, path in partitions:
+        try:
+            df = read_csv_partition(path) if path.endswith(".csv") else None
+            entries[path] = catalog.describe(path, ticker, year, df)
+        except Exception as e:
+            print(f"  ✗ Failed describing {path}: {e}")
+
+    manifest = catalog.replace(root, entries)
+    rows = sum(entry["rows"] for entry in entries.values())
+    print(f"✓ Catalogued {len(entries)} files ({rows:,} rows) in {manifest.path}")
+
+    drift = manifest.drift()
+    if drift:
+        print(f"⚠ {len(drift)} files differ from the usual schema:")
+        for key, change in sorted(drift.items()):
+            print(
+                f"  {key}: {len(change['missing'])} missing, "
+                f"{len(change['added'])} added, {len(change['retyped'])} retyped"
+            )
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partitioned Parquet dataset store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    convert = sub.add_parser("convert", help="migrate a {ticker}_{year}.csv tree")
+    convert.add_argument("src")
+    convert.add_argument("--dst", help="store root (defaults to SRC)")
+    convert.add_argument(
+        "--remove-csv", action="store_true", help="delete each CSV once converted"
+    )
+
+    report = sub.add_parser(
+        "compact-report", help="bytes saved per file by compact dtypes"
+    )
+    report.add_argument("root")
+    report.add_argument(
+        "--rtol",
+        type=float,
+        default=FLOAT32_RTOL,
+        help="max relative error for float64 → float32",
+    )
+
+    index = sub.add_parser("catalog", help="build the manifest of a data directory")
+    index.add_argument("root")
+
+    args = parser.parse_args()
+    if args.command == "catalog":
+        catalog_tree(args.root)
+    elif args.command == "convert":
+        convert_csv_tree(args.src, args.dst, args.remove_csv)
+    elif args.command == "compact-report":
+        compact_report(args.root, args.rtol)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+import pytest
+
+from fmp_stub import StubFMP
+
+
+@pytest.fixture
+def fmp_stub():
+    stub = StubFMP().start()
+    yield stub
+    stub.stop()
@@ -0,0 +1,159 @@
+"""
+Local stand-in for the FMP API, served by http.server on 127.0.0.1.
+
+Answers every endpoint main.py fetches with small deterministic payloads and
+records each request, so tests can point FMPClient's base_url at it and count
+what was actually sent over the wire.
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+import pandas as pd
+
+# Last trading day the stub knows about; quotes are stamped with it
+LAST_DAY = pd.Timestamp("2024-03-28")
+
+FISCAL_YEARS = [2021, 2022, 2023]
+
+
+def price_rows(symbol, start, end):
+    days = pd.bdate_range(start, min(pd.Timestamp(end), LAST_DAY))
+    return [
+        {
+            "symbol": symbol,
+            "date": day.strftime("%Y-%m-%d"),
+            "open": 100.0 + i,
+            "high": 101.0 + i,
+            "low": 99.0 + i,
+            "close": 100.5 + i,
+            "volume": 1_000_000 + i,
+        }
+        for i, day in enumerate(days)
+    ]
+
+
+def statement_rows(symbol, fields):
+    rows = []
+    for i, year in enumerate(FISCAL_YEARS):
+        row = {
+            "symbol": symbol,
+            "date": f"{year}-12-31",
+            "filingDate": f"{year + 1}-02-15",
+            "acceptedDate": f"{year + 1}-02-15 16:30:00",
+        }
+        row.update({field: value * (1 + i) for field, value in fields.items()})
+        rows.append(row)
+    return rows
+
+
+def respond(endpoint, params):
+    """JSON payload for one request, or None for an unknown endpoint"""
+    symbols = (params.get("symbol") or params.get("symbols") or "").split(",")
+    symbol = symbols[0]
+
+    if endpoint == "stable/historical-price-eod/full":
+        return price_rows(symbol, params["from"], params["to"])
+    if endpoint == "stable/income-statement":
+        return statement_rows(symbol, {"revenue": 1e9, "netIncome": 1e8})
+    if endpoint == "stable/balance-sheet-statement":
+        return statement_rows(symbol, {"commonStock": 5e8, "totalAssets": 4e9})
+    if endpoint == "stable/cash-flow-statement":
+        return statement_rows(symbol, {"commonStockIssued": 2e7})
+    if endpoint == "stable/key-metrics":
+        return [
+            {"symbol": symbol, "date": f"{year}-12-31", "marketCap": 5e10}
+            for year in FISCAL_YEARS
+        ]
+    if endpoint == "stable/profile":
+        return [{"symbol": s, "companyName": s, "marketCap": 5e10} for s in symbols]
+    if endpoint == "stable/batch-quote":
+        stamp = int((LAST_DAY + pd.Timedelta(hours=20)).timestamp())
+        return [{"symbol": s, "price": 150.0, "timestamp": stamp} for s in symbols]
+    if endpoint in ("stable/splits", "stable/dividends"):
+        return []
+    return None
+
+
+class StubFMP:
+    """
+    Threaded stub server. `delay` holds every response that long, so
+    concurrent requests overlap; `requests` lists (endpoint, params) as
+    received and `max_in_flight` is the most requests open at once.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def endpoints(self):
+        """Request count per endpoint"""
+        with self._lock:
+            return Counter(endpoint for endpoint, _ in self.requests)
+
+    def symbols(self):
+        """Request count per symbol (or comma-joined batch label)"""
+        with self._lock:
+            return Counter(
+                params.get("symbol") or params.get("symbols")
+                for _, params in self.requests
+            )
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                endpoint = url.path.lstrip("/")
+                params = dict(parse_qsl(url.query))
+                params.pop("apikey", None)
+
+                with stub._lock:
+                    stub.requests.append((endpoint, params))
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    time.sleep(stub.delay)
+                    payload = respond(endpoint, params)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+                if payload is None:
+                    self.send_error(404)
+                    return
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
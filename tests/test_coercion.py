@@ -0,0 +1,94 @@
+"""to_numeric_frame / coerce_scalar against the per-cell functions they replace"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.coercion import DATA_DIR, clean_numeric, load_frames, safe_num
+from coercion import coerce_scalar, to_numeric_frame
+
+# Strings where a naive vectorized parse and float()/literal_eval disagree
+EDGE_CASES = [
+    # Stringified lists, quoted items included
+    "['$1,000', 2]",
+    '["1,234", 5]',
+    '["1_000", 2]',
+    "['１２']",
+    '["$-5%"]',
+    "[[1, 2], 3]",
+    "[(1, 2), 3]",
+    "[True, 2]",
+    "[1_000]",
+    "['a', 1]",
+    "[None, 1]",
+    "[inf]",
+    "[]",
+    "[1,",
+    # Underscores and non-ASCII digits, which float() accepts
+    "1_000",
+    "1__0",
+    "１２",
+    "٣",
+    # Formatting
+    "$-5",
+    "5%",
+    "1,2,3",
+    "1.5e-3%",
+    "0x10",
+    " 7 ",
+    "'1'",
+    "",
+    # Non-finite
+    "Infinity",
+    "-inf",
+    "nan",
+    "NaN",
+    "1e400",
+    "-1e400",
+]
+
+NON_FINITE = [np.inf, -np.inf, np.nan, None, float("nan")]
+
+STORE = os.path.join(os.path.dirname(__file__), os.pardir, DATA_DIR)
+
+
+def reference(frame, fn):
+    return frame.map(fn).astype("float64")
+
+
+@pytest.mark.parametrize("value", EDGE_CASES + NON_FINITE)
+def test_coerce_scalar_matches_reference(value):
+    expected = clean_numeric(value)
+    np.testing.assert_equal(coerce_scalar(value), expected)
+    np.testing.assert_equal(safe_num(value), expected)
+
+
+def test_text_columns_match_reference():
+    frame = pd.DataFrame({"text": EDGE_CASES, "mixed": [*EDGE_CASES[:-1], 1.5]})
+    actual = to_numeric_frame(frame)
+
+    pd.testing.assert_frame_equal(actual, reference(frame, clean_numeric))
+    pd.testing.assert_frame_equal(actual, reference(frame, safe_num))
+
+
+def test_non_finite_values_match_reference():
+    frame = pd.DataFrame(
+        {
+            "float": [1.0, np.inf, -np.inf, np.nan, 2.0],
+            "object": pd.Series(NON_FINITE, dtype=object),
+            "with_text": pd.Series([np.inf, "-inf", None, "nan", "$3"], dtype=object),
+        }
+    )
+    actual = to_numeric_frame(frame)
+
+    pd.testing.assert_frame_equal(actual, reference(frame, clean_numeric))
+    assert np.isinf(actual["float"]).sum() == 2
+
+
+@pytest.mark.skipif(not os.path.isdir(STORE), reason=f"no {DATA_DIR} tree")
+def test_stored_files_match_reference():
+    for frame in load_frames(STORE):
+        actual = to_numeric_frame(frame)
+        pd.testing.assert_frame_equal(actual, reference(frame, clean_numeric))
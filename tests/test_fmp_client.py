@@ -0,0 +1,152 @@
+"""FMPClient and main.py's per-ticker fan-out against the local stub server"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import main
+from fmp_cache import ResponseCache
+from fmp_client import FMPClient
+
+ENDPOINTS = {
+    "stable/historical-price-eod/full",
+    "stable/income-statement",
+    "stable/balance-sheet-statement",
+    "stable/cash-flow-statement",
+    "stable/key-metrics",
+    "stable/profile",
+    "stable/splits",
+    "stable/dividends",
+}
+
+
+def pipeline_options(stub, tmp_path, rate=0, **overrides):
+    return {
+        "base_url": stub.url,
+        "rate": rate,
+        "fetch_threads": 8,
+        "cache_dir": str(tmp_path / "cache"),
+        "cache_max_mb": 16,
+        "offline": False,
+        "output_dir": str(tmp_path / "datasets"),
+        "start_date": "2024-01-01",
+        "end_date": "2024-03-29",
+        "incremental": False,
+        "filing_lag_days": 0,
+        **overrides,
+    }
+
+
+@pytest.fixture
+def client(fmp_stub, tmp_path):
+    main.init_client(pipeline_options(fmp_stub, tmp_path))
+    yield main.client
+    main.client.shutdown()
+
+
+def test_ticker_fans_out_to_every_endpoint(fmp_stub, client):
+    futures = main.fetch_ticker_data(
+        "AAA", pd.Timestamp("2024-01-01"), pd.Timestamp("2024-03-29")
+    )
+    results = {name: future.result() for name, future in futures.items()}
+
+    assert set(fmp_stub.endpoints()) == ENDPOINTS
+    assert all(count == 1 for count in fmp_stub.endpoints().values())
+    assert fmp_stub.symbols() == {"AAA": 8}
+    assert client.call_count == 8
+    assert client.calls_for("AAA") == 8
+    assert client.endpoints_for("AAA") == sorted(ENDPOINTS)
+    assert len(results["prices"]) == len(pd.bdate_range("2024-01-01", "2024-03-28"))
+    assert results["profile"]["symbol"] == "AAA"
+
+
+def test_endpoint_requests_are_in_flight_together(fmp_stub, client):
+    fmp_stub.delay = 0.3
+    started = time.perf_counter()
+    futures = main.fetch_ticker_data(
+        "AAA", pd.Timestamp("2024-01-01"), pd.Timestamp("2024-03-29")
+    )
+    for future in futures.values():
+        future.result()
+    elapsed = time.perf_counter() - started
+
+    assert fmp_stub.max_in_flight >= 4
+    assert elapsed < 8 * fmp_stub.delay / 2
+
+
+def test_token_bucket_caps_request_rate(fmp_stub):
+    rate, burst, calls = 20, 5, 25
+    client = FMPClient("key", fmp_stub.url, rate=rate, burst=burst, max_workers=8)
+    started = time.perf_counter()
+    futures = [
+        client.submit(client.get, "stable/profile", {"symbol": f"S{i}"})
+        for i in range(calls)
+    ]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - started
+    client.shutdown()
+
+    # The burst goes out at once, every later call waits for a token
+    assert elapsed >= (calls - burst) / rate * 0.95
+    assert elapsed < (calls - burst) / rate + 1.0
+    assert client.call_count == calls
+    assert len(fmp_stub.requests) == calls
+
+
+def test_pipeline_call_counts(fmp_stub, tmp_path):
+    options = pipeline_options(fmp_stub, tmp_path)
+    summaries, batch_calls, prefetched = main.run_pipeline(["AAA", "BBB"], options)
+
+    # One batched profile call warms the cache for both tickers
+    assert batch_calls == 1
+    assert fmp_stub.symbols()["AAA,BBB"] == 1
+    assert fmp_stub.endpoints()["stable/profile"] == 1
+    assert [row["status"] for row in summaries] == ["ok", "ok"]
+    assert [row["calls"] for row in summaries] == [7, 7]
+    assert [row["cached"] for row in summaries] == [1, 1]
+    assert len(fmp_stub.requests) == batch_calls + 14
+    assert prefetched["AAA"] == ["stable/profile"]
+
+
+def test_batch_quotes_use_symbols_param(fmp_stub, client):
+    quotes = main.fetch_quotes(["AAA", "BBB", "CCC"], batch_size=2)
+
+    assert sorted(quotes) == ["AAA", "BBB", "CCC"]
+    assert [params for _, params in fmp_stub.requests] == [
+        {"symbols": "AAA,BBB"},
+        {"symbols": "CCC"},
+    ]
+    assert main.quote_day(quotes["AAA"]) == pd.Timestamp("2024-03-28")
+
+
+def test_incremental_run_skips_tickers_with_no_new_quote(fmp_stub, tmp_path):
+    options = pipeline_options(fmp_stub, tmp_path, incremental=True)
+    first, _, _ = main.run_pipeline(["AAA", "BBB"], options)
+    assert [row["status"] for row in first] == ["ok", "ok"]
+
+    # Fresh cache: only the quote check reaches the server
+    fmp_stub.requests.clear()
+    options["cache_dir"] = str(tmp_path / "cold_cache")
+    second, batch_calls, _ = main.run_pipeline(["AAA", "BBB"], options)
+
+    assert [row["status"] for row in second] == ["up-to-date", "up-to-date"]
+    assert batch_calls == 1
+    assert fmp_stub.requests == [("stable/batch-quote", {"symbols": "AAA,BBB"})]
+
+
+def test_cache_writes_of_one_key_from_many_threads(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache"))
+    params = {"symbol": "AAA"}
+
+    def write(i):
+        cache.put("stable/profile", params, [{"symbol": "AAA", "n": i}])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(200)))
+
+    hit, data = cache.get("stable/profile", params)
+    assert hit and data[0]["symbol"] == "AAA"
+    assert not list((tmp_path / "cache").rglob("*.tmp"))
@@ -0,0 +1,39 @@
+"""Per-fold scaling in model_search"""
+
+import numpy as np
+
+import model_search
+
+
+def test_fold_target_scales_by_training_rows_only():
+    raw = np.array([1.0, -2.0, 4.0, 100.0])
+    y = model_search.fold_target(raw, np.array([0, 1, 2]))
+
+    # The test row's 100 neither sets the scale nor escapes [-1, 1]
+    np.testing.assert_allclose(y, [0.25, -0.5, 1.0, 1.0])
+
+
+def test_fold_target_with_all_zero_training_rows():
+    raw = np.array([0.0, 0.0, 3.0])
+    y = model_search.fold_target(raw, np.array([0, 1]))
+    np.testing.assert_allclose(y, [0.0, 0.0, 1.0])
+
+
+def test_search_refits_scaler_and_target_per_fold():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(120, 3))
+    raw = X @ np.array([3.0, -1.0, 0.5]) * 1e6
+    splits = model_search.walk_forward_splits(np.repeat(np.arange(40), 3), 3)
+
+    results = model_search.search(
+        X,
+        raw,
+        splits,
+        candidates={"linear": model_search.LinearRegression()},
+        n_jobs=1,
+        target=model_search.fold_target,
+    )
+
+    # A raw target in the millions still fits once each fold scales it
+    assert list(results["fold"]) == [0, 1, 2]
+    assert (results["r2"] > 0.9).all()
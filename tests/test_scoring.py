@@ -0,0 +1,89 @@
+"""Compiled and batch scoring (scoring.py) against the pandas paths they replace"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import PRIMITIVE_INPUTS
+from scoring import CompiledScorer, score_features
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), os.pardir, "Stock-Market-Web-App", "app")
+)
+from algorith import StockPredictor  # noqa: E402
+from benchmarks.scoring import messy_primitives, synthetic_bundle  # noqa: E402
+
+RTOL = 1e-9
+
+# The pandas path divides by zeros and infs on purpose
+pytestmark = pytest.mark.filterwarnings("ignore::RuntimeWarning")
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    return StockPredictor(bundle=synthetic_bundle())
+
+
+def assert_matches(actual, expected):
+    atol = RTOL * max(1.0, np.abs(expected).max())
+    np.testing.assert_allclose(actual, expected, rtol=RTOL, atol=atol)
+
+
+def test_messy_frame_matches_pandas_path(predictor):
+    df = messy_primitives(500)
+    assert_matches(predictor.scorer.score(df), predictor.predict_frame(df))
+
+
+def test_missing_inputs_match_pandas_path(predictor):
+    df = messy_primitives(200).iloc[:, :5]
+    assert_matches(predictor.scorer.score(df), predictor.predict_frame(df))
+
+
+def test_dicts_and_arrays_match_pandas_path(predictor):
+    df = messy_primitives(100)
+    expected = predictor.predict_frame(df)
+    per_row = np.concatenate(
+        [predictor.scorer.score(row) for row in df.to_dict("records")]
+    )
+    assert_matches(per_row, expected)
+
+    # Without the formatted strings an array works too
+    numeric = df.drop(columns="totalDebt")
+    array = numeric.reindex(columns=PRIMITIVE_INPUTS, fill_value=0).to_numpy()
+    assert_matches(predictor.scorer.score(array), predictor.predict_frame(numeric))
+
+
+@pytest.mark.parametrize("value", [0.0, np.nan, np.inf, -np.inf])
+def test_non_finite_and_zero_inputs_match_pandas_path(predictor, value):
+    df = pd.DataFrame(1.0, index=range(3), columns=PRIMITIVE_INPUTS)
+    df.iloc[0] = value
+    df.loc[1, "marketPrice"] = value
+    df.loc[2, "sharesOutstanding"] = value
+
+    scores = predictor.scorer.score(df)
+    assert_matches(scores, predictor.predict_frame(df))
+    assert np.isfinite(scores).all()
+
+
+def test_only_linear_bundles_compile():
+    bundle = synthetic_bundle()
+    bundle.estimator = object()
+    with pytest.raises(ValueError):
+        CompiledScorer(bundle)
+
+
+def test_score_features_skips_incomplete_rows():
+    bundle = synthetic_bundle()
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(size=(6, len(bundle.columns))), columns=bundle.columns)
+    df.iloc[1, 0] = np.nan
+    df.iloc[3, 2] = np.inf
+
+    heat = score_features(bundle, df)
+    complete = [0, 2, 4, 5]
+
+    assert np.isnan(heat[[1, 3]]).all()
+    assert_matches(heat[complete], bundle.predict(df.iloc[complete].to_numpy()))